@@ -0,0 +1,529 @@
+import math
+import numpy as np
+from collections import deque
+from formulas import analyze_equilibrium_states, summarize_recovery_episodes, validate_targets
+from episodes import (recovery_episodes, crisis_mask, find_runs, segment_sums, PRICE_THRESHOLD,
+                      LIQUIDITY_THRESHOLD, STABILITY_THRESHOLD, POST_EPISODE_WINDOW)
+from results import ResultStore, results_frame, circuit_breaker_mask
+from vector_formulas import CIRCUIT_BREAKERS, pack_flags
+
+# Columns the analysis dict and the report summary read
+ANALYSIS_COLUMNS = (
+    'current_price', 'price_stability_index', 'liquidity_ratio', 'liquidity_health_index',
+    'market_pressure', 'convergence_rate', 'validator_count', 'holder_count',
+    'transaction_volume', 'network_utility_score', 'transaction_settlement_rate',
+    'daily_validator_reward_usdc', 'daily_holder_cost_usdc', 'transaction_fee_usdc',
+    'is_equilibrium', 'epoch_duration', 'circuit_breaker_flags'
+)
+
+def result_columns(results):
+    """
+    Materialize the analysis columns once as NumPy arrays
+    Returns (columns, df); df is a zero-copy DataFrame for a ResultStore
+    """
+    df = results_frame(results)
+    if isinstance(results, ResultStore):
+        columns = {name: results.column(name) for name in ANALYSIS_COLUMNS}
+    else:
+        columns = {
+            name: df[name].to_numpy() for name in ANALYSIS_COLUMNS
+            if name in df and name != 'circuit_breaker_flags'
+        }
+        columns['circuit_breaker_flags'] = pack_flags(
+            *(circuit_breaker_mask(df, name).to_numpy() for name in CIRCUIT_BREAKERS)
+        )
+    return columns, df
+
+def analyze_results(results, targets, scenario_name='Base Scenario'):
+    """
+    Compute the analysis dict and the report summary in one pass
+    Columns are materialized once and every shared reduction (means, sums,
+    extremes, circuit breaker counts) is computed a single time for both
+    """
+    columns, df = result_columns(results)
+    n = len(columns['current_price'])
+
+    price = columns['current_price']
+    price_deviation = np.abs(price - 1)
+    liquidity = columns['liquidity_ratio']
+    rewards = columns['daily_validator_reward_usdc']
+    costs = columns['daily_holder_cost_usdc']
+    equilibrium = columns['is_equilibrium']
+
+    price_mean = price.mean()
+    price_std = price.std(ddof=1)
+    price_max_deviation = price_deviation.max()
+    psi_mean = columns['price_stability_index'].mean()
+    nus_mean = columns['network_utility_score'].mean()
+    fee_mean = columns['transaction_fee_usdc'].mean()
+    total_rewards = rewards.sum()
+    total_costs = costs.sum()
+    equilibrium_count = np.count_nonzero(equilibrium)
+
+    # One histogram of the packed flags yields every breaker's count
+    flag_counts = np.bincount(columns['circuit_breaker_flags'], minlength=1 << len(CIRCUIT_BREAKERS))
+    flag_values = np.arange(len(flag_counts))
+    breaker_counts = {
+        name: int(flag_counts[(flag_values & (1 << bit)) != 0].sum())
+        for bit, name in enumerate(CIRCUIT_BREAKERS)
+    }
+
+    analysis = {
+        'stability_metrics': {
+            'price_stability': psi_mean,
+            'price_volatility': price_std,
+            'liquidity_health': columns['liquidity_health_index'].mean(),
+            'market_pressure_avg': columns['market_pressure'].mean(),
+            'convergence_rate_avg': columns['convergence_rate'].mean(),
+            'price_mean': price_mean,
+            'price_max_deviation': price_max_deviation
+        },
+        'equilibrium_states': analyze_equilibrium_states(df),
+        'recovery_metrics': summarize_recovery_episodes(
+            recovery_episodes(price, liquidity, columns['price_stability_index'], costs), psi_mean),
+        'economic_metrics': {
+            'total_validator_rewards': total_rewards,
+            'total_holder_costs': total_costs,
+            'avg_transaction_fee': fee_mean,
+            'net_economic_impact': total_rewards - total_costs,
+            'economic_efficiency': nus_mean / fee_mean
+        }
+    }
+    analysis['success_criteria'] = validate_targets(analysis, targets)
+
+    validators = columns['validator_count']
+    holders = columns['holder_count']
+    summary = {
+        'scenario_name': scenario_name,
+
+        # Price Stability Metrics
+        'price_mean': price_mean,
+        'price_std': price_std,
+        'price_max_deviation': price_max_deviation,
+        'price_stability_score': psi_mean,
+
+        # Liquidity Metrics
+        'liquidity_mean': liquidity.mean(),
+        'liquidity_min': liquidity.min(),
+        'liquidity_variance': liquidity.var(ddof=1),
+
+        # Participant Metrics
+        'validator_retention': validators[-1] / validators[0],
+        'holder_retention': holders[-1] / holders[0],
+        'avg_transaction_volume': columns['transaction_volume'].mean(),
+
+        # Network Health
+        'network_utility_mean': nus_mean,
+        'network_utility_min': columns['network_utility_score'].min(),
+        'settlement_rate': columns['transaction_settlement_rate'].mean(),
+
+        # Economic Impact
+        'total_validator_rewards': total_rewards,
+        'total_holder_costs': total_costs,
+        'avg_transaction_fee': fee_mean,
+        'net_economic_impact': (rewards - costs).sum(),
+
+        # Circuit Breaker Events
+        'trading_halts': breaker_counts['halt_trading'],
+        'emergency_measures': breaker_counts['emergency_spreads'],
+        'rebase_events': breaker_counts['needs_rebase'],
+
+        # Equilibrium Analysis
+        'equilibrium_percentage': (equilibrium_count / n) * 100,
+        'time_in_equilibrium': equilibrium_count * columns['epoch_duration'].mean(),
+    }
+
+    summary.update(target_checks(summary))
+    return analysis, summary
+
+def target_checks(summary):
+    """Check a report summary against the performance targets from precept"""
+    return {
+        'meets_price_target': summary['price_max_deviation'] <= 0.02,
+        'meets_liquidity_target': summary['liquidity_variance'] <= 0.1,
+        'meets_retention_target': min(summary['validator_retention'],
+                                    summary['holder_retention']) >= 0.9,
+        'meets_settlement_target': summary['settlement_rate'] >= 0.99
+    }
+
+def merge_moments(count, mean, m2, values):
+    """Fold a block of values into a running (mean, sum of squared deviations) over count values"""
+    n = len(values)
+    block_mean = values.mean()
+    block_m2 = np.square(values - block_mean).sum()
+    total = count + n
+    delta = block_mean - mean
+    return mean + delta * n / total, m2 + block_m2 + delta * delta * count * n / total
+
+class StreamingAnalysis:
+    """
+    Online replacement for a ResultStore that keeps only running accumulators
+    Accepts the same append() calls as ResultStore, so MarketSimulation feeds
+    it from run_epoch, and finishes with the analyze_results analysis dict
+    while holding O(1) memory in the number of epochs
+    """
+
+    def __init__(self, targets):
+        self.targets = targets
+        self.count = 0
+        # Sums for the column means
+        self.sums = {
+            'price_stability_index': 0.0,
+            'liquidity_health_index': 0.0,
+            'market_pressure': 0.0,
+            'convergence_rate': 0.0,
+            'network_utility_score': 0.0,
+            'transaction_fee_usdc': 0.0,
+            'daily_validator_reward_usdc': 0.0,
+            'daily_holder_cost_usdc': 0.0
+        }
+        # Welford accumulators for the price mean and sample deviation
+        self.price_mean = 0.0
+        self.price_m2 = 0.0
+        self.price_max_deviation = 0.0
+
+        # Equilibrium streaks
+        self.equilibrium_count = 0
+        self.equilibrium_streak = 0
+        self.equilibrium_streaks = 0
+        self.longest_equilibrium_streak = 0
+
+        # Recovery episodes: the open crisis, post-episode stability windows
+        # still filling, and the last window of stability for an unfinished one
+        self.crisis_start = None
+        self.crisis_cost = 0.0
+        self.pending_windows = []
+        self.recent_stability = deque(maxlen=POST_EPISODE_WINDOW)
+        self.recovery_count = 0
+        self.recovery_successes = 0
+        self.recovery_duration_sum = 0
+        self.longest_recovery = 0
+        self.recovery_cost_sum = 0.0
+        self.recovery_stability_sum = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, circuit_breakers=None, failing_metrics=None, **values):
+        """Fold one epoch into the accumulators"""
+        i = self.count
+        self.count += 1
+        sums = self.sums
+        for name in sums:
+            sums[name] += values[name]
+
+        price = values['current_price']
+        delta = price - self.price_mean
+        self.price_mean += delta / self.count
+        self.price_m2 += delta * (price - self.price_mean)
+        price_deviation = abs(price - 1)
+        if price_deviation > self.price_max_deviation:
+            self.price_max_deviation = price_deviation
+
+        if values['is_equilibrium']:
+            self.equilibrium_count += 1
+            if not self.equilibrium_streak:
+                self.equilibrium_streaks += 1
+            self.equilibrium_streak += 1
+            if self.equilibrium_streak > self.longest_equilibrium_streak:
+                self.longest_equilibrium_streak = self.equilibrium_streak
+        else:
+            self.equilibrium_streak = 0
+
+        self._update_recovery(i, price_deviation, values)
+
+    def extend(self, columns):
+        """
+        Fold a block of epochs given as {name: array}, e.g. one stored chunk
+        Equilibrium streaks, crises and post-episode windows spanning block
+        boundaries carry over, so any split of a run gives append()'s result
+        """
+        price = np.asarray(columns['current_price'], dtype=np.float64)
+        n = len(price)
+        if not n:
+            return
+        start = self.count
+        for name in self.sums:
+            self.sums[name] += float(np.sum(columns[name]))
+        self.price_mean, self.price_m2 = merge_moments(start, self.price_mean, self.price_m2, price)
+        self.price_max_deviation = max(self.price_max_deviation, float(np.abs(price - 1).max()))
+        self._extend_equilibrium(np.asarray(columns['is_equilibrium'], dtype=bool))
+        self._extend_recovery(start, price, np.asarray(columns['liquidity_ratio'], dtype=np.float64),
+                              np.asarray(columns['price_stability_index'], dtype=np.float64),
+                              np.asarray(columns['daily_holder_cost_usdc'], dtype=np.float64))
+        self.count = start + n
+
+    def _extend_equilibrium(self, equilibrium):
+        """Fold a block's equilibrium streaks, continuing the open one"""
+        self.equilibrium_count += int(np.count_nonzero(equilibrium))
+        starts, ends = find_runs(equilibrium)
+        if not len(starts):
+            self.equilibrium_streak = 0
+            return
+        lengths = ends - starts
+        if starts[0] == 0 and self.equilibrium_streak:
+            lengths[0] += self.equilibrium_streak
+            self.equilibrium_streaks -= 1
+        self.equilibrium_streaks += len(starts)
+        self.longest_equilibrium_streak = max(self.longest_equilibrium_streak, int(lengths.max()))
+        self.equilibrium_streak = int(lengths[-1]) if ends[-1] == len(equilibrium) else 0
+
+    def _extend_recovery(self, start, price, liquidity, stability, cost):
+        """Fold a block's crises and post-episode windows, continuing the open ones"""
+        n = len(price)
+        # Windows still filling take this block's first epochs
+        pending = []
+        for window in self.pending_windows:
+            take = min(POST_EPISODE_WINDOW - window[1], n)
+            window[0] += float(stability[:take].sum())
+            window[1] += take
+            if window[1] == POST_EPISODE_WINDOW:
+                self.recovery_stability_sum += window[0] / POST_EPISODE_WINDOW
+            else:
+                pending.append(window)
+
+        starts, ends = find_runs(crisis_mask(price, liquidity, stability))
+        costs = segment_sums(cost, starts, ends)
+        crisis_starts = start + starts
+        if self.crisis_start is not None:
+            # The open crisis goes on into this block, or ended right before it
+            if len(starts) and starts[0] == 0:
+                crisis_starts[0] = self.crisis_start
+                costs[0] += self.crisis_cost
+            else:
+                crisis_starts = np.concatenate(([self.crisis_start], crisis_starts))
+                ends = np.concatenate(([0], ends))
+                costs = np.concatenate(([self.crisis_cost], costs))
+
+        closed = ends < n
+        if closed.any():
+            durations = start + ends[closed] - crisis_starts[closed]
+            self.recovery_count += len(durations)
+            self.recovery_successes += len(durations)
+            self.recovery_duration_sum += int(durations.sum())
+            self.recovery_cost_sum += float(costs[closed].sum())
+            self.longest_recovery = max(self.longest_recovery, int(durations.max()))
+            # Recovered: each stability window starts with the first epoch out of crisis
+            window_starts = ends[closed]
+            window_ends = np.minimum(window_starts + POST_EPISODE_WINDOW, n)
+            sums = segment_sums(stability, window_starts, window_ends)
+            for window_sum, count in zip(sums.tolist(), (window_ends - window_starts).tolist()):
+                if count == POST_EPISODE_WINDOW:
+                    self.recovery_stability_sum += window_sum / POST_EPISODE_WINDOW
+                else:
+                    pending.append([window_sum, count])
+        self.pending_windows = pending
+
+        if len(ends) and ends[-1] == n:
+            self.crisis_start = int(crisis_starts[-1])
+            self.crisis_cost = float(costs[-1])
+        else:
+            self.crisis_start = None
+        self.recent_stability.extend(stability[-POST_EPISODE_WINDOW:].tolist())
+
+    def _update_recovery(self, i, price_deviation, values):
+        """Advance the crisis state machine and the post-episode windows"""
+        stability = values['price_stability_index']
+        is_crisis = (
+            price_deviation > PRICE_THRESHOLD or
+            values['liquidity_ratio'] < LIQUIDITY_THRESHOLD or
+            stability < STABILITY_THRESHOLD
+        )
+
+        if is_crisis:
+            if self.crisis_start is None:
+                self.crisis_start = i
+                self.crisis_cost = 0.0
+            self.crisis_cost += values['daily_holder_cost_usdc']
+        elif self.crisis_start is not None:
+            # Recovered: the stability window starts with this epoch
+            self._close_episode(i - self.crisis_start, self.crisis_cost, True)
+            self.pending_windows.append([0.0, 0])
+            self.crisis_start = None
+
+        if self.pending_windows:
+            for window in self.pending_windows:
+                window[0] += stability
+                window[1] += 1
+            if self.pending_windows[0][1] == POST_EPISODE_WINDOW:
+                self.recovery_stability_sum += self.pending_windows.pop(0)[0] / POST_EPISODE_WINDOW
+        self.recent_stability.append(stability)
+
+    def _close_episode(self, duration, cost, successful):
+        """Fold one finished recovery episode into the recovery totals"""
+        self.recovery_count += 1
+        self.recovery_successes += successful
+        self.recovery_duration_sum += duration
+        self.recovery_cost_sum += cost
+        if duration > self.longest_recovery:
+            self.longest_recovery = duration
+
+    def _recovery_metrics(self, psi_mean):
+        """Recovery metrics, closing any open episode and partial windows"""
+        count = self.recovery_count
+        stability_sum = self.recovery_stability_sum
+        cost_sum = self.recovery_cost_sum
+        duration_sum = self.recovery_duration_sum
+        longest = self.longest_recovery
+        # Windows cut short by the end of the run average what they saw
+        for window_sum, window_count in self.pending_windows:
+            stability_sum += window_sum / window_count
+        if self.crisis_start is not None:
+            # Still in crisis at the end: unsuccessful, scored on the last window
+            duration = self.count - self.crisis_start
+            count += 1
+            duration_sum += duration
+            cost_sum += self.crisis_cost
+            longest = max(longest, duration)
+            stability_sum += sum(self.recent_stability) / len(self.recent_stability)
+
+        if not count:
+            return {
+                'average_recovery_time': 0,
+                'recovery_success_rate': 1.0,  # No recoveries needed = perfect score
+                'avg_cost_per_recovery': 0,
+                'stability_post_recovery': psi_mean
+            }
+        return {
+            'average_recovery_time': duration_sum / count,
+            'recovery_success_rate': self.recovery_successes / count,
+            'avg_cost_per_recovery': cost_sum / count,
+            'stability_post_recovery': stability_sum / count,
+            'total_recovery_periods': count,
+            'longest_recovery': longest,
+            'total_recovery_cost': cost_sum
+        }
+
+    def analysis(self):
+        """The analyze_results analysis dict for every epoch seen so far"""
+        n = self.count
+        means = {name: (total / n if n else math.nan) for name, total in self.sums.items()}
+        total_rewards = self.sums['daily_validator_reward_usdc']
+        total_costs = self.sums['daily_holder_cost_usdc']
+        equilibrium = self.equilibrium_count
+        streaks = self.equilibrium_streaks
+
+        analysis = {
+            'stability_metrics': {
+                'price_stability': means['price_stability_index'],
+                'price_volatility': math.sqrt(self.price_m2 / (n - 1)) if n > 1 else math.nan,
+                'liquidity_health': means['liquidity_health_index'],
+                'market_pressure_avg': means['market_pressure'],
+                'convergence_rate_avg': means['convergence_rate'],
+                'price_mean': self.price_mean if n else math.nan,
+                'price_max_deviation': self.price_max_deviation if n else math.nan
+            },
+            'equilibrium_states': {
+                'total_equilibrium_periods': equilibrium,
+                'longest_equilibrium_streak': self.longest_equilibrium_streak,
+                'average_equilibrium_duration': equilibrium / streaks if streaks else 0,
+                'percent_time_in_equilibrium': (equilibrium / n * 100) if n > 0 else 0,
+                'equilibrium_stability': (
+                    equilibrium / (n - equilibrium) if n > equilibrium else 1.0
+                ) if n else 0
+            },
+            'recovery_metrics': self._recovery_metrics(means['price_stability_index']),
+            'economic_metrics': {
+                'total_validator_rewards': total_rewards,
+                'total_holder_costs': total_costs,
+                'avg_transaction_fee': means['transaction_fee_usdc'],
+                'net_economic_impact': total_rewards - total_costs,
+                'economic_efficiency': means['network_utility_score'] / means['transaction_fee_usdc']
+            }
+        }
+        analysis['success_criteria'] = validate_targets(analysis, self.targets)
+        return analysis
+
+class ChunkedAnalysis(StreamingAnalysis):
+    """
+    StreamingAnalysis that also keeps the analyze_results report summary
+    Fed block by block through extend(), e.g. from ResultDataset.chunks(),
+    so stored results larger than memory can be analyzed
+    """
+
+    def __init__(self, targets):
+        super().__init__(targets)
+        self.liquidity_mean = 0.0
+        self.liquidity_m2 = 0.0
+        self.liquidity_min = math.inf
+        self.network_utility_min = math.inf
+        self.first = None  # (validator_count, holder_count) of the first and last epochs
+        self.last = None
+        self.totals = {'transaction_volume': 0.0, 'transaction_settlement_rate': 0.0, 'epoch_duration': 0.0,
+                       'net_economic_impact': 0.0}
+        self.flag_counts = np.zeros(1 << len(CIRCUIT_BREAKERS), dtype=np.int64)
+
+    def append(self, **values):
+        raise TypeError("ChunkedAnalysis is fed whole blocks through extend()")
+
+    def extend(self, columns):
+        """Fold a block of epochs given as {name: array} into the analysis and the summary"""
+        liquidity = np.asarray(columns['liquidity_ratio'], dtype=np.float64)
+        if not len(liquidity):
+            return
+        self.liquidity_mean, self.liquidity_m2 = merge_moments(self.count, self.liquidity_mean,
+                                                               self.liquidity_m2, liquidity)
+        self.liquidity_min = min(self.liquidity_min, float(liquidity.min()))
+        self.network_utility_min = min(self.network_utility_min, float(np.min(columns['network_utility_score'])))
+        if self.first is None:
+            self.first = (columns['validator_count'][0], columns['holder_count'][0])
+        self.last = (columns['validator_count'][-1], columns['holder_count'][-1])
+        for name in ('transaction_volume', 'transaction_settlement_rate', 'epoch_duration'):
+            self.totals[name] += float(np.sum(columns[name], dtype=np.float64))
+        self.totals['net_economic_impact'] += float(
+            (columns['daily_validator_reward_usdc'] - columns['daily_holder_cost_usdc']).sum())
+        self.flag_counts += np.bincount(columns['circuit_breaker_flags'], minlength=len(self.flag_counts))
+        super().extend(columns)
+
+    def summary(self, scenario_name='Base Scenario'):
+        """The analyze_results report summary for every epoch seen so far"""
+        analysis = self.analysis()
+        stability = analysis['stability_metrics']
+        economics = analysis['economic_metrics']
+        n = self.count
+        flag_values = np.arange(len(self.flag_counts))
+        breaker_counts = {
+            name: int(self.flag_counts[(flag_values & (1 << bit)) != 0].sum())
+            for bit, name in enumerate(CIRCUIT_BREAKERS)
+        }
+        summary = {
+            'scenario_name': scenario_name,
+
+            # Price Stability Metrics
+            'price_mean': stability['price_mean'],
+            'price_std': stability['price_volatility'],
+            'price_max_deviation': stability['price_max_deviation'],
+            'price_stability_score': stability['price_stability'],
+
+            # Liquidity Metrics
+            'liquidity_mean': self.liquidity_mean,
+            'liquidity_min': self.liquidity_min,
+            'liquidity_variance': self.liquidity_m2 / (n - 1) if n > 1 else math.nan,
+
+            # Participant Metrics
+            'validator_retention': self.last[0] / self.first[0],
+            'holder_retention': self.last[1] / self.first[1],
+            'avg_transaction_volume': self.totals['transaction_volume'] / n,
+
+            # Network Health
+            'network_utility_mean': self.sums['network_utility_score'] / n,
+            'network_utility_min': self.network_utility_min,
+            'settlement_rate': self.totals['transaction_settlement_rate'] / n,
+
+            # Economic Impact
+            'total_validator_rewards': economics['total_validator_rewards'],
+            'total_holder_costs': economics['total_holder_costs'],
+            'avg_transaction_fee': economics['avg_transaction_fee'],
+            'net_economic_impact': self.totals['net_economic_impact'],
+
+            # Circuit Breaker Events
+            'trading_halts': breaker_counts['halt_trading'],
+            'emergency_measures': breaker_counts['emergency_spreads'],
+            'rebase_events': breaker_counts['needs_rebase'],
+
+            # Equilibrium Analysis
+            'equilibrium_percentage': (self.equilibrium_count / n) * 100,
+            'time_in_equilibrium': self.equilibrium_count * self.totals['epoch_duration'] / n,
+        }
+        summary.update(target_checks(summary))
+        return summary
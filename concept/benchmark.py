@@ -0,0 +1,383 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+import continuous
+import formulas
+import kernel
+import numpy as np
+from events import EventModel, EVENT_TARGETS
+from formulas import MarketMetrics
+from example import MarketSimulation, PERFORMANCE_TARGETS, analyze_simulation_results, run_simulation
+from reports import create_analysis_report
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'baseline.json')
+REGRESSION_THRESHOLD = 0.25  # Flag anything more than 25% slower than its baseline
+HORIZONS = (1, 7, 30)  # Simulated days for the end-to-end layer
+MIN_TIME = 0.05  # Seconds each micro-benchmark repeat runs for at least
+
+BENCH_CONDITIONS = {
+    "validator_count": 5000,
+    "total_holders": 1000000,
+    "daily_transactions": 24305,
+    "current_price": 1.00,
+    "avg_transaction_size": 6000,
+    "avg_holding_balance": 10000,
+    "days_held": 30,
+    "liquidity_ratio": 0.8,
+    "cross_chain_transfers": 1000,
+    "buys_volume": 50000000,
+    "sells_volume": 50000000
+}
+
+# Example stress scenarios for the continuous engine parity check; both start
+# below the rebase band, so their runs turn on the regime chosen after a rebase
+CONTINUOUS_PARITY_SCENARIOS = {
+    'bench': BENCH_CONDITIONS,
+    'mass exodus': {
+        "validator_count": 2000,
+        "total_holders": 400000,
+        "daily_transactions": 80000000,
+        "current_price": 0.6,
+        "avg_transaction_size": 3000,
+        "avg_holding_balance": 5000,
+        "days_held": 3,
+        "liquidity_ratio": 0.1,
+        "cross_chain_transfers": 600000,
+        "buys_volume": 20000000000,
+        "sells_volume": 180000000000
+    },
+    'network stress': {
+        "validator_count": 1500,
+        "total_holders": 300000,
+        "daily_transactions": 90000000,
+        "current_price": 0.55,
+        "avg_transaction_size": 2500,
+        "avg_holding_balance": 4000,
+        "days_held": 2,
+        "liquidity_ratio": 0.05,
+        "cross_chain_transfers": 700000,
+        "buys_volume": 10000000000,
+        "sells_volume": 200000000000
+    }
+}
+
+def time_call(fn, repeat=3, min_time=MIN_TIME):
+    """Best seconds per call of fn() over repeat runs of at least min_time each"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 10
+    return min(timer.repeat(repeat, number)) / number
+
+def warm_metrics(epochs=60):
+    """MarketMetrics with full rolling windows"""
+    metrics = MarketMetrics()
+    for epoch in range(epochs):
+        metrics.update_metrics(1 + 0.01 * (-1) ** epoch, 1e8 + epoch, 0.1 * (-1) ** epoch)
+    return metrics
+
+def formula_cases(results):
+    """
+    Zero-argument callables for every function in formulas.py, by name
+    results is a filled ResultStore for the functions that analyze a run
+    """
+    metrics = warm_metrics()
+    df = results.to_dataframe()
+    episodes = formulas.find_recovery_episodes(df)
+    analysis = {
+        'stability_metrics': formulas.calculate_stability_metrics(results),
+        'recovery_metrics': formulas.analyze_recovery_metrics(results),
+        'economic_metrics': formulas.analyze_economic_metrics(results)
+    }
+    history = [1 + 0.01 * (-1) ** i for i in range(30)]
+    volumes = [1e8 + i for i in range(30)]
+    depth = [{'price': 0.99 + 0.001 * i, 'liquidity': 1000 + 10 * i} for i in range(20)]
+    book = SimpleNamespace(
+        bids=[SimpleNamespace(volume=100 + i) for i in range(10)],
+        asks=[SimpleNamespace(volume=90 + i) for i in range(10)]
+    )
+    current = {
+        'current_price': 0.97, 'convergence_rate': 0.05, 'liquidity_ratio': 0.5,
+        'market_pressure': 0.2, 'validator_count': 4500, 'holder_count': 950000,
+        'price_stability_index': 0.85, 'liquidity_health_index': 0.75, 'network_utility_score': 0.7,
+        'daily_holder_cost_usdc': 12.0, 'daily_validator_reward_usdc': 30.0
+    }
+    return {
+        'MarketMetrics.update_metrics': lambda: metrics.update_metrics(1.01, 1e8, 0.1),
+        'MarketMetrics.get_volatility': metrics.get_volatility,
+        'MarketMetrics.get_volume_weight': metrics.get_volume_weight,
+        'MarketMetrics.get_market_pressure': metrics.get_market_pressure,
+        'MarketMetrics.get_pressure_trend': metrics.get_pressure_trend,
+        'calculate_economics': lambda: formulas.calculate_economics(**BENCH_CONDITIONS, market_metrics=metrics),
+        'calculate_settlement_rate': lambda: formulas.calculate_settlement_rate(24305, 5000, 0.8, 0.1),
+        'calculate_stability_metrics': lambda: formulas.calculate_stability_metrics(results),
+        'analyze_equilibrium_states': lambda: formulas.analyze_equilibrium_states(results),
+        'find_recovery_episodes': lambda: formulas.find_recovery_episodes(df),
+        'identify_recovery_periods': lambda: formulas.identify_recovery_periods(df),
+        'summarize_recovery_episodes': lambda: formulas.summarize_recovery_episodes(episodes, 0.9),
+        'analyze_recovery_metrics': lambda: formulas.analyze_recovery_metrics(results),
+        'analyze_economic_metrics': lambda: formulas.analyze_economic_metrics(results),
+        'validate_targets': lambda: formulas.validate_targets(analysis, PERFORMANCE_TARGETS),
+        'calculate_historical_volatility': lambda: formulas.calculate_historical_volatility(history),
+        'calculate_volume_weight': lambda: formulas.calculate_volume_weight(volumes),
+        'calculate_order_imbalance': lambda: formulas.calculate_order_imbalance(book),
+        'calculate_time_weighted_flow': lambda: formulas.calculate_time_weighted_flow(volumes, volumes[::-1]),
+        'enhanced_price_stability_index': lambda: formulas.enhanced_price_stability_index(
+            24305, 1000000, 1.01, history, volumes, 5000),
+        'enhanced_network_utility_score': lambda: formulas.enhanced_network_utility_score(
+            1e8, 2e8, 1000, 500000, 50000, 100000, 0.99),
+        'enhanced_liquidity_health_index': lambda: formulas.enhanced_liquidity_health_index(
+            1000, 1000000, 0.8, 4e7, 5e7, 0.01, depth),
+        'enhanced_market_pressure': lambda: formulas.enhanced_market_pressure(
+            5e7, 4.5e7, 1e8, book, history),
+        'calculate_depth_score': lambda: formulas.calculate_depth_score(depth),
+        'calculate_gini_coefficient': lambda: formulas.calculate_gini_coefficient([d['liquidity'] for d in depth]),
+        'price_stability_index': lambda: formulas.price_stability_index(1.01, 0.1, 1.0, 1.0),
+        'validator_reward': lambda: formulas.validator_reward(0.1, 24305, 5000, 0.9),
+        'holder_cost': lambda: formulas.holder_cost(0.01, 30, 10000, 0.9),
+        'validator_holder_cost': lambda: formulas.validator_holder_cost(12.0, 30.0, 0.7),
+        'transaction_fee': lambda: formulas.transaction_fee(0.001, 0.9, 6000, 0.8),
+        'network_utility_score': lambda: formulas.network_utility_score(24305, 1000),
+        'liquidity_health_index': lambda: formulas.liquidity_health_index(1000, 1000000, 0.8, 4e7, 5e7),
+        'dynamic_spread': lambda: formulas.dynamic_spread(0.001, 0.8, 1e8, 2e8),
+        'emergency_spread': lambda: formulas.emergency_spread(0.001, 0.15),
+        'rebase_supply': lambda: formulas.rebase_supply(1e9, 1.1),
+        'stability_reserve_requirement': lambda: formulas.stability_reserve_requirement(1e10, 0),
+        'inflation_rate': lambda: formulas.inflation_rate(1e9, 1.01e9),
+        'circuit_breaker_conditions': lambda: formulas.circuit_breaker_conditions(0.8, 1.01, 0.9),
+        'market_pressure': lambda: formulas.market_pressure(5e7, 4.5e7, 8e7, 5000),
+        'convergence_rate': lambda: formulas.convergence_rate(1.01, 1.0, 0.1, 0.9),
+        'equilibrium_state': lambda: formulas.equilibrium_state(0.9, 0.8, 0.7, 0.05),
+        'determine_epoch_duration': lambda: formulas.determine_epoch_duration(24305, 5000000, 0.1),
+        'determine_matrix_size': lambda: formulas.determine_matrix_size(24305, 0.15),
+        'calculate_recovery_time': lambda: formulas.calculate_recovery_time(current),
+        'calculate_liquidity_restoration': lambda: formulas.calculate_liquidity_restoration(current),
+        'calculate_dynamic_spread': lambda: formulas.calculate_dynamic_spread(0.8, 0.1, 1.0)
+    }
+
+def bench_formulas(results, repeat=3):
+    """Layer 1: seconds per call of each function in formulas.py"""
+    cases = formula_cases(results)
+    defined = {
+        name for name, fn in inspect.getmembers(formulas, inspect.isfunction)
+        if fn.__module__ == formulas.__name__
+    }
+    missing = sorted(defined - set(cases))
+    if missing:
+        print(f"No micro-benchmark for: {', '.join(missing)}")
+    return {f"formulas.{name}": time_call(fn, repeat) for name, fn in cases.items()}
+
+def bench_epoch_loop(days=1, repeat=3):
+    """
+    Layer 2: seconds per MarketSimulation.run_epoch call, over days of epochs
+    When numba is installed, also seconds per epoch of the compiled kernel
+    """
+    epochs = int(days * 8640)
+    best = float('inf')
+    for _ in range(repeat):
+        sim = MarketSimulation(dict(BENCH_CONDITIONS), epochs)
+        start = time.perf_counter()
+        for epoch in range(epochs):
+            sim.run_epoch(epoch)
+        best = min(best, time.perf_counter() - start)
+    timings = {'epoch_loop.run_epoch': best / epochs}
+    if kernel.JIT_AVAILABLE:
+        # The first run pays for compilation
+        run_simulation(dict(BENCH_CONDITIONS), days, verbose=False, rollups=None, backend='jit')
+        timings['epoch_loop.jit_kernel'] = min(
+            timeit.repeat(lambda: run_simulation(dict(BENCH_CONDITIONS), days, verbose=False, rollups=None,
+                                                 backend='jit'), repeat=repeat, number=1)
+        ) / epochs
+    return timings
+
+def check_kernel_parity(days=1, seed=0):
+    """{run: mismatching columns} of the compiled kernel against run_epoch, with and without events"""
+    parity = {}
+    for run, events in (('no events', None), ('events', EventModel(seed=seed))):
+        mismatches = kernel.check_parity(BENCH_CONDITIONS, days, events)
+        if mismatches:
+            parity[run] = mismatches
+    return parity
+
+def check_continuous_parity(days=1):
+    """{scenario: metrics off tolerance} of the continuous engine against run_epoch"""
+    parity = {}
+    for name, conditions in CONTINUOUS_PARITY_SCENARIOS.items():
+        mismatches = continuous.check_parity(conditions, days)
+        if mismatches:
+            parity[name] = mismatches
+    return parity
+
+def check_scripted_shocks(paths=256, seed=0):
+    """
+    {(kind, condition): applied multiplier} of scripted shocks that
+    EventModel.sample_block does not apply exactly once
+    Each kind is shocked by 2.0 at one epoch of a block that also has
+    stochastic events, and compared with the same block without the shock
+    """
+    mismatches = {}
+    for kind, targets in EVENT_TARGETS.items():
+        shock = {'epoch': 5, 'event': kind, 'magnitude': 2.0}
+        plain = EventModel(seed=seed).sample_block(0, 10, paths)
+        shocked = EventModel(timeline=[shock], seed=seed).sample_block(0, 10, paths)
+        for key in set(plain) | set(shocked):
+            expected = plain.get(key, np.ones((10, paths))).copy()
+            if key in targets:
+                expected[5] *= 2.0
+            actual = shocked.get(key, np.ones((10, paths)))
+            if not np.array_equal(actual, expected):
+                mismatches[(kind, key)] = float(np.max(actual[5] / plain.get(key, np.ones((10, paths)))[5]))
+    return mismatches
+
+def bench_end_to_end(horizons=HORIZONS, repeat=1):
+    """
+    Layer 3: seconds to analyze and to report one scenario per horizon
+    Reports are written to a scratch directory, leaving reports/ untouched
+    """
+    timings = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            for days in horizons:
+                results = run_simulation(dict(BENCH_CONDITIONS), days, verbose=False).results
+                analysis = analyze_simulation_results(results, PERFORMANCE_TARGETS)
+                timings[f"end_to_end.analyze_simulation_results.{days}d"] = min(
+                    timeit.repeat(lambda: analyze_simulation_results(results, PERFORMANCE_TARGETS),
+                                  repeat=repeat, number=1)
+                )
+                timings[f"end_to_end.create_analysis_report.{days}d"] = min(
+                    timeit.repeat(lambda: create_analysis_report(results, analysis, 'reports/bench', 'Bench'),
+                                  repeat=repeat, number=1)
+                )
+        finally:
+            os.chdir(cwd)
+    return timings
+
+def load_baseline(path=BASELINE_PATH):
+    """Stored {benchmark: seconds} timings, or {} when there is no baseline"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)['timings']
+
+def save_baseline(timings, path=BASELINE_PATH):
+    """Store timings as the new baseline, along with the machine they were measured on"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timings': timings
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(path + '.tmp', path)
+
+def check_regressions(timings, baseline, threshold=REGRESSION_THRESHOLD):
+    """[(name, baseline, current, ratio)] of benchmarks slower than baseline by more than threshold"""
+    return [
+        (name, baseline[name], seconds, seconds / baseline[name])
+        for name, seconds in timings.items()
+        if baseline.get(name) and seconds > baseline[name] * (1 + threshold)
+    ]
+
+def print_timings(timings, baseline):
+    """Print each timing next to its baseline"""
+    print(f"\n{'Benchmark':<58}{'Time':>12}{'Baseline':>12}{'Ratio':>8}")
+    for name, seconds in timings.items():
+        reference = baseline.get(name)
+        if reference:
+            print(f"{name:<58}{format_seconds(seconds):>12}{format_seconds(reference):>12}"
+                  f"{seconds / reference:>8.2f}")
+        else:
+            print(f"{name:<58}{format_seconds(seconds):>12}{'-':>12}{'-':>8}")
+    if 'epoch_loop.run_epoch' in timings:
+        print(f"\nEpoch loop throughput: {1 / timings['epoch_loop.run_epoch']:,.0f} epochs/s")
+    if 'epoch_loop.jit_kernel' in timings:
+        print(f"JIT kernel throughput: {1 / timings['epoch_loop.jit_kernel']:,.0f} epochs/s")
+
+def format_seconds(seconds):
+    """Seconds with a unit that keeps 3-4 significant digits"""
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the simulation in layers: every function in formulas.py, run_epoch and "
+                    "JIT kernel throughput, kernel, continuous engine and scripted shock parity, and "
+                    "end-to-end analysis and report timing per horizon",
+        epilog="Record a baseline with --save-baseline, then run without it to check for regressions")
+    parser.add_argument('--layers', nargs='+', default=['formulas', 'epoch', 'parity', 'end-to-end'],
+                        choices=['formulas', 'epoch', 'parity', 'end-to-end'], help="benchmark layers to run")
+    parser.add_argument('--horizons', nargs='+', type=float, default=list(HORIZONS),
+                        help="simulated days for the end-to-end layer")
+    parser.add_argument('--repeat', type=int, default=3, help="repeats per benchmark; the best one counts")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed slowdown over the baseline, as a fraction")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store this run as the baseline instead of checking against it")
+    args = parser.parse_args()
+
+    timings = {}
+    if 'formulas' in args.layers:
+        # Analysis functions are timed on one simulated day of results
+        day = run_simulation(dict(BENCH_CONDITIONS), 1, verbose=False).results
+        timings.update(bench_formulas(day, args.repeat))
+    if 'epoch' in args.layers:
+        timings.update(bench_epoch_loop(repeat=args.repeat))
+    if 'parity' in args.layers:
+        shocks = check_scripted_shocks()
+        for (kind, key), multiplier in shocks.items():
+            print(f"Scripted {kind} shock scales {key} by {multiplier:g} instead of 2")
+        if shocks:
+            sys.exit(1)
+        parity = check_continuous_parity()
+        for run, mismatches in parity.items():
+            print(f"Continuous engine differs from run_epoch ({run}):")
+            for name, (expected, actual) in mismatches.items():
+                print(f"  {name}: {expected:.4g} in the epoch loop, {actual:.4g} continuous")
+        if parity:
+            sys.exit(1)
+    if 'parity' in args.layers and kernel.JIT_AVAILABLE:
+        parity = check_kernel_parity()
+        for run, mismatches in parity.items():
+            print(f"JIT kernel differs from run_epoch ({run}):")
+            for name, (epochs, relative) in mismatches.items():
+                print(f"  {name}: {epochs} epochs, up to {relative:.3g} relative")
+        if parity:
+            sys.exit(1)
+    if 'end-to-end' in args.layers:
+        horizons = [int(days) if days == int(days) else days for days in args.horizons]
+        timings.update(bench_end_to_end(horizons))
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(timings)
+        save_baseline(baseline, args.baseline)
+        print_timings(timings, {})
+        print(f"\nBaseline saved to {args.baseline}")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    print_timings(timings, baseline)
+    regressions = check_regressions(timings, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for name, reference, seconds, ratio in regressions:
+            print(f"  {name}: {format_seconds(reference)} -> {format_seconds(seconds)} ({ratio:.2f}x)")
+        sys.exit(1)
+    print("\nNo regressions" if baseline else "\nNo baseline to compare against; run with --save-baseline")
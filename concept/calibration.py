@@ -0,0 +1,192 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+from ensemble import STATE_KEYS
+from sweep import BatchSimulation
+
+# (default, low, high) of each calibrated constant, in parameter vector
+# order; names are the keyword arguments of vector_formulas.calculate_economics.
+# The equilibrium_state thresholds are left out: they define the equilibrium
+# the score rewards, so searching them would only move the goalposts
+CALIBRATION_PARAMETERS = {
+    'alpha': (0.1, 0.0, 0.5),              # convergence_rate price correction
+    'beta': (-0.05, -0.2, 0.0),            # convergence_rate pressure impact
+    'gamma': (0.05, 0.0, 0.2),             # convergence_rate stability impact
+    'validator_share': (0.9, 0.5, 1.0),    # validator_reward revenue share
+    'base_spread': (0.001, 0.0001, 0.01),  # calculate_dynamic_spread base
+    'validator_base': (0.5, 0.1, 1.0)      # calculate_dynamic_spread validator base
+}
+PARAMETER_NAMES = tuple(CALIBRATION_PARAMETERS)
+DEFAULT_VECTOR = np.array([default for default, _, _ in CALIBRATION_PARAMETERS.values()], dtype=np.float64)
+LOWER_BOUNDS = np.array([low for _, low, _ in CALIBRATION_PARAMETERS.values()], dtype=np.float64)
+UPPER_BOUNDS = np.array([high for _, _, high in CALIBRATION_PARAMETERS.values()], dtype=np.float64)
+
+# Score lost per unit of mean range-normalized distance from the defaults,
+# small enough to only break ties between otherwise equal candidates
+DISTANCE_PENALTY = 0.01
+
+def scenario_family(scenario):
+    """Family of a scenario: its name up to ' - ', e.g. 'Combined Crisis'"""
+    return scenario.get('name', 'Base Scenario').partition(' - ')[0]
+
+def group_families(scenarios):
+    """{family: [scenarios]} in first-seen order"""
+    families = {}
+    for scenario in scenarios:
+        families.setdefault(scenario_family(scenario), []).append(scenario)
+    return families
+
+def candidate_vectors(candidates, seed=None):
+    """
+    Candidate parameter vectors, one per row
+    Row 0 is the current defaults; the rest are a Latin hypercube sample of
+    the CALIBRATION_PARAMETERS ranges
+    """
+    unit = qmc.LatinHypercube(len(PARAMETER_NAMES), seed=seed).random(max(0, candidates - 1))
+    return np.vstack((DEFAULT_VECTOR, LOWER_BOUNDS + (UPPER_BOUNDS - LOWER_BOUNDS) * unit))
+
+def vector_constants(vector):
+    """{name: value} of one parameter vector"""
+    return {name: float(value) for name, value in zip(PARAMETER_NAMES, vector)}
+
+def evaluate_candidates(scenarios, vectors, total_epochs, targets, events=None, seed=None):
+    """
+    Run every candidate vector on every scenario for total_epochs in one batch
+    Returns per-candidate arrays averaged over the scenarios: 'score',
+    'targets_passed' (validate_targets criteria met, out of 4) and
+    'equilibrium_percentage'. The score ranks by targets passed, then time
+    in equilibrium under the default thresholds, then closeness to the defaults
+    """
+    n, m = len(vectors), len(scenarios)
+    conditions = {key: np.tile([scenario[key] for scenario in scenarios], n) for key in STATE_KEYS}
+    constants = {name: np.repeat(vectors[:, i], m) for i, name in enumerate(PARAMETER_NAMES)}
+    batch = BatchSimulation(conditions, n * m, total_epochs, events=events, seed=seed, constants=constants)
+    for epoch in range(total_epochs):
+        batch.run_epoch(epoch)
+
+    outcomes = batch.outcomes(targets)
+    targets_passed = outcomes['targets_passed'].reshape(n, m).mean(axis=1)
+    equilibrium = outcomes['equilibrium_percentage'].reshape(n, m).mean(axis=1)
+    distance = np.mean(np.abs(vectors - DEFAULT_VECTOR) / (UPPER_BOUNDS - LOWER_BOUNDS), axis=1)
+    return {
+        'score': targets_passed + equilibrium / 100 - DISTANCE_PENALTY * distance,
+        'targets_passed': targets_passed,
+        'equilibrium_percentage': equilibrium
+    }
+
+def halving_schedule(candidates, total_epochs, eta=3, min_epochs=360):
+    """
+    [(candidates, epochs)] per rung: candidates shrink by eta and horizons
+    grow by eta up to total_epochs, never shorter than min_epochs
+    """
+    sizes = [candidates]
+    while sizes[-1] > eta:
+        sizes.append(-(-sizes[-1] // eta))
+    rungs = len(sizes)
+    return [
+        (size, min(total_epochs, max(min_epochs, total_epochs // eta ** (rungs - 1 - rung))))
+        for rung, size in enumerate(sizes)
+    ]
+
+def successive_halving(scenarios, total_epochs, targets, candidates=81, eta=3, min_epochs=360,
+                       events=None, seed=None):
+    """
+    Best constant set for a group of scenarios by successive halving
+    Every rung re-runs its surviving candidates from the initial conditions
+    at the rung's horizon and keeps the best-scoring 1/eta (ties go to the
+    earlier candidate, so the defaults win a tie). The last rung runs at
+    total_epochs and always includes the defaults for comparison. Returns
+    {'scenarios', 'constants', 'score', 'targets_passed',
+    'equilibrium_percentage', 'default', 'rungs'}
+    """
+    vectors = candidate_vectors(candidates, seed)
+    alive = np.arange(len(vectors))
+    schedule = halving_schedule(len(vectors), total_epochs, eta, min_epochs)
+    rungs = []
+    for rung, (size, epochs) in enumerate(schedule):
+        if rung == len(schedule) - 1 and alive[0] != 0:
+            alive = np.concatenate(([0], alive))
+        start_time = time.time()
+        evaluation = evaluate_candidates(scenarios, vectors[alive], epochs, targets, events, seed)
+        rungs.append({'candidates': len(alive), 'epochs': epochs, 'elapsed': time.time() - start_time})
+        order = np.argsort(-evaluation['score'], kind='stable')
+        if rung < len(schedule) - 1:
+            alive = np.sort(alive[order[:schedule[rung + 1][0]]])
+
+    best = order[0]
+    default = int(np.flatnonzero(alive == 0)[0])
+    return {
+        'scenarios': [scenario.get('name', 'Base Scenario') for scenario in scenarios],
+        'constants': vector_constants(vectors[alive[best]]),
+        'score': float(evaluation['score'][best]),
+        'targets_passed': float(evaluation['targets_passed'][best]),
+        'equilibrium_percentage': float(evaluation['equilibrium_percentage'][best]),
+        'default': {
+            'score': float(evaluation['score'][default]),
+            'targets_passed': float(evaluation['targets_passed'][default]),
+            'equilibrium_percentage': float(evaluation['equilibrium_percentage'][default])
+        },
+        'rungs': rungs
+    }
+
+def calibrate(scenarios, total_epochs, targets, candidates=81, eta=3, min_epochs=360, workers=None,
+              events=None, seed=None):
+    """
+    Successive halving per scenario family, one family per worker process
+    Each family's candidates run as one shock-free BatchSimulation, one
+    path per (candidate, scenario). Scenario conditions must not carry
+    per-path arrays. Returns {family: successive_halving result} in
+    first-seen family order
+    """
+    families = group_families(scenarios)
+    workers = min(len(families), workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            family: pool.submit(successive_halving, members, total_epochs, targets, candidates, eta,
+                                min_epochs, events, seed)
+            for family, members in families.items()
+        }
+        return {family: future.result() for family, future in futures.items()}
+
+def calibration_frame(calibration):
+    """One row per family: scores of the best and default constants followed by the best constants"""
+    rows = []
+    for family, result in calibration.items():
+        row = {
+            'family': family,
+            'scenarios': len(result['scenarios']),
+            'score': result['score'],
+            'default_score': result['default']['score'],
+            'targets_passed': result['targets_passed'],
+            'default_targets_passed': result['default']['targets_passed'],
+            'equilibrium_percentage': result['equilibrium_percentage'],
+            'default_equilibrium_percentage': result['default']['equilibrium_percentage']
+        }
+        row.update(result['constants'])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def print_calibration(calibration):
+    """Print the best constants of each family next to how the defaults score"""
+    for family, result in calibration.items():
+        default = result['default']
+        print(f"\n{family} ({len(result['scenarios'])} scenarios):")
+        print(f"Targets Passed: {result['targets_passed']:.2f}/4 (defaults {default['targets_passed']:.2f}/4)")
+        print(f"Time in Equilibrium: {result['equilibrium_percentage']:.1f}% "
+              f"(defaults {default['equilibrium_percentage']:.1f}%)")
+        print("Rungs: " + ", ".join(f"{rung['candidates']} x {rung['epochs']} epochs" for rung in result['rungs']))
+        for name, value in result['constants'].items():
+            print(f"  {name:<16}{value:>12.6g}  (default {CALIBRATION_PARAMETERS[name][0]:g})")
+
+def load_calibration(path):
+    """
+    {family: constants} from a calibration.csv written by calibration_frame
+    The constants of a scenario's family go straight to run_simulation, e.g.
+    run_simulation(scenario, constants=load_calibration(path)[scenario_family(scenario)])
+    """
+    df = pd.read_csv(path)
+    names = [name for name in PARAMETER_NAMES if name in df.columns]
+    return {row['family']: {name: float(row[name]) for name in names} for _, row in df.iterrows()}
@@ -0,0 +1,290 @@
+import math
+import time
+import numpy as np
+from scipy.integrate import solve_ivp
+import vector_formulas as vf
+from ensemble import STATE_KEYS
+from events import EventModel, EVENT_TARGETS, EVENT_KINDS
+from results import ResultStore
+from rollups import RollupPyramid
+
+# Integrated state: price, the pressure signal and the logs of the counts
+# and volumes _update_conditions scales multiplicatively. Every other
+# condition is held constant between events
+LOG_KEYS = ('validator_count', 'total_holders', 'daily_transactions', 'buys_volume', 'sells_volume')
+PRICE, SIGNAL = 0, 1
+LOG_INDEX = {key: i + 2 for i, key in enumerate(LOG_KEYS)}
+
+# Per-epoch log growth of (daily_transactions, total_holders): the continuous
+# limits of the multipliers _update_conditions applies when the stability
+# index is >= and < STABILITY_SWITCH. Validators have no entry or exit flow
+# of their own, only events
+GROWTH_RATES = (math.log(1.01), math.log(1.005))
+DECLINE_RATES = (math.log(0.95), math.log(0.99))
+STABILITY_SWITCH = 0.8
+
+PRICE_TIMESCALE = 8640  # Epochs per unit of convergence_rate time: dp/dt is read per day
+PRESSURE_DECAY = 0.94  # MarketMetrics EWMA decay; the signal relaxes at 1 - decay per epoch
+VOLATILITY_WINDOW = 30  # Epochs of sampled prices behind each epoch's volatility
+MAX_SEGMENTS = 100000  # Guards against a switch chattering back and forth
+
+class ContinuousSimulation:
+    def __init__(self, initial_conditions, simulation_duration, events=None, results=None, rollups=True,
+                 price_timescale=PRICE_TIMESCALE, method='LSODA', rtol=1e-6, atol=1e-9):
+        """
+        Initialize a continuous-time run over simulation_duration epochs
+        Instead of stepping fixed 10-second epochs, scipy's adaptive
+        solve_ivp integrates the transition functions of precept sections
+        4.1 and 4.2, dp/dt = α(p_target - p) + β pressure + γ stability and
+        the participation counts as log growth rates, with vector_formulas
+        as the right-hand side. It takes long steps through calm stretches
+        and short ones around regime switches, rebases and shocks; the
+        solution is sampled back onto the epoch grid as the usual result
+        columns, so analysis, rollups and reports work unchanged.
+        events is an optional EventModel or EventSchedule; each event is a
+        jump applied at the end of its epoch, as in run_epoch, so scripted
+        shocks suit this engine while dense stochastic events force a restart
+        almost every epoch. results and rollups are as for MarketSimulation.
+        method, rtol and atol are passed to solve_ivp
+        """
+        self.conditions = dict(initial_conditions)
+        self.duration = simulation_duration
+        self.results = results if results is not None else ResultStore(simulation_duration)
+        if isinstance(events, EventModel):
+            events = events.sample(simulation_duration)
+        self.events = events
+        self.rollups = RollupPyramid() if rollups is True else rollups
+        self.price_timescale = price_timescale
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.epoch = 0
+        self.segments = []  # (start, stop, dense solution or None) covering [0, duration]
+        self.stats = {'segments': 0, 'steps': 0, 'rhs_evaluations': 0, 'switches': 0, 'rebases': 0}
+
+    def _initial_state(self):
+        """Integrated state vector of the current conditions, pressure signal at rest"""
+        y = np.empty(2 + len(LOG_KEYS))
+        y[PRICE] = self.conditions['current_price']
+        y[SIGNAL] = 0.0
+        for key, i in LOG_INDEX.items():
+            y[i] = math.log(self.conditions[key])
+        return y
+
+    def _rates(self, y, fixed):
+        """Instantaneous (market_pressure, price_stability_index) of state columns y"""
+        validators, holders, _, buys, sells = np.exp(y[2:])
+        pressure = vf.market_pressure(buys, sells, fixed['liquidity_ratio'] * (buys + sells), validators)
+        psi = vf.price_stability_index(y[PRICE], y[SIGNAL], validators / 5000, holders / 1000000)
+        return pressure, psi
+
+    def _regime(self, y, fixed):
+        """GROWTH_RATES or DECLINE_RATES, whichever the stability index of state y selects"""
+        return GROWTH_RATES if self._rates(y, fixed)[1] >= STABILITY_SWITCH else DECLINE_RATES
+
+    def _derivatives(self, t, y, fixed, growth):
+        """Right-hand side; y may hold one state per column (solve_ivp's vectorized form)"""
+        pressure, psi = self._rates(y, fixed)
+        dy = np.zeros_like(y)
+        dy[PRICE] = vf.convergence_rate(y[PRICE], 1.0, pressure, psi) / self.price_timescale
+        dy[SIGNAL] = (1 - PRESSURE_DECAY) * (pressure - y[SIGNAL])
+        dy[LOG_INDEX['daily_transactions']], dy[LOG_INDEX['total_holders']] = growth
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dy[LOG_INDEX['buys_volume']] = np.log(np.maximum(0.0, 1 - pressure * 0.1))
+            dy[LOG_INDEX['sells_volume']] = np.log(np.maximum(0.0, 1 + pressure * 0.1))
+        return dy
+
+    def integrate(self):
+        """
+        Solve from epoch 0 to the duration, segment by segment
+        A segment ends at the next scheduled event, when the stability index
+        crosses STABILITY_SWITCH (switching growth and decline rates) or when
+        the price leaves the rebase band, where it is pulled halfway back
+        as in _update_conditions. Every jump, rebases included, moves the
+        stability index, so the regime is chosen afresh after each one
+        """
+        fixed = {key: value for key, value in self.conditions.items() if key not in LOG_KEYS}
+        y = self._initial_state()
+        growth = self._regime(y, fixed)
+        event_epochs = [] if self.events is None else self.events.epochs.tolist()
+        cursor = 0
+        t = 0.0
+
+        def switch(t, y, fixed, growth):
+            return self._rates(y, fixed)[1] - STABILITY_SWITCH
+        switch.terminal = True
+
+        def rebase(t, y, fixed, growth):
+            return abs(y[PRICE] - 1) - 0.2
+        rebase.terminal = True
+        rebase.direction = 1
+
+        while t < self.duration:
+            if len(self.segments) >= MAX_SEGMENTS:
+                raise RuntimeError(f"more than {MAX_SEGMENTS} segments, the dynamics chatter at t={t:.1f}")
+            # Events of epoch e land at the end of that epoch, t = e + 1
+            while cursor < len(event_epochs) and event_epochs[cursor] + 1 <= t:
+                cursor += 1
+            stop = min(self.duration, event_epochs[cursor] + 1) if cursor < len(event_epochs) else self.duration
+            if abs(y[PRICE] - 1) > 0.2:
+                # Outside the band already, e.g. after a price shock: rebase before integrating
+                y[PRICE] = max(0.95, min(1.05, (1 + y[PRICE]) / 2))
+                self.stats['rebases'] += 1
+                growth = self._regime(y, fixed)
+            # Only look for the crossing that leaves the current regime
+            switch.direction = -1 if growth is GROWTH_RATES else 1
+
+            solution = solve_ivp(self._derivatives, (t, stop), y, method=self.method, dense_output=True,
+                                 events=(switch, rebase), args=(fixed, growth), vectorized=True,
+                                 rtol=self.rtol, atol=self.atol)
+            if solution.status == -1:
+                raise RuntimeError(f"solve_ivp failed at t={t:.1f}: {solution.message}")
+            self.segments.append((t, float(solution.t[-1]), solution.sol))
+            self.stats['segments'] += 1
+            self.stats['steps'] += len(solution.t) - 1
+            self.stats['rhs_evaluations'] += solution.nfev
+            t = float(solution.t[-1])
+            y = solution.y[:, -1].copy()
+
+            if solution.status == 1:
+                if len(solution.t_events[0]):
+                    growth = DECLINE_RATES if growth is GROWTH_RATES else GROWTH_RATES
+                    self.stats['switches'] += 1
+                if len(solution.t_events[1]):
+                    y[PRICE] = max(0.95, min(1.05, (1 + y[PRICE]) / 2))
+                    self.stats['rebases'] += 1
+                    growth = self._regime(y, fixed)
+            elif cursor < len(event_epochs) and t == event_epochs[cursor] + 1:
+                # Apply every event of this epoch to the integrated state or the fixed conditions
+                while cursor < len(event_epochs) and event_epochs[cursor] + 1 == t:
+                    kind = EVENT_KINDS[int(self.events.kinds[cursor])]
+                    multiplier = float(self.events.multipliers[cursor])
+                    for key in EVENT_TARGETS[kind]:
+                        if key == 'current_price':
+                            y[PRICE] *= multiplier
+                        elif key in LOG_INDEX:
+                            y[LOG_INDEX[key]] += math.log(multiplier)
+                        else:
+                            fixed[key] *= multiplier
+                    cursor += 1
+                self.segments.append((t, t, (y.copy(), dict(fixed))))
+                growth = self._regime(y, fixed)
+
+    def sample(self):
+        """
+        State on the epoch grid, right-continuous at jumps
+        Returns (states, fixed): a (len(state), duration + 1) array of the
+        integrated state at t = 0..duration and {key: array} of the other
+        conditions at the same times
+        """
+        grid = np.arange(self.duration + 1, dtype=np.float64)
+        states = np.empty((2 + len(LOG_KEYS), len(grid)))
+        fixed = {key: np.full(len(grid), value, dtype=np.float64)
+                 for key, value in self.conditions.items() if key not in LOG_KEYS}
+        for start, stop, solution in self.segments:
+            if start == stop:
+                # Event jump: the new state and conditions hold from here on
+                y, conditions = solution
+                k = int(start)
+                states[:, k] = y
+                for key, value in conditions.items():
+                    fixed[key][k:] = value
+                continue
+            last = stop >= self.duration
+            lo = int(math.ceil(start))
+            hi = int(math.floor(stop)) + 1 if last else int(math.ceil(stop))
+            if hi > lo:
+                states[:, lo:hi] = solution(grid[lo:hi])
+        return states, fixed
+
+    def run(self):
+        """Integrate, sample and record every epoch; returns the elapsed (integrate, sample) seconds"""
+        start_time = time.time()
+        self.integrate()
+        integrated = time.time()
+        states, fixed = self.sample()
+        columns = epoch_columns(states, fixed)
+        self.results.extend(columns)
+        if self.rollups is not None:
+            self.rollups.extend(columns)
+
+        self.conditions.update({key: float(values[-1]) for key, values in fixed.items()})
+        self.conditions['current_price'] = float(states[PRICE, -1])
+        for key, i in LOG_INDEX.items():
+            self.conditions[key] = float(np.exp(states[i, -1]))
+        self.epoch = self.duration
+        self.elapsed = time.time() - start_time
+        return integrated - start_time, time.time() - integrated
+
+def epoch_columns(states, fixed):
+    """
+    Result columns for epochs 0..n-1 from grid states at t = 0..n
+    Economics use the state entering each epoch; price, holders and
+    transactions are recorded as they leave it, as run_epoch records them
+    """
+    conditions = dict(fixed)
+    conditions['current_price'] = states[PRICE]
+    with np.errstate(over='ignore'):
+        for key, i in LOG_INDEX.items():
+            conditions[key] = np.exp(states[i])
+    entering = {key: conditions[key][:-1] for key in STATE_KEYS}
+    leaving = {key: conditions[key][1:] for key in STATE_KEYS}
+    n = len(states[PRICE]) - 1
+
+    with np.errstate(all='ignore'):
+        economics = vf.calculate_economics(**entering, pressure_signal=states[SIGNAL, :-1])
+        # Rolling volatility of the recorded prices, as MarketMetrics.get_volatility sees them
+        returns = np.zeros(n)
+        returns[1:] = np.log(leaving['current_price'][1:] / leaving['current_price'][:-1])
+        index = np.arange(n)
+        counts = np.minimum(np.maximum(0, index - 1), VOLATILITY_WINDOW - 1)
+        sums = np.concatenate(([0.0], np.cumsum(returns)))
+        squares = np.concatenate(([0.0], np.cumsum(returns * returns)))
+        mean = (sums[index] - sums[index - counts]) / np.maximum(1, counts)
+        variance = np.maximum(0.0, (squares[index] - squares[index - counts]) / np.maximum(1, counts) - mean * mean)
+        volatility = np.sqrt(variance) * math.sqrt(VOLATILITY_WINDOW)
+        epoch_duration = vf.determine_epoch_duration(entering['daily_transactions'],
+                                                     entering['validator_count'] * 1000, volatility)
+
+    halt, emergency, rebase = (economics['circuit_breakers'][name] for name in vf.CIRCUIT_BREAKERS)
+    columns = {
+        'epoch': index,
+        'epoch_duration': epoch_duration,
+        'current_price': leaving['current_price'],
+        'validator_count': np.round(entering['validator_count']),
+        'total_holders': leaving['total_holders'],
+        'transaction_volume': leaving['daily_transactions'] * leaving['avg_transaction_size'],
+        'daily_transactions': leaving['daily_transactions'],
+        'circuit_breaker_flags': vf.pack_flags(halt, emergency, rebase),
+        'failing_metric_flags': economics['failing_metrics']
+    }
+    for name in ResultStore.COLUMNS:
+        if name not in columns:
+            columns[name] = economics[name]
+    return {name: np.broadcast_to(values, (n,)) for name, values in columns.items()}
+
+def check_parity(initial_conditions, duration_days=1, equilibrium_tolerance=1.0, count_tolerance=0.1):
+    """
+    Compare a continuous run with the epoch loop on the same scenario
+    The engines discretize differently, so they are held to tolerances:
+    time in equilibrium within equilibrium_tolerance percentage points and
+    the final daily_transactions and total_holders within count_tolerance
+    in log. Returns {metric: (epoch loop, continuous)} for every metric
+    outside its tolerance; an empty dict means the engines agree
+    """
+    # example imports this module, so it is only imported once needed
+    from example import run_simulation, run_continuous_simulation
+    runs = [
+        run(dict(initial_conditions), duration_days, verbose=False, rollups=None).results
+        for run in (run_simulation, run_continuous_simulation)
+    ]
+    mismatches = {}
+    expected, actual = (results.column('is_equilibrium').mean() * 100 for results in runs)
+    if not abs(actual - expected) <= equilibrium_tolerance:
+        mismatches['equilibrium_percentage'] = (float(expected), float(actual))
+    for name in ('daily_transactions', 'total_holders'):
+        expected, actual = (float(results.column(name)[-1]) for results in runs)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if not abs(np.log(actual / expected)) <= count_tolerance:
+                mismatches[name] = (expected, actual)
+    return mismatches
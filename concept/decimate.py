@@ -0,0 +1,160 @@
+import numpy as np
+
+# Points kept per plotted series, about the pixel width of a 12-15 inch
+# figure at the default 100 dpi
+MAX_PLOT_POINTS = 2000
+DECIMATION = 'minmax'  # 'minmax' or 'lttb'
+
+def minmax_indices(y, max_points=MAX_PLOT_POINTS):
+    """
+    Indices of the minimum and maximum of y in each of max_points // 2 bins
+    Every local extreme that could show up as a pixel survives, including
+    the global ones, plus the first and last points
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    bins = max(1, max_points // 2)
+    if n <= max(2, 2 * bins):
+        return np.arange(n)
+    size = -(-n // bins)
+    # Pad the last bin so every bin has the same width; non-finite values
+    # (overflowed counts) are never chosen over finite ones, since matplotlib
+    # drops them anyway
+    finite = np.isfinite(y)
+    padded = np.concatenate((y, np.full(bins * size - n, np.nan))).reshape(bins, size)
+    valid = np.concatenate((finite, np.zeros(bins * size - n, dtype=bool))).reshape(bins, size)
+    offsets = np.arange(bins) * size
+    indices = np.concatenate((
+        [0, n - 1],
+        offsets + np.argmin(np.where(valid, padded, np.inf), axis=1),
+        offsets + np.argmax(np.where(valid, padded, -np.inf), axis=1)
+    ))
+    return np.unique(np.minimum(indices, n - 1))
+
+def lttb_indices(x, y, max_points=MAX_PLOT_POINTS):
+    """
+    Largest-Triangle-Three-Buckets selection of max_points indices
+    Keeps the point of each bucket forming the largest triangle with the
+    previous pick and the next bucket's mean; the global finite minimum
+    and maximum are always added back
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max(3, max_points):
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if stop <= start:
+            selected[bucket + 1] = a
+            continue
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_stop = max(next_stop, next_start + 1)
+        xc = x[next_start:next_stop].mean()
+        yc = y[next_start:next_stop].mean()
+        area = np.abs(
+            (x[a] - xc) * (y[start:stop] - y[a]) -
+            (x[a] - x[start:stop]) * (yc - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    finite = np.flatnonzero(np.isfinite(y))
+    extremes = finite[[np.argmin(y[finite]), np.argmax(y[finite])]] if len(finite) else []
+    return np.unique(np.concatenate((selected, extremes)).astype(np.intp))
+
+def decimate_indices(x, y, max_points=MAX_PLOT_POINTS, method=None):
+    """Indices of y to plot under a point budget, with DECIMATION unless method is given"""
+    method = method or DECIMATION
+    if method == 'lttb':
+        return lttb_indices(x, y, max_points)
+    if method == 'minmax':
+        return minmax_indices(y, max_points)
+    raise ValueError(f"Unknown decimation method: {method}")
+
+def marker_indices(mask, max_points=MAX_PLOT_POINTS):
+    """
+    First set index of mask in each of max_points bins
+    Dense runs of circuit breaker activations collapse to one marker per
+    bin, while every bin containing an activation keeps a marker
+    """
+    hits = np.flatnonzero(np.asarray(mask))
+    n = len(mask)
+    if len(hits) <= max_points:
+        return hits
+    bins = hits * max_points // n
+    return hits[np.unique(bins, return_index=True)[1]]
+
+def plot_series(ax, x, y, max_points=MAX_PLOT_POINTS, method=None, **kwargs):
+    """ax.plot of a decimated series"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    indices = decimate_indices(x, y, max_points, method)
+    return ax.plot(x[indices], y[indices], **kwargs)
+
+class ChunkDecimator:
+    """
+    minmax selection over series fed one block at a time
+    Bins are fixed over the n epochs of the whole run, so the minimum and
+    maximum of each bin are the ones minmax_indices would pick from the
+    full series, and memory is O(max_points) per series however long the run
+    """
+
+    def __init__(self, n, max_points=MAX_PLOT_POINTS):
+        self.n = n
+        self.max_points = max_points
+        self.bins = max(1, max_points // 2)
+        self.size = max(1, -(-n // self.bins))
+        self.series = {}  # name -> (min values, min indices, max values, max indices) per bin
+        self.markers = {}  # name -> first set index per marker bin, -1 for none
+
+    def add(self, name, start, values):
+        """Fold values of epochs start, start + 1, ... into the bins of series name"""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        if name not in self.series:
+            self.series[name] = (np.full(self.bins, np.inf), np.full(self.bins, -1, dtype=np.intp),
+                                 np.full(self.bins, -np.inf), np.full(self.bins, -1, dtype=np.intp))
+        low, low_at, high, high_at = self.series[name]
+        first = start // self.size
+        last = (start + len(values) - 1) // self.size
+        lead = start - first * self.size
+        width = (last - first + 1) * self.size
+        # Pad the block out to whole bins; non-finite values are never picked
+        padded = np.full(width, np.nan)
+        padded[lead:lead + len(values)] = values
+        padded = padded.reshape(-1, self.size)
+        valid = np.isfinite(padded)
+        offsets = np.arange(first, last + 1) * self.size
+        for pick, best, at, fill, better in ((np.argmin, low, low_at, np.inf, np.less),
+                                              (np.argmax, high, high_at, -np.inf, np.greater)):
+            masked = np.where(valid, padded, fill)
+            local = pick(masked, axis=1)
+            candidates = masked[np.arange(len(local)), local]
+            replace = better(candidates, best[first:last + 1])
+            best[first:last + 1][replace] = candidates[replace]
+            at[first:last + 1][replace] = (offsets + local)[replace]
+
+    def mark(self, name, start, mask):
+        """Keep the first set epoch of mask in each of max_points bins, as marker_indices does"""
+        if name not in self.markers:
+            self.markers[name] = np.full(self.max_points, -1, dtype=np.intp)
+        first = self.markers[name]
+        hits = start + np.flatnonzero(np.asarray(mask))
+        bins, index = np.unique(hits * self.max_points // max(1, self.n), return_index=True)
+        unset = first[bins] < 0
+        first[bins[unset]] = hits[index[unset]]
+
+    def indices(self):
+        """Sorted epochs picked by any series or marker, plus the first and last"""
+        picked = [np.array([0, self.n - 1], dtype=np.intp)] if self.n else []
+        for _, low_at, _, high_at in self.series.values():
+            picked += [low_at[low_at >= 0], high_at[high_at >= 0]]
+        picked += [first[first >= 0] for first in self.markers.values()]
+        return np.unique(np.concatenate(picked)) if picked else np.zeros(0, dtype=np.intp)
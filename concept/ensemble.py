@@ -0,0 +1,187 @@
+import numpy as np
+import vector_formulas as vf
+
+# Column order of the (paths × state) condition array, matching the
+# positional arguments of calculate_economics
+STATE_KEYS = (
+    'validator_count', 'total_holders', 'daily_transactions', 'current_price',
+    'avg_transaction_size', 'avg_holding_balance', 'days_held', 'liquidity_ratio',
+    'cross_chain_transfers', 'buys_volume', 'sells_volume'
+)
+STATE_INDEX = {key: i for i, key in enumerate(STATE_KEYS)}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+BAND_METRICS = ('current_price', 'liquidity_ratio', 'liquidity_health_index')
+
+class EnsembleSimulation:
+    def __init__(self, initial_conditions, paths, total_epochs, price_volatility=0.0005,
+                 volume_volatility=0.02, sample_every=360, seed=None, events=None,
+                 pressure_window=30, pressure_decay=0.94, constants=None, shared_events=False):
+        """
+        Initialize an ensemble of independent paths of one scenario
+        Each epoch applies the same update as MarketSimulation to every path
+        at once, followed by lognormal shocks to price and buy/sell volume and
+        any events sampled per path in blocks from the optional EventModel.
+        A condition may also be given as an array with one value per path,
+        and constants overrides formula constants as in
+        vector_formulas.calculate_economics, again per path if arrays.
+        With shared_events set, one sampled event path hits every path alike
+        """
+        self.paths = int(paths)
+        self.total_epochs = int(total_epochs)
+        self.price_volatility = price_volatility
+        self.volume_volatility = volume_volatility
+        self.sample_every = max(1, int(sample_every))
+        self.rng = np.random.default_rng(seed)
+        self.events = events
+        self.constants = constants
+        self.event_paths = 1 if shared_events else self.paths
+        # Bound event blocks to roughly a million multipliers per condition
+        self.event_block_size = max(1, 2 ** 20 // self.event_paths)
+        self.event_block = {}
+        self.event_block_start = 0
+
+        self.state = np.empty((self.paths, len(STATE_KEYS)))
+        for i, key in enumerate(STATE_KEYS):
+            self.state[:, i] = initial_conditions[key]
+        # Per-path pressure EWMA matching MarketMetrics.get_market_pressure
+        self.pressure_window = np.zeros((pressure_window, self.paths))
+        self.pressure_decay = pressure_decay
+        self.pressure_evict_weight = pressure_decay ** pressure_window
+        self.pressure_ewma_sum = np.zeros(self.paths)
+        self.pressure_ewma_weight = 0.0
+        self.pressure_signal = np.zeros(self.paths)
+
+        n_samples = -(-self.total_epochs // self.sample_every)
+        self.sample_epochs = np.zeros(n_samples, dtype=np.int64)
+        self.bands = {
+            metric: np.zeros((n_samples, len(PERCENTILES)))
+            for metric in BAND_METRICS
+        }
+        self.breaker_active = {
+            name: np.zeros(n_samples) for name in vf.CIRCUIT_BREAKERS
+        }
+        self.breaker_counts = {
+            name: np.zeros(self.paths, dtype=np.int64) for name in vf.CIRCUIT_BREAKERS
+        }
+        self.max_price_deviation = np.zeros(self.paths)
+        self.equilibrium_counts = np.zeros(self.paths, dtype=np.int64)
+        self.epochs_run = 0
+
+    def column(self, key):
+        """View of one state variable across all paths"""
+        return self.state[:, STATE_INDEX[key]]
+
+    def run_epoch(self, epoch_number):
+        """Advance every path by one epoch"""
+        economics = vf.calculate_economics(*self.state.T, pressure_signal=self.pressure_signal,
+                                           constants=self.constants)
+
+        self._update_conditions(economics)
+        self._apply_shocks()
+        if self.events is not None:
+            self._apply_events()
+        self._update_pressure(economics['market_pressure'])
+        self._record(epoch_number, economics)
+        self.epochs_run += 1
+
+    def _update_conditions(self, economics):
+        """Vectorized MarketSimulation._update_conditions"""
+        price = self.column('current_price')
+        rebase = economics['circuit_breakers']['needs_rebase']
+        price[:] = np.where(rebase, np.maximum(0.95, np.minimum(1.05, (1 + price) / 2)), price)
+
+        pressure_adjustment = economics['market_pressure'] * 0.1
+        self.column('buys_volume')[:] *= (1 - pressure_adjustment)
+        self.column('sells_volume')[:] *= (1 + pressure_adjustment)
+
+        stable = economics['price_stability_index'] >= 0.8
+        self.column('daily_transactions')[:] *= np.where(stable, 1.01, 0.95)
+        self.column('total_holders')[:] *= np.where(stable, 1.005, 0.99)
+
+    def _update_pressure(self, pressure):
+        """Slide every path's pressure window and refresh the EWMA signal"""
+        window = len(self.pressure_window)
+        slot = self.epochs_run % window
+        decay = self.pressure_decay
+        if self.epochs_run >= window:
+            evicted = self.pressure_window[slot]
+            evict_weight = self.pressure_evict_weight
+        else:
+            evicted = 0.0
+            evict_weight = 0.0
+        self.pressure_ewma_sum = decay * self.pressure_ewma_sum + pressure - evict_weight * evicted
+        self.pressure_ewma_weight = decay * self.pressure_ewma_weight + 1 - evict_weight
+        self.pressure_window[slot] = pressure
+        self.pressure_signal = self.pressure_ewma_sum / self.pressure_ewma_weight
+
+    def _apply_shocks(self):
+        """Lognormal per-path shocks to price and buy/sell volume"""
+        if not (self.price_volatility or self.volume_volatility):
+            return
+        z = self.rng.standard_normal((self.paths, 3))
+        self.column('current_price')[:] *= np.exp(self.price_volatility * z[:, 0])
+        self.column('buys_volume')[:] *= np.exp(self.volume_volatility * z[:, 1])
+        self.column('sells_volume')[:] *= np.exp(self.volume_volatility * z[:, 2])
+
+    def _apply_events(self):
+        """Multiply in this epoch's row of the pre-sampled event block"""
+        offset = self.epochs_run - self.event_block_start
+        if offset >= self.event_block_size or not self.epochs_run:
+            self.event_block_start = self.epochs_run
+            self.event_block = self.events.sample_block(
+                self.epochs_run, self.epochs_run + self.event_block_size, self.event_paths)
+            offset = 0
+        for key, factors in self.event_block.items():
+            self.column(key)[:] *= factors[offset]
+
+    def _record(self, epoch_number, economics):
+        """Accumulate per-path counters and sample percentile bands"""
+        breakers = economics['circuit_breakers']
+        for name in vf.CIRCUIT_BREAKERS:
+            self.breaker_counts[name] += breakers[name]
+        self.equilibrium_counts += economics['is_equilibrium']
+        np.maximum(self.max_price_deviation, np.abs(self.column('current_price') - 1),
+                   out=self.max_price_deviation)
+
+        if self.epochs_run % self.sample_every:
+            return
+        sample = self.epochs_run // self.sample_every
+        self.sample_epochs[sample] = epoch_number
+        values = {
+            'current_price': self.column('current_price'),
+            'liquidity_ratio': self.column('liquidity_ratio'),
+            'liquidity_health_index': economics['liquidity_health_index']
+        }
+        for metric in BAND_METRICS:
+            self.bands[metric][sample] = np.percentile(values[metric], PERCENTILES)
+        for name in vf.CIRCUIT_BREAKERS:
+            self.breaker_active[name][sample] = np.mean(breakers[name])
+
+    def summary(self, price_deviation_max=0.02):
+        """Summarize tail risk across paths"""
+        epochs = max(1, self.epochs_run)
+        final_price = self.column('current_price')
+        return {
+            'paths': self.paths,
+            'epochs': self.epochs_run,
+            'percentiles': PERCENTILES,
+            'final_price': np.percentile(final_price, PERCENTILES),
+            'max_price_deviation': np.percentile(self.max_price_deviation, PERCENTILES),
+            'peg_breach_probability': np.mean(self.max_price_deviation > price_deviation_max),
+            'equilibrium_percentage': np.percentile(self.equilibrium_counts / epochs * 100, PERCENTILES),
+            'circuit_breaker_frequency': {
+                name: np.percentile(counts / epochs, PERCENTILES)
+                for name, counts in self.breaker_counts.items()
+            }
+        }
+
+    def band_results(self):
+        """Sampled percentile bands, trimmed to the epochs actually run"""
+        n = -(-self.epochs_run // self.sample_every)
+        return {
+            'epoch': self.sample_epochs[:n],
+            'percentiles': PERCENTILES,
+            'bands': {metric: band[:n] for metric, band in self.bands.items()},
+            'circuit_breaker_active': {name: active[:n] for name, active in self.breaker_active.items()}
+        }
@@ -0,0 +1,73 @@
+import numpy as np
+
+# Recovery thresholds from precept
+PRICE_THRESHOLD = 0.05  # Price within 5% of target
+LIQUIDITY_THRESHOLD = 0.7  # Minimum healthy liquidity
+STABILITY_THRESHOLD = 0.8  # Minimum stability index
+POST_EPISODE_WINDOW = 100  # Epochs averaged for post-episode stability
+
+def find_runs(mask):
+    """
+    Locate runs of True in a boolean array with a mask diff
+    Returns (starts, ends) with ends exclusive
+    """
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def segment_sums(values, starts, ends):
+    """Sum values over every [start, end) segment with one np.add.reduceat"""
+    if not len(starts):
+        return np.zeros(0, dtype=np.float64)
+    # A trailing zero keeps end == len(values) a valid reduceat index;
+    # interleaving start/end pairs makes every even slot one segment
+    padded = np.concatenate((values, [0]))
+    bounds = np.empty(2 * len(starts), dtype=np.intp)
+    bounds[0::2] = starts
+    bounds[1::2] = ends
+    return np.add.reduceat(padded, bounds)[0::2]
+
+def crisis_mask(price, liquidity, stability):
+    """Epochs outside the recovery thresholds"""
+    return (
+        (np.abs(price - 1.0) > PRICE_THRESHOLD) |
+        (liquidity < LIQUIDITY_THRESHOLD) |
+        (stability < STABILITY_THRESHOLD)
+    )
+
+def recovery_episodes(price, liquidity, stability, cost):
+    """
+    Find every crisis run and its recovery statistics
+    Returns a dict of per-episode arrays: start_epoch, end_epoch, duration,
+    successful, total_cost and stability_after. An episode still running
+    at the end is unsuccessful and scored on the last window of stability
+    """
+    n = len(price)
+    starts, ends = find_runs(crisis_mask(price, liquidity, stability))
+    successful = ends < n
+
+    after_ends = np.minimum(ends + POST_EPISODE_WINDOW, n)
+    after_starts = ends.copy()
+    # Unfinished episodes use the final window of the run instead
+    after_starts[~successful] = max(0, n - POST_EPISODE_WINDOW)
+    after_ends[~successful] = n
+
+    stability_after = np.full(len(starts), np.nan)
+    has_window = after_ends > after_starts
+    stability_after[has_window] = (
+        segment_sums(stability, after_starts[has_window], after_ends[has_window]) /
+        (after_ends - after_starts)[has_window]
+    )
+
+    return {
+        'start_epoch': starts,
+        'end_epoch': ends,
+        'duration': ends - starts,
+        'successful': successful,
+        'total_cost': segment_sums(cost, starts, ends),
+        'stability_after': stability_after
+    }
+
+def equilibrium_episodes(is_equilibrium):
+    """Return (starts, ends) of every equilibrium streak"""
+    return find_runs(is_equilibrium)
@@ -0,0 +1,182 @@
+import copy
+import numpy as np
+
+STREAM_BLOCK_EPOCHS = 8640  # Epochs an EventStream samples at a time: one day
+
+# Per-epoch event probabilities E(t) from precept section 7.2
+EVENT_PROBABILITIES = {
+    'validator_change': 0.1,
+    'holder_change': 0.3,
+    'volume_spike': 0.05,
+    'price_shock': 0.01
+}
+
+# Log-scale of the multiplier drawn when a stochastic event fires
+EVENT_SCALES = {
+    'validator_change': 0.01,
+    'holder_change': 0.005,
+    'volume_spike': 0.5,
+    'price_shock': 0.03
+}
+
+# Conditions each event multiplies; flash_crash and mass_exit are the
+# composite events of precept section 6.2 and are only scripted
+EVENT_TARGETS = {
+    'validator_change': ('validator_count',),
+    'holder_change': ('total_holders',),
+    'volume_spike': ('daily_transactions', 'buys_volume', 'sells_volume'),
+    'price_shock': ('current_price',),
+    'flash_crash': ('liquidity_ratio',),
+    'mass_exit': ('validator_count', 'total_holders')
+}
+EVENT_KINDS = tuple(EVENT_TARGETS)
+
+class EventModel:
+    def __init__(self, probabilities=EVENT_PROBABILITIES, scales=EVENT_SCALES, timeline=(), seed=None):
+        """
+        Stochastic event model plus a scripted shock timeline
+        timeline is a list of {'epoch': int, 'event': kind, 'magnitude': multiplier}
+        entries, e.g. {'epoch': 25920, 'event': 'flash_crash', 'magnitude': 0.3}
+        """
+        for kind in list(probabilities) + [shock['event'] for shock in timeline]:
+            if kind not in EVENT_TARGETS:
+                raise ValueError(f"Unknown event kind: {kind}")
+        self.probabilities = dict(probabilities)
+        self.scales = dict(scales)
+        self.timeline = sorted(timeline, key=lambda shock: shock['epoch'])
+        self.rng = np.random.default_rng(seed)
+
+    def spawn(self):
+        """Copy of this model drawing from an independent child generator"""
+        model = copy.copy(self)
+        model.rng = self.rng.spawn(1)[0]
+        return model
+
+    def _draw_multipliers(self, kind, shape):
+        """Draw multipliers for one stochastic event kind"""
+        z = self.rng.standard_normal(shape)
+        if kind == 'volume_spike':
+            # Spikes only ever push volume up
+            z = np.abs(z)
+        return np.exp(self.scales[kind] * z)
+
+    def sample(self, total_epochs, start=0):
+        """Pre-sample a single-path schedule of epochs [start, total_epochs)"""
+        epochs, kinds, multipliers = [], [], []
+        for kind, probability in self.probabilities.items():
+            hits = start + np.flatnonzero(self.rng.random(max(0, total_epochs - start)) < probability)
+            epochs.append(hits)
+            kinds.append(np.full(len(hits), EVENT_KINDS.index(kind), dtype=np.int8))
+            multipliers.append(self._draw_multipliers(kind, len(hits)))
+        for shock in self.timeline:
+            if start <= shock['epoch'] < total_epochs:
+                epochs.append(np.array([shock['epoch']]))
+                kinds.append(np.array([EVENT_KINDS.index(shock['event'])], dtype=np.int8))
+                multipliers.append(np.array([float(shock['magnitude'])]))
+
+        epochs = np.concatenate(epochs) if epochs else np.zeros(0, dtype=np.int64)
+        order = np.argsort(epochs, kind='stable')
+        return EventSchedule(
+            epochs[order],
+            np.concatenate(kinds)[order] if kinds else np.zeros(0, dtype=np.int8),
+            np.concatenate(multipliers)[order] if multipliers else np.zeros(0)
+        )
+
+    def sample_block(self, start, stop, paths):
+        """
+        Sample dense multipliers for epochs [start, stop) across paths
+        Returns {condition: (stop - start, paths) array}, only for conditions
+        some event touches in the block; scripted shocks hit every path
+        """
+        n = stop - start
+        block = {}
+        for kind, probability in self.probabilities.items():
+            hits = self.rng.random((n, paths)) < probability
+            if not hits.any():
+                continue
+            factors = np.ones((n, paths))
+            factors[hits] = self._draw_multipliers(kind, np.count_nonzero(hits))
+            # Every condition owns its array, so a scripted shock below scales each target once
+            for key in EVENT_TARGETS[kind]:
+                block[key] = block[key] * factors if key in block else factors.copy()
+        for shock in self.timeline:
+            if start <= shock['epoch'] < stop:
+                for key in EVENT_TARGETS[shock['event']]:
+                    if key not in block:
+                        block[key] = np.ones((n, paths))
+                    block[key][shock['epoch'] - start] *= shock['magnitude']
+        return block
+
+class EventSchedule:
+    def __init__(self, epochs, kinds, multipliers):
+        """Sorted sparse schedule of (epoch, kind, multiplier) events"""
+        self.epochs = epochs
+        self.kinds = kinds
+        self.multipliers = multipliers
+        self.cursor = 0
+        # Plain lists make the per-epoch check a cheap Python comparison
+        self._epochs = epochs.tolist()
+        self._targets = [EVENT_TARGETS[EVENT_KINDS[kind]] for kind in kinds.tolist()]
+        self._multipliers = multipliers.tolist()
+        self._next = self._epochs[0] if self._epochs else None
+
+    def __len__(self):
+        return len(self._epochs)
+
+    def apply(self, epoch, conditions):
+        """Apply every event scheduled up to and including epoch to the conditions dict"""
+        if self._next is None or self._next > epoch:
+            return
+        i = self.cursor
+        n = len(self._epochs)
+        while i < n and self._epochs[i] <= epoch:
+            for key in self._targets[i]:
+                conditions[key] *= self._multipliers[i]
+            i += 1
+        self.cursor = i
+        self._next = self._epochs[i] if i < n else None
+
+    def seek(self, epoch):
+        """Skip every event scheduled before epoch, e.g. when a run starts mid-schedule"""
+        self.cursor = int(np.searchsorted(self.epochs, epoch, side='left'))
+        self._next = self._epochs[self.cursor] if self.cursor < len(self._epochs) else None
+
+    def counts(self):
+        """Number of scheduled events per kind"""
+        counts = np.bincount(self.kinds, minlength=len(EVENT_KINDS))
+        return {kind: int(count) for kind, count in zip(EVENT_KINDS, counts)}
+
+class EventStream:
+    def __init__(self, model, total_epochs, block_epochs=STREAM_BLOCK_EPOCHS):
+        """
+        Schedule of an EventModel sampled lazily, block_epochs at a time
+        Only the block the run is in is held, so memory stays constant in
+        total_epochs. Blocks are sampled in the order the run reaches them
+        from the model's generator, so a stream is not a replayable
+        EventSchedule: seek only moves forward
+        """
+        self.model = model
+        self.total_epochs = total_epochs
+        self.block_epochs = block_epochs
+        self.schedule = None
+        self.stop = 0  # End of the sampled block
+        self.sampled = np.zeros(len(EVENT_KINDS), dtype=np.int64)
+
+    def apply(self, epoch, conditions):
+        """Apply every event scheduled up to and including epoch to the conditions dict"""
+        if epoch >= self.stop:
+            self.seek(epoch)
+        self.schedule.apply(epoch, conditions)
+
+    def seek(self, epoch):
+        """Sample the block holding epoch if the stream has not reached it yet, skipping events before epoch"""
+        if epoch >= self.stop:
+            start = epoch - epoch % self.block_epochs
+            self.stop = start + self.block_epochs
+            self.schedule = self.model.sample(min(self.total_epochs, self.stop), start)
+            self.sampled += np.bincount(self.schedule.kinds, minlength=len(EVENT_KINDS))
+        self.schedule.seek(epoch)
+
+    def counts(self):
+        """Number of events sampled so far per kind"""
+        return {kind: int(count) for kind, count in zip(EVENT_KINDS, self.sampled)}
@@ -1,15 +1,67 @@
 from formulas import *
 from reports import *
+from results import ResultStore
+from analysis import analyze_results, StreamingAnalysis, ChunkedAnalysis
+from ensemble import EnsembleSimulation
+from continuous import ContinuousSimulation
+from decimate import ChunkDecimator, MAX_PLOT_POINTS
+from events import EventModel, EventStream
+from ledger import HolderLedger, ledger_summary_frame
+from results import BranchResultStore
+from rollups import RollupPyramid
+from sweep import ParameterSweep, parse_axis, sweep_frame
+from calibration import calibrate, calibration_frame, print_calibration
+from scheduler import EpochScheduler, max_epochs
+from storage import ChunkedResultWriter, ResultDataset, RESULTS_FILE
+from manifest import load_manifest, code_fingerprint, config_key, results_key
+from profiling import StageProfiler, format_timings, FOLDED_FILE, CPROFILE_FILE
+import analysis as analysis_module
+import continuous as continuous_module
+import decimate
+import events as event_module
+import formulas
+import kernel
+import reports
+import scheduler as scheduler_module
+import steady
+import vector_formulas
+import rollups as rollup_module
+import argparse
+import copy
+import os
+import pickle
+import sys
 import time
+from contextlib import nullcontext
 from datetime import datetime
 
 class MarketSimulation:
-    def __init__(self, initial_conditions, simulation_duration):
-        """Initialize market simulation with conditions and duration"""
+    def __init__(self, initial_conditions, simulation_duration, events=None, results=None, rollups=True,
+                 ledger=None, constants=None):
+        """
+        Initialize market simulation with conditions and duration
+        events is an optional EventModel, pre-sampled EventSchedule or
+        EventStream; an EventModel is sampled up front so the epoch loop
+        only checks for the next scheduled epoch, while an EventStream is
+        sampled a day at a time. results is any sink with ResultStore's
+        append, a preallocated ResultStore by default. rollups is the
+        RollupPyramid kept up to date each epoch, a new one when True; None
+        turns it off. ledger is an optional HolderLedger stepped every epoch;
+        it is saved with checkpoints but not carried into forks. constants
+        overrides formula constants as in calculate_economics, e.g. a
+        calibrated set
+        """
         self.conditions = initial_conditions
         self.duration = simulation_duration
         self.market_metrics = MarketMetrics()
-        self.results = []
+        self.results = results if results is not None else ResultStore(simulation_duration)
+        if isinstance(events, EventModel):
+            events = events.sample(simulation_duration)
+        self.events = events
+        self.rollups = RollupPyramid() if rollups is True else rollups
+        self.ledger = ledger
+        self.constants = constants
+        self.epoch = 0  # Next epoch to run
         
     def run_epoch(self, epoch_number):
         """Run a single epoch of the simulation"""
@@ -23,33 +75,50 @@ class MarketSimulation:
         # Calculate economics for this epoch
         economics = calculate_economics(
             **self.conditions,
-            market_metrics=self.market_metrics
+            market_metrics=self.market_metrics,
+            constants=self.constants
         )
         
+        # Settle the holder ledger under the conditions the economics saw
+        if self.ledger is not None:
+            self.ledger.step(epoch_number, economics['price_stability_index'], self.conditions)
+        
         # Update conditions based on results
         self._update_conditions(economics)
         
+        # Apply stochastic and scripted events for this epoch
+        if self.events is not None:
+            self.events.apply(epoch_number, self.conditions)
+        
         # Calculate transaction volume
         transaction_volume = (
             self.conditions['daily_transactions'] * 
             self.conditions['avg_transaction_size']
         )
         
-        # Create epoch result with all necessary data
-        epoch_result = {
+        # Feed the rolling market metrics used by the next epoch
+        self.market_metrics.update_metrics(
+            self.conditions['current_price'],
+            transaction_volume,
+            economics['market_pressure']
+        )
+        
+        # Store the epoch result with all necessary data
+        record = {
             'epoch': epoch_number,
             'epoch_duration': epoch_duration,
-            'current_price': float(self.conditions['current_price']),
-            'liquidity_ratio': float(self.conditions['liquidity_ratio']),
-            'validator_count': int(self.conditions['validator_count']),
-            'total_holders': int(self.conditions['total_holders']),
-            'transaction_volume': float(transaction_volume),
-            'daily_transactions': int(self.conditions['daily_transactions']),
+            'current_price': self.conditions['current_price'],
+            'liquidity_ratio': self.conditions['liquidity_ratio'],
+            'validator_count': self.conditions['validator_count'],
+            'total_holders': self.conditions['total_holders'],
+            'transaction_volume': transaction_volume,
+            'daily_transactions': self.conditions['daily_transactions'],
             **economics
         }
-        
-        # Store the results
-        self.results.append(epoch_result)
+        self.results.append(**record)
+        if self.rollups is not None:
+            self.rollups.append(record)
+        self.epoch = epoch_number + 1
         
     def _update_conditions(self, economics):
         """Update market conditions based on economic results"""
@@ -70,9 +139,120 @@ class MarketSimulation:
         else:
             self.conditions['daily_transactions'] *= 1.01
             self.conditions['total_holders'] *= 1.005
+    
+    def snapshot(self):
+        """
+        Capture the state needed to continue this run from the next epoch
+        Conditions, the MarketMetrics windows, the rollups and the event cursor
+        are copied; results are referenced by cursor rather than copied
+        """
+        return {
+            'epoch': self.epoch,
+            'conditions': dict(self.conditions),
+            'market_metrics': copy.deepcopy(self.market_metrics),
+            'rollups': copy.deepcopy(self.rollups),
+            'events': copy.copy(self.events),
+            'results_cursor': len(self.results)
+        }
+    
+    def fork(self, snapshot=None, conditions=None, events=None):
+        """
+        Branch a what-if run off a snapshot of this simulation (default: now)
+        The branch shares the results recorded up to the snapshot and only
+        stores its own epochs. conditions overrides entries of the snapshot's
+        conditions; events replaces the event schedule from the fork epoch on
+        """
+        snapshot = snapshot or self.snapshot()
+        epoch = snapshot['epoch']
+        results = BranchResultStore(self.results, snapshot['results_cursor'], self.duration - epoch)
+        if events is None:
+            events = copy.copy(snapshot['events'])
+        elif isinstance(events, EventModel):
+            events = events.sample(self.duration)
+        if events is not None:
+            events.seek(epoch)
+        
+        branch = MarketSimulation({**snapshot['conditions'], **(conditions or {})}, self.duration,
+                                  events, results, copy.deepcopy(snapshot['rollups']), constants=self.constants)
+        branch.market_metrics = copy.deepcopy(snapshot['market_metrics'])
+        branch.epoch = epoch
+        return branch
+    
+    def save(self, path):
+        """Write a checkpoint of the state and recorded results, atomically"""
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump({'duration': self.duration, 'snapshot': self.snapshot(), 'results': self.results,
+                         'ledger': self.ledger, 'constants': self.constants}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+    
+    @classmethod
+    def load(cls, path):
+        """Restore a simulation from a checkpoint written by save()"""
+        with open(path, 'rb') as f:
+            checkpoint = pickle.load(f)
+        snapshot = checkpoint['snapshot']
+        sim = cls(snapshot['conditions'], checkpoint['duration'], snapshot['events'], checkpoint['results'],
+                  snapshot.get('rollups'), checkpoint.get('ledger'), checkpoint.get('constants'))
+        sim.market_metrics = snapshot['market_metrics']
+        sim.epoch = snapshot['epoch']
+        return sim
+
+PERFORMANCE_TARGETS = {
+    'price_deviation_max': 0.02,
+    'liquidity_variance_max': 0.1,
+    'participant_retention_min': 0.9,
+    'settlement_rate_min': 0.99
+}
+
+# calculate_economics sub-formulas timed by the stage profiler
+ECONOMICS_STAGES = (
+    'price_stability_index', 'market_pressure', 'network_utility_score', 'liquidity_health_index',
+    'stability_reserve_requirement', 'calculate_settlement_rate', 'validator_reward', 'holder_cost',
+    'validator_holder_cost', 'transaction_fee', 'convergence_rate', 'circuit_breaker_conditions',
+    'equilibrium_state', 'calculate_dynamic_spread'
+)
 
-def run_comprehensive_simulation(initial_conditions, duration_days=7):
-    """Run comprehensive market simulation"""
+def profile_targets(sim):
+    """(owner, attribute, stage) of everything a StageProfiler times in a run of sim"""
+    module = sys.modules[__name__]
+    targets = [
+        (module, 'continue_simulation', 'simulation'),
+        (module, 'schedule_simulation', 'simulation'),
+        (module, 'determine_epoch_duration', 'determine_epoch_duration'),
+        (module, 'calculate_economics', 'calculate_economics'),
+        (MarketSimulation, '_update_conditions', 'update_conditions'),
+        (MarketMetrics, 'update_metrics', 'market_metrics'),
+        (type(sim.results), 'append', 'record_results')
+    ]
+    targets += [(formulas, name, name) for name in ECONOMICS_STAGES]
+    if sim.events is not None:
+        targets.append((type(sim.events), 'apply', 'events'))
+    if sim.rollups is not None:
+        targets.append((type(sim.rollups), 'append', 'rollups'))
+        targets.append((type(sim.rollups), 'extend', 'rollups'))
+    # A compiled run is timed as one stage
+    targets.append((kernel, 'run_kernel', 'epoch_kernel'))
+    targets.append((steady.SteadyStateDetector, 'fill', 'steady_fill'))
+    return targets
+
+def run_simulation(initial_conditions, duration_days=7, results=None, verbose=True, events=None,
+                   checkpoint=None, checkpoint_every=8640, rollups=True, profiler=None, backend='python',
+                   steady_state=False, scheduled=False, shocks=(), ledger=None, constants=None):
+    """
+    Run the epoch loop for a scenario and return the finished simulation
+    With checkpoint set, the run is saved to that path every checkpoint_every
+    epochs and can be picked up again with resume_simulation. The time-scale
+    rollups are kept in sim.rollups unless rollups is None. profiler is an
+    optional StageProfiler timing the stages of the epoch loop. backend
+    'jit' runs the epochs in the compiled kernel when it can and
+    steady_state fills stationary stretches in closed form, see
+    continue_simulation. With scheduled set, the run instead lasts
+    duration_days of simulated time with epochs as long as
+    determine_epoch_duration makes them, see schedule_simulation; shocks
+    are its timed shocks, and checkpoints, backend and steady_state do not apply.
+    ledger is an optional HolderLedger stepped with every epoch. constants
+    overrides formula constants, e.g. a calibrated set from calibration.load_calibration
+    """
     # Store scenario name if it exists
     scenario_name = initial_conditions.get('name', 'Base Scenario')
     
@@ -81,57 +261,524 @@ def run_comprehensive_simulation(initial_conditions, duration_days=7):
     
     # Calculate total epochs based on duration
     total_epochs = int(duration_days * 8640)  # From precept: 8640 epochs per day
+    if scheduled:
+        # Room for the shortest epochs; the scheduler stops at the time horizon
+        total_epochs = max_epochs(duration_days * 86400)
     
-    # Initialize simulation
-    sim = MarketSimulation(sim_conditions, total_epochs)
+    # Initialize simulation, optionally recording into a caller-provided store
+    sim = MarketSimulation(sim_conditions, total_epochs, events, results, rollups, ledger, constants)
     
     # Run simulation
-    print(f"\nStarting simulation for {scenario_name}: {duration_days} days ({total_epochs} epochs)")
+    if verbose:
+        print(f"\nStarting simulation for {scenario_name}: {duration_days} days "
+              f"({'up to ' if scheduled else ''}{total_epochs} epochs)")
+    if scheduled:
+        if profiler is None:
+            return schedule_simulation(sim, duration_days * 86400, shocks, verbose)
+        with profiler.instrument(profile_targets(sim)):
+            return schedule_simulation(sim, duration_days * 86400, shocks, verbose)
+    if profiler is None:
+        return continue_simulation(sim, verbose, checkpoint, checkpoint_every, backend, steady_state)
+    with profiler.instrument(profile_targets(sim)):
+        return continue_simulation(sim, verbose, checkpoint, checkpoint_every, backend, steady_state)
+
+def continue_simulation(sim, verbose=True, checkpoint=None, checkpoint_every=8640, backend='python',
+                        steady_state=False):
+    """
+    Run a simulation's remaining epochs, from sim.epoch to its duration
+    With backend 'jit' the epochs run in kernel.run_kernel, a day at a time
+    and cut at checkpoint boundaries; when numba is missing or the run
+    uses something the kernel does not handle, it falls back to run_epoch.
+    With steady_state set, the interpreted loop watches for a stationary
+    regime and fills it in closed form up to the next checkpoint, event or
+    regime change (see steady.py); the filled spans are kept in
+    sim.steady_fills
+    """
+    total_epochs = sim.duration
+    start_time = time.time()
+    
+    if backend == 'jit':
+        reason = kernel.unsupported(sim)
+        if reason is not None:
+            if verbose:
+                print(f"JIT kernel unavailable ({reason}), running interpreted")
+            backend = 'python'
+    
+    if backend == 'jit':
+        while sim.epoch < total_epochs:
+            stop = min(total_epochs, sim.epoch + kernel.KERNEL_BLOCK,
+                       (sim.epoch // checkpoint_every + 1) * checkpoint_every)
+            kernel.run_kernel(sim, stop)
+            
+            if verbose:
+                print(f"Progress: {stop / total_epochs * 100:.1f}% complete")
+            
+            if checkpoint and stop % checkpoint_every == 0:
+                sim.save(checkpoint)
+    else:
+        detector = None
+        if steady_state:
+            reason = steady.unsupported(sim)
+            if reason is None:
+                detector = steady.SteadyStateDetector()
+            elif verbose:
+                print(f"Steady-state filling unavailable ({reason}), running every epoch")
+        
+        while sim.epoch < total_epochs:
+            epoch = sim.epoch
+            sim.run_epoch(epoch)
+            if detector is not None and detector.observe(sim):
+                detector.fill(sim, min(total_epochs, (sim.epoch // checkpoint_every + 1) * checkpoint_every))
+            
+            # Progress update every 1000 epochs and after each fill
+            if verbose and (epoch % 1000 == 0 or sim.epoch > epoch + 1):
+                progress = ((sim.epoch - 1) / total_epochs) * 100
+                print(f"Progress: {progress:.1f}% complete")
+            
+            if checkpoint and sim.epoch % checkpoint_every == 0:
+                sim.save(checkpoint)
+        if detector is not None:
+            sim.steady_fills = detector.fills
+            if verbose and detector.fills:
+                filled = sum(stop - start for start, stop in detector.fills)
+                print(f"Steady state: {filled} of {total_epochs} epochs filled in closed form")
+    
+    sim.elapsed = time.time() - start_time
+    if verbose:
+        print(f"\nSimulation completed in {sim.elapsed:.2f} seconds")
+    
+    return sim
+
+def schedule_simulation(sim, horizon, shocks=(), verbose=True):
+    """
+    Run a simulation under the discrete-event scheduler for horizon simulated seconds
+    Epochs start one after another as determine_epoch_duration allows,
+    interleaved with 2-second blocks and the timed shocks; the scheduler,
+    with every epoch's start time and block height, is kept in sim.scheduler
+    """
+    start_time = time.time()
+    sim.scheduler = EpochScheduler(sim, horizon, shocks)
+    sim.scheduler.run(verbose)
+    
+    sim.elapsed = time.time() - start_time
+    if verbose:
+        print(f"\nSimulation completed in {sim.elapsed:.2f} seconds: {sim.epoch} epochs and "
+              f"{sim.scheduler.blocks} blocks in {horizon / 86400:g} simulated days "
+              f"({sim.scheduler.events} events)")
+    
+    return sim
+
+def resume_simulation(checkpoint, verbose=True, checkpoint_every=8640, backend='python', steady_state=False):
+    """Pick an interrupted run back up from its last checkpoint"""
+    sim = MarketSimulation.load(checkpoint)
+    if verbose:
+        print(f"\nResuming simulation at epoch {sim.epoch} of {sim.duration}")
+    return continue_simulation(sim, verbose, checkpoint, checkpoint_every, backend, steady_state)
+
+def scenario_report_path(scenario_name):
+    """Directory under reports/ holding a scenario's report and stored results"""
+    return f"reports/{scenario_name.replace(' ', '_').lower()}"
+
+def scenario_results_path(scenario_name):
+    """Arrow IPC file a persisted run of the scenario is written to"""
+    return os.path.join(scenario_report_path(scenario_name), RESULTS_FILE)
+
+def simulation_config_key(initial_conditions, duration_days, events=None, scheduled=False, shocks=()):
+    """
+    Manifest key of a run: scenario config, duration, event schedule and simulation code
+    A scheduled run also depends on the scheduler and its timed shocks
+    """
+    code = code_fingerprint(formulas, event_module, MarketSimulation)
+    if scheduled:
+        code += code_fingerprint(scheduler_module) + repr([sorted(shock.items()) for shock in shocks])
+    return config_key(initial_conditions, duration_days, events, code)
+
+def continuous_config_key(initial_conditions, duration_days, events=None):
+    """Manifest key of a continuous-time run, which depends on its own engine rather than MarketSimulation"""
+    code = code_fingerprint(vector_formulas, event_module, continuous_module)
+    return config_key(initial_conditions, duration_days, events, code)
+
+def continuous_scenario_name(scenario_name):
+    """Name a continuous-time run is reported under, next to the epoch loop's report of the scenario"""
+    return f"{scenario_name} (ODE)"
+
+def cached_report(scenario_name, key_name, key):
+    """Manifest entry of a complete report made from the same key, or None"""
+    entry = load_manifest().get(scenario_name)
+    if (entry and key is not None and entry.get(key_name) == key and 'analysis' in entry
+            and report_complete(scenario_report_path(scenario_name))):
+        return entry
+    return None
+
+def report_simulation(results, scenario_name, config_key=None, force=False, rollups=None, profiler=None):
+    """
+    Analyze finished results, write the scenario report and return the analysis
+    A report already drawn from identical result columns is kept as is
+    unless force is set; config_key is recorded for skipping the next run.
+    rollups is the run's RollupPyramid, rebuilt from the results if None.
+    A ResultDataset is read a chunk at a time, see analyze_dataset.
+    With a StageProfiler, analysis and plotting are timed too, the timing
+    table goes into the report and the folded stacks next to it
+    """
+    report_path = scenario_report_path(scenario_name)
+    code = code_fingerprint(analysis_module, reports, decimate, rollup_module)
+    key = results_key(results, scenario_name, code)
+    
+    entry = None if force else cached_report(scenario_name, 'results_key', key)
+    if entry is not None:
+        entry['config_key'] = config_key or entry.get('config_key')
+        update_main_index({'scenario_name': scenario_name, **entry.pop('summary')}, **entry)
+        return entry['analysis']
+    
+    module = sys.modules[__name__]
+    with profiler.instrument([(module, 'analyze_results', 'analysis'), (module, 'analyze_dataset', 'analysis')]) \
+            if profiler is not None else nullcontext():
+        if isinstance(results, ResultDataset):
+            # Stored results are analyzed a chunk at a time and plotted from decimated rows
+            analysis, summary, rollups, results = analyze_dataset(results, scenario_name, rollups)
+        else:
+            analysis, summary = analyze_results(results, PERFORMANCE_TARGETS, scenario_name)
+    
+    # Add scenario name to analysis
+    analysis['scenario_name'] = scenario_name
+    
+    # Create detailed report
+    create_analysis_report(results, analysis, report_path, scenario_name, summary,
+                           manifest_entry={'config_key': config_key, 'results_key': key, 'analysis': analysis},
+                           rollups=rollups, profiler=profiler)
+    if profiler is not None:
+        profiler.write_folded(os.path.join(report_path, FOLDED_FILE))
+    
+    return analysis
+
+def analyze_dataset(results, scenario_name='Base Scenario', rollups=None, max_points=MAX_PLOT_POINTS):
+    """
+    Analyze a ResultDataset one stored chunk at a time
+    Returns (analysis, summary, rollups, plot frame): the analyze_results
+    pair, the given RollupPyramid or one built along the way, and the rows
+    the report figures need at max_points per series, so no more than a
+    chunk of the run is ever in memory
+    """
+    stream = ChunkedAnalysis(PERFORMANCE_TARGETS)
+    pyramid = RollupPyramid() if rollups is None else rollups
+    decimator = ChunkDecimator(len(results), max_points)
+    start = 0
+    for chunk in results.chunks():
+        stream.extend(chunk)
+        if rollups is None:
+            pyramid.extend(chunk)
+        select_plot_points(decimator, start, chunk)
+        start += len(chunk['epoch'])
+    return stream.analysis(), stream.summary(scenario_name), pyramid, results.take(decimator.indices())
+
+def reanalyze_scenario(scenario_name, config_key=None, force=False, rollups=None, profiler=None):
+    """Rebuild a scenario's analysis and report from its persisted results, without simulating"""
+    results = ResultDataset(scenario_results_path(scenario_name))
+    return results, report_simulation(results, scenario_name, config_key, force, rollups, profiler)
+
+def run_ensemble_simulation(initial_conditions, paths, duration_days=7, seed=None, verbose=True,
+                            events=None, **shock_params):
+    """Advance many stochastic paths of a scenario in lockstep and return the ensemble"""
+    scenario_name = initial_conditions.get('name', 'Base Scenario')
+    total_epochs = int(duration_days * 8640)
+    ensemble = EnsembleSimulation(initial_conditions, paths, total_epochs, seed=seed,
+                                  events=events, **shock_params)
+    
+    if verbose:
+        print(f"\nStarting ensemble for {scenario_name}: {paths} paths, {duration_days} days ({total_epochs} epochs)")
     start_time = time.time()
     
     for epoch in range(total_epochs):
-        sim.run_epoch(epoch)
+        ensemble.run_epoch(epoch)
         
-        # Progress update every 1000 epochs
-        if epoch % 1000 == 0:
+        if verbose and epoch % 1000 == 0:
             progress = (epoch / total_epochs) * 100
             print(f"Progress: {progress:.1f}% complete")
     
-    duration = time.time() - start_time
-    print(f"\nSimulation completed in {duration:.2f} seconds")
+    ensemble.elapsed = time.time() - start_time
+    if verbose:
+        print(f"\nEnsemble completed in {ensemble.elapsed:.2f} seconds "
+              f"({paths * total_epochs / max(ensemble.elapsed, 1e-9):,.0f} path-epochs/s)")
     
-    # Generate analysis
-    report_path = f"reports/{scenario_name.replace(' ', '_').lower()}"
+    return ensemble
+
+def run_continuous_simulation(initial_conditions, duration_days=7, results=None, verbose=True, events=None,
+                              rollups=True, profiler=None):
+    """
+    Integrate a scenario in continuous time and sample it onto the epoch grid
+    See continuous.ContinuousSimulation; returns the finished simulation with
+    the same results, rollups and conditions as run_simulation's
+    """
+    scenario_name = initial_conditions.get('name', 'Base Scenario')
+    sim_conditions = {k: v for k, v in initial_conditions.items() if k != 'name'}
+    total_epochs = int(duration_days * 8640)
+    sim = ContinuousSimulation(sim_conditions, total_epochs, events, results, rollups)
     
-    analysis = analyze_simulation_results(sim.results, {
-        'price_deviation_max': 0.02,
-        'liquidity_variance_max': 0.1,
-        'participant_retention_min': 0.9,
-        'settlement_rate_min': 0.99
-    })
+    if verbose:
+        print(f"\nStarting continuous run for {scenario_name}: {duration_days} days ({total_epochs} epochs)")
+    if profiler is None:
+        integrate_time, sample_time = sim.run()
+    else:
+        targets = [(ContinuousSimulation, 'integrate', 'integrate'), (ContinuousSimulation, 'sample', 'sample'),
+                   (continuous_module, 'epoch_columns', 'epoch_columns')]
+        with profiler.instrument(targets):
+            integrate_time, sample_time = sim.run()
     
-    # Create detailed report
-    create_analysis_report(sim.results, analysis, report_path, scenario_name)
+    if verbose:
+        stats = sim.stats
+        print(f"\nIntegrated in {integrate_time:.3f} seconds: {stats['steps']} solver steps over "
+              f"{stats['segments']} segments ({stats['switches']} regime switches, {stats['rebases']} rebases)")
+        print(f"Sampled {total_epochs} epochs in {sample_time:.3f} seconds")
+    return sim
+
+def scenario_ledger(initial_conditions, holders=0, seed=None):
+    """HolderLedger of a scenario's holders, or of holders of them when nonzero"""
+    return HolderLedger(holders or int(initial_conditions['total_holders']),
+                        initial_conditions['avg_holding_balance'], initial_conditions['days_held'], seed=seed)
+
+def write_ledger_report(ledger, scenario_name, verbose=True):
+    """
+    Write a ledger's cost distributions to the scenario's ledger/ report directory
+    ledger.csv holds the periodic sample reports and summary.csv the exact
+    distributions over every holder at the end; returns the summary
+    """
+    summary = ledger.summary()
+    report_path = os.path.join(scenario_report_path(scenario_name), 'ledger')
+    os.makedirs(report_path, exist_ok=True)
+    ledger.frame().to_csv(os.path.join(report_path, 'ledger.csv'), index=False)
+    ledger_summary_frame(summary).to_csv(os.path.join(report_path, 'summary.csv'), index=False)
+    plot_ledger_costs(ledger.frame(), ledger.daily_costs(), report_path, scenario_name)
     
-    # Add scenario name to analysis
+    if verbose:
+        print_ledger_summary(summary)
+    return summary
+
+def run_parameter_sweep(initial_conditions, axes, duration_days=7, seed=None, verbose=True, events=None):
+    """
+    Run a scenario over the Cartesian grid of axes as one batched simulation
+    axes maps condition keys to the values they take. events, if any,
+    are sampled once and shared by every grid point. Heatmaps of each
+    outcome and sweep.csv, one row per grid point, are written to the
+    scenario's sweep/ report directory; returns ParameterSweep.results
+    """
+    scenario_name = initial_conditions.get('name', 'Base Scenario')
+    total_epochs = int(duration_days * 8640)
+    sweep = ParameterSweep(initial_conditions, axes, total_epochs, events=events, seed=seed)
+    
+    if verbose:
+        grid = ' x '.join(f"{key} ({len(values)})" for key, values in sweep.axes.items())
+        print(f"\nStarting sweep for {scenario_name}: {grid} = {sweep.paths} points, "
+              f"{duration_days} days ({total_epochs} epochs)")
+    start_time = time.time()
+    
+    for epoch in range(total_epochs):
+        sweep.run_epoch(epoch)
+        
+        if verbose and epoch % 1000 == 0:
+            progress = (epoch / total_epochs) * 100
+            print(f"Progress: {progress:.1f}% complete")
+    
+    sweep.elapsed = time.time() - start_time
+    results = sweep.results(PERFORMANCE_TARGETS)
+    
+    report_path = os.path.join(scenario_report_path(scenario_name), 'sweep')
+    os.makedirs(report_path, exist_ok=True)
+    sweep_frame(results).to_csv(os.path.join(report_path, 'sweep.csv'), index=False)
+    plot_sweep_heatmaps(results, report_path, scenario_name)
+    
+    if verbose:
+        print(f"\nSweep completed in {sweep.elapsed:.2f} seconds "
+              f"({sweep.paths * total_epochs / max(sweep.elapsed, 1e-9):,.0f} point-epochs/s)")
+        print_sweep_summary(results)
+    return results
+
+def run_calibration(scenarios, duration_days=7, candidates=81, eta=3, workers=None, seed=None, verbose=True,
+                    events=None):
+    """
+    Calibrate the formula constants for each scenario family
+    Successive halving over candidates constant vectors, horizons growing
+    by eta up to duration_days; writes calibration.csv, one row per family,
+    to reports/calibration and returns the calibrate result. load_calibration
+    reads the file back into constants for run_simulation
+    """
+    total_epochs = int(duration_days * 8640)
+    if verbose:
+        print(f"\nCalibrating {len(scenarios)} scenarios: {candidates} candidates, eta {eta}, "
+              f"up to {duration_days} days ({total_epochs} epochs)")
+    start_time = time.time()
+    calibration = calibrate(scenarios, total_epochs, PERFORMANCE_TARGETS, candidates, eta,
+                            workers=workers, events=events, seed=seed)
+    elapsed = time.time() - start_time
+    
+    report_path = 'reports/calibration'
+    os.makedirs(report_path, exist_ok=True)
+    calibration_frame(calibration).to_csv(os.path.join(report_path, 'calibration.csv'), index=False)
+    
+    if verbose:
+        print_calibration(calibration)
+        print(f"\nCalibration completed in {elapsed:.2f} seconds")
+    return calibration
+
+def run_online_simulation(initial_conditions, duration_days=7, verbose=True, events=None, scheduled=False,
+                          shocks=()):
+    """
+    Run a scenario keeping only streaming accumulators instead of per-epoch results
+    Memory stays constant in the run length, events included: an EventModel
+    is sampled a day at a time as the run goes. Returns the analysis dict
+    """
+    scenario_name = initial_conditions.get('name', 'Base Scenario')
+    if isinstance(events, EventModel):
+        events = EventStream(events, max_epochs(duration_days * 86400) if scheduled else int(duration_days * 8640))
+    sim = run_simulation(initial_conditions, duration_days, results=StreamingAnalysis(PERFORMANCE_TARGETS),
+                         verbose=verbose, events=events, rollups=None, scheduled=scheduled, shocks=shocks)
+    analysis = sim.results.analysis()
     analysis['scenario_name'] = scenario_name
+    return analysis
+
+def scenario_profiler(scenario_name, profile=False, cprofile=False):
+    """StageProfiler for a scenario when profiling is on, writing cProfile stats to its report directory"""
+    if not (profile or cprofile):
+        return None
+    return StageProfiler(os.path.join(scenario_report_path(scenario_name), CPROFILE_FILE) if cprofile else None)
+
+def run_comprehensive_simulation(initial_conditions, duration_days=7, ensemble_paths=None, seed=None,
+                                 events=None, online=False, persist=False, force=False, profile=False,
+                                 cprofile=False, backend='python', steady_state=False, continuous=False,
+                                 scheduled=False, shocks=(), ledger_holders=None):
+    """
+    Run comprehensive market simulation
+    With ensemble_paths set, runs that many stochastic paths instead and
+    returns (percentile bands, tail-risk analysis). With online set, only
+    the streaming analysis is kept and no report is written, returning
+    (None, analysis). With persist set, results are flushed in chunks to
+    the scenario's results.arrow and analyzed from the memory-mapped file.
+    events is an optional EventModel applied to any mode. A scenario whose
+    config, event schedule and simulation code match its manifest entry is
+    skipped, returning (None, cached analysis), unless force is set. With
+    profile set, per-stage timings are printed, added to the report and
+    written as folded stacks; cprofile also writes cProfile stats. backend
+    'jit' runs the epoch loop in the compiled kernel when it can, and
+    steady_state fills stationary stretches of the interpreted loop in
+    closed form. continuous integrates the scenario with the ODE engine
+    instead, reported under continuous_scenario_name. scheduled runs
+    duration_days of simulated time under the discrete-event scheduler,
+    with shocks as its timed shocks. With ledger_holders set, an epoch-loop
+    run also keeps a HolderLedger of that many holders (0 for the
+    scenario's total_holders) and writes its cost distributions next to
+    the report; a cached report is not reused then
+    """
+    scenario_name = initial_conditions.get('name', 'Base Scenario')
+    if ensemble_paths:
+        ensemble = run_ensemble_simulation(initial_conditions, ensemble_paths, duration_days, seed,
+                                           events=events)
+        bands = ensemble.band_results()
+        analysis = ensemble.summary(PERFORMANCE_TARGETS['price_deviation_max'])
+        
+        report_path = scenario_report_path(scenario_name)
+        os.makedirs(report_path, exist_ok=True)
+        plot_ensemble_bands(bands, report_path, scenario_name)
+        
+        analysis['scenario_name'] = scenario_name
+        print_ensemble_summary(analysis)
+        return bands, analysis
     
-    return sim.results, analysis
+    if online:
+        return None, run_online_simulation(initial_conditions, duration_days, events=events, scheduled=scheduled,
+                                           shocks=shocks)
+    
+    # Sample the schedule up front so it is part of the key
+    if isinstance(events, EventModel):
+        events = events.sample(max_epochs(duration_days * 86400) if scheduled else int(duration_days * 8640))
+    if continuous:
+        scenario_name = continuous_scenario_name(scenario_name)
+        key = continuous_config_key(initial_conditions, duration_days, events)
+    else:
+        key = simulation_config_key(initial_conditions, duration_days, events, scheduled, shocks)
+    ledger = None if continuous or ledger_holders is None else scenario_ledger(initial_conditions, ledger_holders, seed)
+    entry = None if force or ledger is not None else cached_report(scenario_name, 'config_key', key)
+    if entry is not None:
+        print(f"\nSkipping unchanged scenario: {scenario_name}")
+        return None, entry['analysis']
+    
+    profiler = scenario_profiler(scenario_name, profile, cprofile)
+    if persist:
+        writer = ChunkedResultWriter(scenario_results_path(scenario_name))
+        if continuous:
+            sim = run_continuous_simulation(initial_conditions, duration_days, results=writer, events=events,
+                                            profiler=profiler)
+        else:
+            sim = run_simulation(initial_conditions, duration_days, results=writer, events=events,
+                                 profiler=profiler, backend=backend, steady_state=steady_state,
+                                 scheduled=scheduled, shocks=shocks, ledger=ledger)
+        writer.close()
+        results, analysis = reanalyze_scenario(scenario_name, key, force, sim.rollups, profiler)
+    else:
+        if continuous:
+            sim = run_continuous_simulation(initial_conditions, duration_days, events=events, profiler=profiler)
+        else:
+            sim = run_simulation(initial_conditions, duration_days, events=events, profiler=profiler,
+                                 backend=backend, steady_state=steady_state, scheduled=scheduled,
+                                 shocks=shocks, ledger=ledger)
+        results = sim.results
+        analysis = report_simulation(results, scenario_name, key, force, sim.rollups, profiler)
+    if profiler is not None:
+        print(f"\nStage timings for {scenario_name}:")
+        print(format_timings(profiler.table()))
+    if ledger is not None:
+        write_ledger_report(ledger, scenario_name)
+    return results, analysis
 
-def analyze_simulation_results(results, targets):
-    """Analyze simulation results against targets"""
-    analysis = {
-        'stability_metrics': calculate_stability_metrics(results),
-        'equilibrium_states': analyze_equilibrium_states(results),
-        'recovery_metrics': analyze_recovery_metrics(results),
-        'economic_metrics': analyze_economic_metrics(results)
+def print_scenario_analysis(analysis):
+    """Print the per-scenario console summary"""
+    print("\nScenario Analysis:")
+    stability_metrics = analysis['stability_metrics']
+    metrics_to_display = {
+        'Price Stability': 'price_stability',
+        'Liquidity Health': 'liquidity_health',
+        'Network Utility': 'network_utility'
     }
     
-    # Validate against targets
-    analysis['success_criteria'] = validate_targets(analysis, targets)
-    
+    for label, metric in metrics_to_display.items():
+        value = stability_metrics.get(metric, 'N/A')
+        if value != 'N/A':
+            print(f"{label}: {value:.2f}")
+        else:
+            print(f"{label}: {value}")
+
+def analyze_simulation_results(results, targets):
+    """Analyze simulation results against targets"""
+    analysis, summary = analyze_results(results, targets)
     return analysis
 
+def print_sweep_summary(results):
+    """Print how much of a sweep's grid stays in equilibrium and meets the targets"""
+    equilibrium = results['equilibrium_percentage']
+    print(f"\nSweep Analysis ({equilibrium.size} points):")
+    print(f"Time in Equilibrium: {equilibrium.min():.1f}% to {equilibrium.max():.1f}%, "
+          f"mean {equilibrium.mean():.1f}%")
+    print(f"Points Meeting All Targets: {results['passes_targets'].mean():.2%}")
+    for name, counts in results['circuit_breakers'].items():
+        print(f"{name} active somewhere: {(counts > 0).mean():.2%} of points")
+
+def print_ensemble_summary(analysis):
+    """Print the tail-risk summary of an ensemble run"""
+    labels = '/'.join(f"p{p}" for p in analysis['percentiles'])
+    print(f"\nEnsemble Analysis ({analysis['paths']} paths, {labels}):")
+    print("Final Price: " + ", ".join(f"{v:.4f}" for v in analysis['final_price']))
+    print("Max Price Deviation: " + ", ".join(f"{v:.4f}" for v in analysis['max_price_deviation']))
+    print(f"Peg Breach Probability: {analysis['peg_breach_probability']:.2%}")
+    for name, frequency in analysis['circuit_breaker_frequency'].items():
+        print(f"{name} frequency: " + ", ".join(f"{v:.2%}" for v in frequency))
+
+def print_ledger_summary(summary):
+    """Print the holder cost, balance and age distributions of a ledger summary"""
+    print(f"\nHolder Ledger ({summary['holders']:,} holders, {summary['epochs']} epochs, "
+          f"{summary['transfers']:,} transfers):")
+    print(f"Demurrage Collected: {summary['collected_usdc']:,.2f} USDC")
+    labels = {'daily_cost': 'Daily Cost (USDC)', 'balance': 'Balance (USDC)', 'age_days': 'Holding Age (days)'}
+    for name, label in labels.items():
+        print(f"{label}: " + ", ".join(f"{stat} {value:.4g}" for stat, value in summary[name].items()))
+
 if __name__ == "__main__":
     initial_conditions = {
         "validator_count": 5000,
@@ -283,26 +930,112 @@ if __name__ == "__main__":
         }
     ]
 
-    # Run base simulation
-    results, analysis = run_comprehensive_simulation(initial_conditions)
-    
-    # Run stress scenarios
-    for scenario in stress_scenarios:
-        print(f"\nRunning stress scenario: {scenario['name']}")
-        scenario_results, scenario_analysis = run_comprehensive_simulation(scenario)
-        
-        # Compare results
-        print("\nScenario Analysis:")
-        stability_metrics = scenario_analysis['stability_metrics']
-        metrics_to_display = {
-            'Price Stability': 'price_stability',
-            'Liquidity Health': 'liquidity_health',
-            'Network Utility': 'network_utility'
-        }
+    parser = argparse.ArgumentParser(description="Run the market stability scenarios")
+    parser.add_argument('--days', type=float, default=7, help="simulated days per scenario")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per core, 1 runs in-process)")
+    parser.add_argument('--paths', type=int, default=None,
+                        help="run each scenario as a Monte Carlo ensemble of this many paths")
+    parser.add_argument('--seed', type=int, default=None, help="ensemble and event random seed")
+    parser.add_argument('--events', action='store_true',
+                        help="inject the precept's per-epoch event probabilities")
+    parser.add_argument('--online', action='store_true',
+                        help="keep streaming analysis only, for long runs (no reports)")
+    parser.add_argument('--persist', action='store_true',
+                        help="write each scenario's results to reports/<scenario>/results.arrow")
+    parser.add_argument('--reanalyze', action='store_true',
+                        help="rebuild reports from persisted results instead of simulating")
+    parser.add_argument('--force', action='store_true',
+                        help="redo scenarios even when the report manifest says they are unchanged")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each stage; adds a timing table and profile.folded to each report")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="like --profile, also writing cProfile stats to each report's profile.prof")
+    parser.add_argument('--sweep', nargs='+', default=None, metavar='KEY=START:STOP:NUM',
+                        help="sweep each scenario over a grid of conditions, e.g. liquidity_ratio=0.05:1:20 "
+                             "or validator_count=1000,3000,5000")
+    parser.add_argument('--jit', action='store_true',
+                        help="run the epoch loop in the numba-compiled kernel (falls back when unavailable)")
+    parser.add_argument('--steady-state', action='store_true',
+                        help="fill stationary stretches of the epoch loop in closed form instead of stepping them")
+    parser.add_argument('--scheduled', action='store_true',
+                        help="run epochs as long as determine_epoch_duration makes them, up to --days of "
+                             "simulated time, under the discrete-event scheduler")
+    parser.add_argument('--ledger', type=int, nargs='?', const=0, default=None, metavar='HOLDERS',
+                        help="keep a per-holder demurrage ledger of this many holders (default: the "
+                             "scenario's total_holders) and report its cost distributions")
+    parser.add_argument('--ode', action='store_true',
+                        help="integrate each scenario with the adaptive continuous-time engine, "
+                             "reported as '<scenario> (ODE)'")
+    parser.add_argument('--calibrate', type=int, nargs='?', const=81, default=None, metavar='CANDIDATES',
+                        help="calibrate the formula constants per scenario family by successive halving "
+                             "over this many candidates (default 81)")
+    args = parser.parse_args()
+    events = EventModel(seed=args.seed) if args.events else None
+    backend = 'jit' if args.jit else 'python'
+
+    if args.reanalyze:
+        for scenario in [initial_conditions] + stress_scenarios:
+            scenario_name = scenario.get('name', 'Base Scenario')
+            print(f"\nReanalyzing scenario: {scenario_name}")
+            results, analysis = reanalyze_scenario(scenario_name, force=args.force)
+            print_scenario_analysis(analysis)
+    elif args.ledger is not None:
+        # Each ledger is a few arrays per holder, so scenarios run one at a time
+        for scenario in [initial_conditions] + stress_scenarios:
+            results, analysis = run_comprehensive_simulation(scenario, args.days, seed=args.seed, events=events,
+                                                             persist=args.persist, force=args.force,
+                                                             profile=args.profile, cprofile=args.cprofile,
+                                                             backend=backend, steady_state=args.steady_state,
+                                                             scheduled=args.scheduled, ledger_holders=args.ledger)
+            print_scenario_analysis(analysis)
+    elif args.ode:
+        # Continuous runs take well under a second each, so they run in-process
+        for scenario in [initial_conditions] + stress_scenarios:
+            results, analysis = run_comprehensive_simulation(scenario, args.days, events=events,
+                                                             persist=args.persist, force=args.force,
+                                                             profile=args.profile, cprofile=args.cprofile,
+                                                             continuous=True)
+            print_scenario_analysis(analysis)
+    elif args.calibrate:
+        run_calibration([initial_conditions] + stress_scenarios, args.days, candidates=args.calibrate,
+                        workers=args.workers, seed=args.seed, events=events)
+    elif args.sweep:
+        axes = dict(parse_axis(spec) for spec in args.sweep)
+        for scenario in [initial_conditions] + stress_scenarios:
+            run_parameter_sweep(scenario, axes, args.days, seed=args.seed, events=events)
+    elif args.paths:
+        for scenario in [initial_conditions] + stress_scenarios:
+            run_comprehensive_simulation(scenario, args.days, ensemble_paths=args.paths, seed=args.seed,
+                                         events=events)
+    elif args.workers == 1:
+        # Run base simulation
+        results, analysis = run_comprehensive_simulation(initial_conditions, args.days, events=events,
+                                                         online=args.online, persist=args.persist,
+                                                         force=args.force, profile=args.profile,
+                                                         cprofile=args.cprofile, backend=backend,
+                                                         steady_state=args.steady_state,
+                                                         scheduled=args.scheduled)
         
-        for label, metric in metrics_to_display.items():
-            value = stability_metrics.get(metric, 'N/A')
-            if value != 'N/A':
-                print(f"{label}: {value:.2f}")
-            else:
-                print(f"{label}: {value}")#
\ No newline at end of file
+        # Run stress scenarios
+        for scenario in stress_scenarios:
+            print(f"\nRunning stress scenario: {scenario['name']}")
+            scenario_results, scenario_analysis = run_comprehensive_simulation(scenario, args.days,
+                                                                               events=events,
+                                                                               online=args.online,
+                                                                               persist=args.persist,
+                                                                               force=args.force,
+                                                                               profile=args.profile,
+                                                                               cprofile=args.cprofile,
+                                                                               backend=backend,
+                                                                               steady_state=args.steady_state,
+                                                                               scheduled=args.scheduled)
+            
+            # Compare results
+            print_scenario_analysis(scenario_analysis)
+    else:
+        from runner import run_scenarios
+        run_scenarios([initial_conditions] + stress_scenarios, args.days, workers=args.workers,
+                      events=events, online=args.online, persist=args.persist,
+                      force=args.force, profile=args.profile, cprofile=args.cprofile, backend=backend,
+                      steady_state=args.steady_state, scheduled=args.scheduled)
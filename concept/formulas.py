@@ -3,15 +3,37 @@ from scipy import stats
 from collections import deque
 import math
 import itertools
-import pandas as pd
+from results import results_frame
+from episodes import recovery_episodes, equilibrium_episodes
 
 class MarketMetrics:
-    def __init__(self, window_size=30):
-        """Initialize market metrics with configurable window size"""
+    def __init__(self, window_size=30, pressure_decay=0.94):
+        """
+        Initialize market metrics with configurable window size
+        Window statistics are kept as running accumulators so every update
+        and query costs the same regardless of window size
+        """
         self.price_window = deque(maxlen=window_size)
         self.volume_window = deque(maxlen=window_size)
         self.pressure_window = deque(maxlen=window_size)
         self.window_size = window_size
+        self.pressure_decay = pressure_decay
+        
+        # Rolling mean/M2 of the log returns within the price window (Welford)
+        self.return_window = deque()
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+        
+        # Running volume sums over the whole window and its last 5 entries
+        self.volume_sum = 0.0
+        self.recent_volume_sum = 0.0
+        
+        # EWMA of pressure (newest weight 1) and least-squares sums
+        self.pressure_ewma_sum = 0.0
+        self.pressure_ewma_weight = 0.0
+        self.pressure_sum = 0.0
+        self.pressure_index_sum = 0.0
+        self.pressure_evict_weight = pressure_decay ** window_size
         self.price_history = []
         self.liquidity_history = []
         self.participant_retention = []
@@ -30,17 +52,80 @@ class MarketMetrics:
 
     def update_metrics(self, price, volume, pressure):
         """Update all metrics with new values"""
+        self._update_price(price)
+        self._update_volume(volume)
+        self._update_pressure(pressure)
+
+    def _update_price(self, price):
+        """Slide the price window and its rolling log-return variance"""
+        if self.price_window:
+            if len(self.price_window) == self.window_size:
+                self.price_window.popleft()
+                if self.return_window:
+                    self._remove_return(self.return_window.popleft())
+            if self.price_window:
+                self._add_return(math.log(price / self.price_window[-1]))
         self.price_window.append(price)
+
+    def _add_return(self, value):
+        self.return_window.append(value)
+        delta = value - self.return_mean
+        self.return_mean += delta / len(self.return_window)
+        self.return_m2 += delta * (value - self.return_mean)
+
+    def _remove_return(self, value):
+        n = len(self.return_window)
+        if n == 0:
+            self.return_mean = self.return_m2 = 0.0
+            return
+        delta = value - self.return_mean
+        self.return_mean -= delta / n
+        self.return_m2 = max(0.0, self.return_m2 - delta * (value - self.return_mean))
+
+    def _update_volume(self, volume):
+        """Slide the volume window and its running sums"""
+        if len(self.volume_window) == self.window_size:
+            evicted = self.volume_window.popleft()
+            self.volume_sum -= evicted
+            if self.window_size <= 5:
+                self.recent_volume_sum -= evicted
+        if len(self.volume_window) >= 5:
+            self.recent_volume_sum -= self.volume_window[-5]
         self.volume_window.append(volume)
+        self.volume_sum += volume
+        self.recent_volume_sum += volume
+
+    def _update_pressure(self, pressure):
+        """Slide the pressure window, its EWMA and least-squares sums"""
+        decay = self.pressure_decay
+        evicted = 0.0
+        evict_weight = 0.0
+        if len(self.pressure_window) == self.window_size:
+            evicted = self.pressure_window.popleft()
+            evict_weight = self.pressure_evict_weight
+            # Remaining entries each move one index closer to the start
+            self.pressure_sum -= evicted
+            self.pressure_index_sum -= self.pressure_sum
+        self.pressure_ewma_sum = decay * self.pressure_ewma_sum + pressure - evict_weight * evicted
+        self.pressure_ewma_weight = decay * self.pressure_ewma_weight + 1 - evict_weight
+        self.pressure_index_sum += len(self.pressure_window) * pressure
+        self.pressure_sum += pressure
         self.pressure_window.append(pressure)
 
     def get_volatility(self):
         """Get current volatility based on price window"""
-        return calculate_historical_volatility(list(self.price_window), self.window_size)
+        if not self.return_window:
+            return 0
+        return math.sqrt(self.return_m2 / len(self.return_window)) * math.sqrt(self.window_size)
 
     def get_volume_weight(self):
         """Get current volume weight"""
-        return calculate_volume_weight(list(self.volume_window))
+        n = len(self.volume_window)
+        if not n:
+            return 1
+        recent_vol = self.recent_volume_sum / min(5, n)  # Last 5 periods
+        total_vol = self.volume_sum / n  # All periods
+        return min(1, (recent_vol / total_vol) if total_vol > 0 else 1)
 
     def track_recovery(self, current_metrics):
         """Track recovery metrics over time"""
@@ -131,27 +216,35 @@ class MarketMetrics:
         }
 
     def get_market_pressure(self):
-        """Get current market pressure based on recent pressure window"""
+        """Get current market pressure as an EWMA over the pressure window, newest first"""
         if not self.pressure_window:
             return 0
-        
-        # Calculate weighted average of recent pressure
-        weights = np.array([0.94 ** i for i in range(len(self.pressure_window))])
-        weighted_pressure = np.sum(weights * np.array(list(self.pressure_window)))
-        return weighted_pressure / np.sum(weights)
+        return self.pressure_ewma_sum / self.pressure_ewma_weight
 
     def get_pressure_trend(self):
-        """Get market pressure trend over the window"""
-        if len(self.pressure_window) < 2:
+        """Get market pressure trend (least-squares slope) over the window"""
+        n = len(self.pressure_window)
+        if n < 2:
             return 0
-            
-        pressures = list(self.pressure_window)
-        return np.polyfit(range(len(pressures)), pressures, 1)[0]
+        
+        index_total = n * (n - 1) / 2
+        index_squares = (n - 1) * n * (2 * n - 1) / 6
+        return ((n * self.pressure_index_sum - index_total * self.pressure_sum) /
+                (n * index_squares - index_total ** 2))
+
+def _pick(constants, names):
+    """Keyword overrides for the names present in constants"""
+    return {name: constants[name] for name in names if name in constants}
 
 def calculate_economics(validator_count, total_holders, daily_transactions, current_price,
                       avg_transaction_size, avg_holding_balance, days_held, liquidity_ratio,
-                      cross_chain_transfers, buys_volume, sells_volume, market_metrics):
-    """Calculate all economic metrics for an epoch"""
+                      cross_chain_transfers, buys_volume, sells_volume, market_metrics, constants=None):
+    """
+    Calculate all economic metrics for an epoch
+    constants overrides the tunable formula constants by keyword name, as
+    in vector_formulas.calculate_economics, e.g. a calibrated set
+    """
+    constants = constants or {}
     
     # Calculate participation metrics
     validator_participation = validator_count / 5000  # Normalized to initial count
@@ -194,13 +287,15 @@ def calculate_economics(validator_count, total_holders, daily_transactions, curr
     
     # Calculate rewards and costs
     base_reward = 0.1  # Base reward rate in USDC
-    v_reward = validator_reward(base_reward, daily_transactions, validator_count, psi)
+    v_reward = validator_reward(base_reward, daily_transactions, validator_count, psi,
+                                **_pick(constants, ('validator_share',)))
     h_cost = holder_cost(0.01, days_held, avg_holding_balance, psi)  # Base rate 1%
     vh_cost = validator_holder_cost(h_cost, v_reward, nus)
     tx_fee = transaction_fee(0.001, psi, avg_transaction_size, liquidity_ratio)  # Base fee 0.1%
     
     # Calculate convergence
-    conv_rate = convergence_rate(current_price, 1.0, market_press, psi)
+    conv_rate = convergence_rate(current_price, 1.0, market_press, psi,
+                                 **_pick(constants, ('alpha', 'beta', 'gamma')))
     
     # Check circuit breakers
     halt, emergency, rebase = circuit_breaker_conditions(liquidity_ratio, 
@@ -208,13 +303,16 @@ def calculate_economics(validator_count, total_holders, daily_transactions, curr
                                                        lhi)
     
     # Check equilibrium
-    is_equilibrium, failing = equilibrium_state(psi, lhi, nus, conv_rate)
+    is_equilibrium, failing = equilibrium_state(
+        psi, lhi, nus, conv_rate, {**EQUILIBRIUM_THRESHOLDS, **_pick(constants, EQUILIBRIUM_THRESHOLDS)}
+    )
     
     # Calculate dynamic spread based on market conditions
     dynamic_spread = calculate_dynamic_spread(
         liquidity_ratio,
         market_metrics.get_market_pressure(),
-        validator_count / 5000  # Normalized validator count
+        validator_count / 5000,  # Normalized validator count
+        **_pick(constants, ('base_spread', 'validator_base'))
     )
     
     return {
@@ -266,7 +364,7 @@ def calculate_settlement_rate(daily_transactions, validator_count, liquidity_rat
 
 def calculate_stability_metrics(results):
     """Calculate overall stability metrics from simulation results"""
-    df = pd.DataFrame(results)
+    df = results_frame(results)
     return {
         'price_stability': df['price_stability_index'].mean(),
         'price_volatility': df['current_price'].std(),
@@ -282,7 +380,7 @@ def analyze_equilibrium_states(results):
     Analyze equilibrium states throughout simulation results
     Returns metrics about system equilibrium periods
     """
-    if not results:
+    if not len(results):
         return {
             'total_equilibrium_periods': 0,
             'longest_equilibrium_streak': 0,
@@ -291,28 +389,15 @@ def analyze_equilibrium_states(results):
             'equilibrium_stability': 0
         }
     
-    # Track equilibrium streaks
-    current_streak = 0
-    streaks = []
-    equilibrium_periods = 0
-    
-    for result in results:
-        if result.get('is_equilibrium', False):
-            current_streak += 1
-            equilibrium_periods += 1
-        else:
-            if current_streak > 0:
-                streaks.append(current_streak)
-            current_streak = 0
-    
-    # Add final streak if exists
-    if current_streak > 0:
-        streaks.append(current_streak)
+    # Equilibrium streaks are the runs of True in the equilibrium mask
+    starts, ends = equilibrium_episodes(results_frame(results)['is_equilibrium'].to_numpy())
+    streaks = ends - starts
+    equilibrium_periods = int(streaks.sum())
     
     # Calculate metrics
     total_periods = len(results)
-    longest_streak = max(streaks) if streaks else 0
-    avg_duration = sum(streaks) / len(streaks) if streaks else 0
+    longest_streak = int(streaks.max()) if len(streaks) else 0
+    avg_duration = equilibrium_periods / len(streaks) if len(streaks) else 0
     percent_in_equilibrium = (equilibrium_periods / total_periods * 100) if total_periods > 0 else 0
     
     # Calculate stability (ratio of equilibrium time to disruptions)
@@ -329,90 +414,64 @@ def analyze_equilibrium_states(results):
         'equilibrium_stability': stability
     }
 
+def find_recovery_episodes(df):
+    """Per-episode recovery arrays for a results frame, see episodes.recovery_episodes"""
+    return recovery_episodes(
+        df['current_price'].to_numpy(dtype=np.float64),
+        df['liquidity_ratio'].to_numpy(dtype=np.float64),
+        df['price_stability_index'].to_numpy(dtype=np.float64),
+        df['daily_holder_cost_usdc'].to_numpy(dtype=np.float64)
+    )
+
 def identify_recovery_periods(df):
     """Identify and analyze recovery periods in the simulation data"""
-    recovery_periods = []
-    in_recovery = False
-    recovery_start = 0
-    
-    # Define recovery thresholds from precept
-    PRICE_THRESHOLD = 0.05  # Price within 5% of target
-    LIQUIDITY_THRESHOLD = 0.7  # Minimum healthy liquidity
-    STABILITY_THRESHOLD = 0.8  # Minimum stability index
-    
-    for i in range(len(df)):
-        price_deviation = abs(df['current_price'].iloc[i] - 1.0)
-        liquidity = df['liquidity_ratio'].iloc[i]
-        stability = df['price_stability_index'].iloc[i]
-        
-        # Check if we're in a crisis
-        is_crisis = (
-            price_deviation > PRICE_THRESHOLD or
-            liquidity < LIQUIDITY_THRESHOLD or
-            stability < STABILITY_THRESHOLD
+    episodes = find_recovery_episodes(df)
+    return [
+        {
+            'start_epoch': start,
+            'end_epoch': end,
+            'duration': end - start,
+            'successful': successful,
+            'total_cost': total_cost,
+            'stability_after': stability_after
+        }
+        for start, end, successful, total_cost, stability_after in zip(
+            episodes['start_epoch'].tolist(), episodes['end_epoch'].tolist(),
+            episodes['successful'].tolist(), episodes['total_cost'],
+            episodes['stability_after']
         )
-        
-        if is_crisis and not in_recovery:
-            # Start of recovery period
-            in_recovery = True
-            recovery_start = i
-        elif not is_crisis and in_recovery:
-            # End of recovery period
-            recovery_end = i
-            
-            # Calculate recovery metrics
-            recovery_period = {
-                'start_epoch': recovery_start,
-                'end_epoch': recovery_end,
-                'duration': recovery_end - recovery_start,
-                'successful': True,
-                'total_cost': df['daily_holder_cost_usdc'].iloc[recovery_start:recovery_end].sum(),
-                'stability_after': df['price_stability_index'].iloc[recovery_end:recovery_end+100].mean() 
-                                 if recovery_end + 100 < len(df) else df['price_stability_index'].iloc[recovery_end:].mean()
-            }
-            
-            recovery_periods.append(recovery_period)
-            in_recovery = False
-    
-    # Handle case where we're still in recovery at end of simulation
-    if in_recovery:
-        recovery_periods.append({
-            'start_epoch': recovery_start,
-            'end_epoch': len(df),
-            'duration': len(df) - recovery_start,
-            'successful': False,
-            'total_cost': df['daily_holder_cost_usdc'].iloc[recovery_start:].sum(),
-            'stability_after': df['price_stability_index'].iloc[-100:].mean()
-        })
-    
-    return recovery_periods
+    ]
 
-def analyze_recovery_metrics(results):
-    """Analyze recovery metrics from simulation results"""
-    df = pd.DataFrame(results)
-    recovery_periods = identify_recovery_periods(df)
-    
-    if not recovery_periods:
+def summarize_recovery_episodes(episodes, psi_mean):
+    """Recovery metrics from the per-episode arrays"""
+    if not len(episodes['duration']):
         return {
             'average_recovery_time': 0,
             'recovery_success_rate': 1.0,  # No recoveries needed = perfect score
             'avg_cost_per_recovery': 0,
-            'stability_post_recovery': df['price_stability_index'].mean()
+            'stability_post_recovery': psi_mean
         }
     
+    durations = episodes['duration']
+    costs = episodes['total_cost']
     return {
-        'average_recovery_time': np.mean([p['duration'] for p in recovery_periods]),
-        'recovery_success_rate': sum(p['successful'] for p in recovery_periods) / len(recovery_periods),
-        'avg_cost_per_recovery': np.mean([p['total_cost'] for p in recovery_periods]),
-        'stability_post_recovery': np.mean([p['stability_after'] for p in recovery_periods]),
-        'total_recovery_periods': len(recovery_periods),
-        'longest_recovery': max(p['duration'] for p in recovery_periods),
-        'total_recovery_cost': sum(p['total_cost'] for p in recovery_periods)
+        'average_recovery_time': durations.mean(),
+        'recovery_success_rate': int(np.count_nonzero(episodes['successful'])) / len(durations),
+        'avg_cost_per_recovery': costs.mean(),
+        'stability_post_recovery': episodes['stability_after'].mean(),
+        'total_recovery_periods': len(durations),
+        'longest_recovery': durations.max(),
+        'total_recovery_cost': costs.sum()
     }
 
+def analyze_recovery_metrics(results):
+    """Analyze recovery metrics from simulation results"""
+    df = results_frame(results)
+    return summarize_recovery_episodes(find_recovery_episodes(df), df['price_stability_index'].mean())
+
 def analyze_economic_metrics(results):
     """Analyze economic metrics from simulation results"""
-    df = pd.DataFrame(results)
+    df = results_frame(results)
     return {
         'total_validator_rewards': df['daily_validator_reward_usdc'].sum(),
         'total_holder_costs': df['daily_holder_cost_usdc'].sum(),
@@ -672,13 +731,13 @@ def price_stability_index(current_price, market_pressure, validator_participatio
     
     return min(1, stability)
 
-def validator_reward(base_reward_rate, daily_transactions, validator_count, psi):
+def validator_reward(base_reward_rate, daily_transactions, validator_count, psi, validator_share=0.9):
     """
     Calculate validator rewards based on transaction share and stability.
-    90% of network revenue goes to validators.
+    validator_share of network revenue (90% by default) goes to validators.
     """
     transaction_share = daily_transactions / max(1, validator_count)
-    market_reward = transaction_share * base_reward_rate * 0.9
+    market_reward = transaction_share * base_reward_rate * validator_share
     stability_bonus = market_reward * psi
     
     return market_reward + stability_bonus
@@ -806,17 +865,16 @@ def market_pressure(buys_volume, sells_volume, effective_liquidity, validator_co
     liquidity_factor = effective_liquidity / max(1, validator_count * 1000000)
     return volume_imbalance * (1 / max(0.1, liquidity_factor))
 
-def convergence_rate(current_price, target_price, market_pressure, stability_index):
+def convergence_rate(current_price, target_price, market_pressure, stability_index,
+                     alpha=0.1, beta=-0.05, gamma=0.05):
     """
     Calculate rate of price convergence to target
     From precept: dp/dt = α(p_target - p(t)) + β(pressure(t)) + γ(stability(t))
+    alpha is the price correction factor, beta the pressure impact factor
+    and gamma the stability impact factor
     """
-    α = 0.1  # Price correction factor
-    β = -0.05  # Pressure impact factor
-    γ = 0.05  # Stability impact factor
-    
     price_gap = target_price - current_price
-    return (α * price_gap) + (β * market_pressure) + (γ * stability_index)
+    return (alpha * price_gap) + (beta * market_pressure) + (gamma * stability_index)
 
 def equilibrium_state(
     price_stability_index,
@@ -844,6 +902,9 @@ def equilibrium_state(
     failing = [k for k, v in checks.items() if not v]
     return (len(failing) == 0, failing)
 
+# Default equilibrium_state thresholds, which constants can override by name
+EQUILIBRIUM_THRESHOLDS = equilibrium_state.__defaults__[0]
+
 
 def determine_epoch_duration(transaction_volume, network_throughput, market_volatility):
     # Example logic to determine epoch duration
@@ -890,10 +951,13 @@ def calculate_liquidity_restoration(current_metrics):
     restoration_rate = (1 / (1 + abs(pressure))) * 0.1  # Base 10% restoration rate
     return restoration_rate * (target_liquidity - current_liquidity)
 
-def calculate_dynamic_spread(liquidity_ratio, market_pressure, normalized_validators):
-    """Calculate dynamic spread based on market conditions"""
-    base_spread = 0.001  # 0.1% base spread
-    
+def calculate_dynamic_spread(liquidity_ratio, market_pressure, normalized_validators,
+                             base_spread=0.001, validator_base=0.5):
+    """
+    Calculate dynamic spread based on market conditions
+    base_spread is the 0.1% spread of a balanced market; validator_base
+    sets how strongly more validators tighten it
+    """
     # Increase spread when liquidity is low
     liquidity_factor = max(1, (0.8 / liquidity_ratio) ** 2)
     
@@ -901,6 +965,6 @@ def calculate_dynamic_spread(liquidity_ratio, market_pressure, normalized_valida
     pressure_factor = 1 + abs(market_pressure)
     
     # Decrease spread with more validators
-    validator_factor = 1 / (0.5 + normalized_validators)
+    validator_factor = 1 / (validator_base + normalized_validators)
     
     return base_spread * liquidity_factor * pressure_factor * validator_factor
\ No newline at end of file
@@ -0,0 +1,341 @@
+import copy
+import math
+import numpy as np
+import formulas
+from ensemble import STATE_KEYS, STATE_INDEX
+from events import EventSchedule, EVENT_KINDS, EVENT_TARGETS
+from results import ResultStore
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+JIT_AVAILABLE = njit is not None
+KERNEL_BLOCK = 8640  # Epochs per kernel call, one simulated day
+
+# Rows of the MarketMetrics window array and entries of its stats array
+PRICE, RETURNS, VOLUME, PRESSURE = range(4)
+RETURN_MEAN, RETURN_M2, VOLUME_SUM, RECENT_VOLUME_SUM, EWMA_SUM, EWMA_WEIGHT, PRESSURE_SUM, PRESSURE_INDEX_SUM = range(8)
+
+# Condition columns, in calculate_economics argument order
+(VALIDATORS, HOLDERS, DAILY_TX, PRICE_NOW, TX_SIZE, HOLDING_BALANCE, DAYS_HELD, LIQUIDITY,
+ CROSS_CHAIN, BUYS, SELLS) = range(len(STATE_KEYS))
+
+# Bit mask of the condition columns each event kind multiplies
+EVENT_MASKS = np.array([
+    sum(1 << STATE_INDEX[key] for key in EVENT_TARGETS[kind]) for kind in EVENT_KINDS
+], dtype=np.int64)
+
+EQUILIBRIUM_THRESHOLDS = formulas.equilibrium_state.__defaults__[0]
+
+def _popleft(windows, heads, counts, row):
+    value = windows[row, heads[row]]
+    heads[row] = (heads[row] + 1) % windows.shape[1]
+    counts[row] -= 1
+    return value
+
+def _push(windows, heads, counts, row, value):
+    windows[row, (heads[row] + counts[row]) % windows.shape[1]] = value
+    counts[row] += 1
+
+def _last(windows, heads, counts, row, back):
+    """Entry back places from the newest, 1 being the newest (deque[-back])"""
+    return windows[row, (heads[row] + counts[row] - back) % windows.shape[1]]
+
+def _update_metrics(windows, heads, counts, stats, price, volume, pressure, pressure_decay, evict_weight):
+    """MarketMetrics.update_metrics over the ring buffers"""
+    size = windows.shape[1]
+
+    # _update_price
+    if counts[PRICE]:
+        if counts[PRICE] == size:
+            _popleft(windows, heads, counts, PRICE)
+            if counts[RETURNS]:
+                value = _popleft(windows, heads, counts, RETURNS)
+                n = counts[RETURNS]
+                if n == 0:
+                    stats[RETURN_MEAN] = 0.0
+                    stats[RETURN_M2] = 0.0
+                else:
+                    delta = value - stats[RETURN_MEAN]
+                    stats[RETURN_MEAN] -= delta / n
+                    stats[RETURN_M2] = max(0.0, stats[RETURN_M2] - delta * (value - stats[RETURN_MEAN]))
+        if counts[PRICE]:
+            value = math.log(price / _last(windows, heads, counts, PRICE, 1))
+            _push(windows, heads, counts, RETURNS, value)
+            delta = value - stats[RETURN_MEAN]
+            stats[RETURN_MEAN] += delta / counts[RETURNS]
+            stats[RETURN_M2] += delta * (value - stats[RETURN_MEAN])
+    _push(windows, heads, counts, PRICE, price)
+
+    # _update_volume
+    if counts[VOLUME] == size:
+        evicted = _popleft(windows, heads, counts, VOLUME)
+        stats[VOLUME_SUM] -= evicted
+        if size <= 5:
+            stats[RECENT_VOLUME_SUM] -= evicted
+    if counts[VOLUME] >= 5:
+        stats[RECENT_VOLUME_SUM] -= _last(windows, heads, counts, VOLUME, 5)
+    _push(windows, heads, counts, VOLUME, volume)
+    stats[VOLUME_SUM] += volume
+    stats[RECENT_VOLUME_SUM] += volume
+
+    # _update_pressure
+    evicted = 0.0
+    weight = 0.0
+    if counts[PRESSURE] == size:
+        evicted = _popleft(windows, heads, counts, PRESSURE)
+        weight = evict_weight
+        stats[PRESSURE_SUM] -= evicted
+        stats[PRESSURE_INDEX_SUM] -= stats[PRESSURE_SUM]
+    stats[EWMA_SUM] = pressure_decay * stats[EWMA_SUM] + pressure - weight * evicted
+    stats[EWMA_WEIGHT] = pressure_decay * stats[EWMA_WEIGHT] + 1 - weight
+    stats[PRESSURE_INDEX_SUM] += counts[PRESSURE] * pressure
+    stats[PRESSURE_SUM] += pressure
+    _push(windows, heads, counts, PRESSURE, pressure)
+
+def _epoch_kernel(start, stop, c, windows, heads, counts, stats, pressure_decay, evict_weight, thresholds,
+                  event_epochs, event_masks, event_multipliers, event_cursor, out):
+    """
+    Run epochs [start, stop), updating c and the metrics state in place
+    out has one row per ResultStore column and one column per epoch;
+    returns the event cursor after the block
+    """
+    size = windows.shape[1]
+    n_events = len(event_epochs)
+    for i in range(stop - start):
+        epoch = start + i
+
+        # MarketMetrics.get_volatility and get_market_pressure
+        volatility = 0.0
+        if counts[RETURNS]:
+            volatility = math.sqrt(stats[RETURN_M2] / counts[RETURNS]) * math.sqrt(size)
+        pressure_signal = 0.0
+        if counts[PRESSURE]:
+            pressure_signal = stats[EWMA_SUM] / stats[EWMA_WEIGHT]
+
+        epoch_duration = _determine_epoch_duration(c[DAILY_TX], c[VALIDATORS] * 1000, volatility)
+
+        # calculate_economics
+        validators = c[VALIDATORS]
+        holders = c[HOLDERS]
+        liquidity = c[LIQUIDITY]
+        psi = _price_stability_index(c[PRICE_NOW], pressure_signal, validators / 5000, holders / 1000000)
+        market_press = _market_pressure(c[BUYS], c[SELLS], liquidity * (c[BUYS] + c[SELLS]), validators)
+        nus = _network_utility_score(c[DAILY_TX], c[CROSS_CHAIN], 500000)
+        lhi = _liquidity_health_index(
+            c[DAILY_TX] / 24, holders, liquidity, c[BUYS] * liquidity,
+            _stability_reserve_requirement(holders * c[HOLDING_BALANCE], 0)
+        )
+        settlement_rate = _calculate_settlement_rate(c[DAILY_TX], validators, liquidity, market_press)
+        v_reward = _validator_reward(0.1, c[DAILY_TX], validators, psi)
+        h_cost = _holder_cost(0.01, c[DAYS_HELD], c[HOLDING_BALANCE], psi)
+        vh_cost = _validator_holder_cost(h_cost, v_reward, nus)
+        tx_fee = _transaction_fee(0.001, psi, c[TX_SIZE], liquidity)
+        conv_rate = _convergence_rate(c[PRICE_NOW], 1.0, market_press, psi)
+        halt, emergency, rebase = _circuit_breaker_conditions(liquidity, c[PRICE_NOW], lhi)
+        failing = 0
+        if not psi >= thresholds[0]:
+            failing |= 1
+        if not lhi >= thresholds[1]:
+            failing |= 2
+        if not nus >= thresholds[2]:
+            failing |= 4
+        if not conv_rate <= thresholds[3]:
+            failing |= 8
+        dynamic_spread = _calculate_dynamic_spread(liquidity, pressure_signal, validators / 5000)
+
+        # MarketSimulation._update_conditions
+        if rebase:
+            c[PRICE_NOW] = max(0.95, min(1.05, (1 + c[PRICE_NOW]) / 2))
+        pressure_adjustment = market_press * 0.1
+        c[BUYS] *= (1 - pressure_adjustment)
+        c[SELLS] *= (1 + pressure_adjustment)
+        if psi < 0.8:
+            c[DAILY_TX] *= 0.95
+            c[HOLDERS] *= 0.99
+        else:
+            c[DAILY_TX] *= 1.01
+            c[HOLDERS] *= 1.005
+
+        # EventSchedule.apply
+        while event_cursor < n_events and event_epochs[event_cursor] <= epoch:
+            for key in range(len(c)):
+                if event_masks[event_cursor] >> key & 1:
+                    c[key] *= event_multipliers[event_cursor]
+            event_cursor += 1
+
+        transaction_volume = c[DAILY_TX] * c[TX_SIZE]
+        _update_metrics(windows, heads, counts, stats, c[PRICE_NOW], transaction_volume, market_press,
+                        pressure_decay, evict_weight)
+
+        # One row per ResultStore column, in its order
+        out[0, i] = epoch
+        out[1, i] = epoch_duration
+        out[2, i] = c[PRICE_NOW]
+        out[3, i] = liquidity
+        out[4, i] = validators
+        out[5, i] = c[HOLDERS]
+        out[6, i] = transaction_volume
+        out[7, i] = c[DAILY_TX]
+        out[8, i] = psi
+        out[9, i] = market_press
+        out[10, i] = nus
+        out[11, i] = lhi
+        out[12, i] = v_reward
+        out[13, i] = h_cost
+        out[14, i] = vh_cost
+        out[15, i] = tx_fee
+        out[16, i] = conv_rate
+        out[17, i] = dynamic_spread
+        out[18, i] = validators / 5000
+        out[19, i] = holders / 1000000
+        out[20, i] = holders
+        out[21, i] = settlement_rate
+        out[22, i] = halt | emergency << 1 | rebase << 2
+        out[23, i] = failing == 0
+        out[24, i] = failing
+    return event_cursor
+
+if JIT_AVAILABLE:
+    # The formulas compile unchanged, so the kernel cannot drift from them
+    _jit = njit(cache=True)
+    _determine_epoch_duration = _jit(formulas.determine_epoch_duration)
+    _price_stability_index = _jit(formulas.price_stability_index)
+    _market_pressure = _jit(formulas.market_pressure)
+    _network_utility_score = _jit(formulas.network_utility_score)
+    _liquidity_health_index = _jit(formulas.liquidity_health_index)
+    _stability_reserve_requirement = _jit(formulas.stability_reserve_requirement)
+    _calculate_settlement_rate = _jit(formulas.calculate_settlement_rate)
+    _validator_reward = _jit(formulas.validator_reward)
+    _holder_cost = _jit(formulas.holder_cost)
+    _validator_holder_cost = _jit(formulas.validator_holder_cost)
+    _transaction_fee = _jit(formulas.transaction_fee)
+    _convergence_rate = _jit(formulas.convergence_rate)
+    _circuit_breaker_conditions = _jit(formulas.circuit_breaker_conditions)
+    _calculate_dynamic_spread = _jit(formulas.calculate_dynamic_spread)
+    _popleft = _jit(_popleft)
+    _push = _jit(_push)
+    _last = _jit(_last)
+    _update_metrics = _jit(_update_metrics)
+    _epoch_kernel = _jit(_epoch_kernel)
+
+def unsupported(sim):
+    """Why the kernel cannot run sim, or None when it can"""
+    if not JIT_AVAILABLE:
+        return "numba is not installed"
+    if not hasattr(sim.results, 'extend'):
+        return f"{type(sim.results).__name__} results take one epoch at a time"
+    if set(sim.conditions) != set(STATE_KEYS):
+        return "conditions do not match calculate_economics"
+    if sim.events is not None and not isinstance(sim.events, EventSchedule):
+        return f"{type(sim.events).__name__} events are not a pre-sampled EventSchedule"
+    if sim.market_metrics.window_size < 1:
+        return "MarketMetrics has an empty window"
+    if getattr(sim, 'ledger', None) is not None:
+        return "the holder ledger steps with the interpreted loop"
+    if getattr(sim, 'constants', None):
+        return "the kernel runs the default formula constants"
+    return None
+
+def metrics_state(metrics):
+    """MarketMetrics rolling state as (windows, heads, counts, stats) arrays"""
+    windows = np.zeros((4, metrics.window_size))
+    counts = np.zeros(4, dtype=np.int64)
+    for row, window in enumerate((metrics.price_window, metrics.return_window,
+                                  metrics.volume_window, metrics.pressure_window)):
+        windows[row, :len(window)] = window
+        counts[row] = len(window)
+    stats = np.array([
+        metrics.return_mean, metrics.return_m2, metrics.volume_sum, metrics.recent_volume_sum,
+        metrics.pressure_ewma_sum, metrics.pressure_ewma_weight, metrics.pressure_sum,
+        metrics.pressure_index_sum
+    ], dtype=np.float64)
+    return windows, np.zeros(4, dtype=np.int64), counts, stats
+
+def restore_metrics(metrics, windows, heads, counts, stats):
+    """Write kernel state back into a MarketMetrics, oldest window entry first"""
+    size = windows.shape[1]
+    for row, window in enumerate((metrics.price_window, metrics.return_window,
+                                  metrics.volume_window, metrics.pressure_window)):
+        window.clear()
+        window.extend(windows[row, (heads[row] + np.arange(counts[row])) % size].tolist())
+    (metrics.return_mean, metrics.return_m2, metrics.volume_sum, metrics.recent_volume_sum,
+     metrics.pressure_ewma_sum, metrics.pressure_ewma_weight, metrics.pressure_sum,
+     metrics.pressure_index_sum) = stats.tolist()
+
+def run_kernel(sim, stop):
+    """
+    Advance sim from sim.epoch to stop with the compiled kernel
+    Each kernel call runs a block of epochs over a float64 condition array
+    and the MarketMetrics windows held as ring buffers, writing one row per
+    ResultStore column. The formulas.py functions are compiled as they are
+    and every operation keeps the interpreted order, so conditions,
+    MarketMetrics, the event cursor, results and rollups end up exactly as
+    if run_epoch had been called for each epoch
+    """
+    start = sim.epoch
+    if stop <= start:
+        return
+    conditions = np.array([sim.conditions[key] for key in STATE_KEYS], dtype=np.float64)
+    windows, heads, counts, stats = metrics_state(sim.market_metrics)
+    metrics = sim.market_metrics
+    thresholds = np.array([EQUILIBRIUM_THRESHOLDS[name] for name in ('psi_min', 'lhi_min', 'nus_min', 'conv_max')],
+                          dtype=np.float64)
+    events = sim.events
+    if events is None:
+        event_epochs, event_masks, event_multipliers, cursor = np.zeros(0, dtype=np.int64), \
+            np.zeros(0, dtype=np.int64), np.zeros(0), 0
+    else:
+        event_epochs = np.asarray(events.epochs, dtype=np.int64)
+        event_masks = EVENT_MASKS[np.asarray(events.kinds, dtype=np.int64)]
+        event_multipliers = np.asarray(events.multipliers, dtype=np.float64)
+        cursor = events.cursor
+
+    out = np.empty((len(ResultStore.COLUMNS), min(stop - start, KERNEL_BLOCK)))
+    for block_start in range(start, stop, KERNEL_BLOCK):
+        block_stop = min(stop, block_start + KERNEL_BLOCK)
+        block = out[:, :block_stop - block_start]
+        cursor = _epoch_kernel(block_start, block_stop, conditions, windows, heads, counts, stats,
+                               metrics.pressure_decay, metrics.pressure_evict_weight, thresholds,
+                               event_epochs, event_masks, event_multipliers, cursor, block)
+        columns = {name: row for name, row in zip(ResultStore.COLUMNS, block)}
+        sim.results.extend(columns)
+        if sim.rollups is not None:
+            sim.rollups.extend(columns)
+
+    # Conditions that never changed keep their original type, e.g. an int validator_count
+    for key, value in zip(STATE_KEYS, conditions.tolist()):
+        if value != sim.conditions[key]:
+            sim.conditions[key] = value
+    restore_metrics(metrics, windows, heads, counts, stats)
+    if events is not None:
+        events.seek(stop)
+    sim.epoch = stop
+
+def check_parity(initial_conditions, duration_days=1, events=None):
+    """
+    Compare a kernel run with an interpreted run of the same scenario
+    events is an optional EventModel, sampled once and shared by both runs.
+    Returns {column: (mismatching epochs, max relative difference)} for every
+    column that is not identical; an empty dict means bit-for-bit parity
+    """
+    # example imports this module, so it is only imported once needed
+    from example import run_simulation
+    schedule = events.sample(int(duration_days * 8640)) if events is not None else None
+    runs = [
+        run_simulation(dict(initial_conditions), duration_days, verbose=False, events=copy.deepcopy(schedule),
+                       rollups=None, backend=backend).results
+        for backend in ('python', 'jit')
+    ]
+    mismatches = {}
+    for name in ResultStore.COLUMNS:
+        expected = runs[0].column(name).astype(np.float64)
+        actual = runs[1].column(name).astype(np.float64)
+        differs = ~((expected == actual) | (np.isnan(expected) & np.isnan(actual)))
+        if differs.any():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                relative = np.abs(actual[differs] - expected[differs]) / np.abs(expected[differs])
+            mismatches[name] = (int(differs.sum()), float(np.nanmax(relative, initial=0)))
+    return mismatches
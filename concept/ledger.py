@@ -0,0 +1,151 @@
+import math
+import numpy as np
+import pandas as pd
+
+EPOCHS_PER_DAY = 8640
+HOLDING_RATE = 0.01  # holder_cost base rate used by calculate_economics
+LEDGER_QUANTILES = (0.1, 0.5, 0.9, 0.99)
+SAMPLE_HOLDERS = 65536  # Fixed random holders behind the periodic distribution reports
+MAX_TRANSFER_SHARE = 0.001  # Cap on the share of holders transferring in one epoch
+
+class HolderLedger:
+    def __init__(self, holders, avg_holding_balance, days_held, seed=None, report_every=360, balance_sigma=1.0,
+                 max_transfer_share=MAX_TRANSFER_SHARE):
+        """
+        Ledger of holders whose balances average avg_holding_balance
+        Each holder pays the whitepaper's D(t, L) demurrage on its own
+        balance and age, rate * age_days * log2(1 + principal / 1000) *
+        (1 - psi) a day, with principal the balance at its last transfer; a
+        transfer resets both parties' ages. The charge splits into a market
+        factor shared by all holders and a per-holder factor, so the ledger
+        keeps running sums of the former and settles a holder in closed form
+        only when it is touched: an epoch costs O(transferring holders).
+        Balances are log-normal with shape balance_sigma and ages uniform up
+        to twice days_held, so both means match the scenario. Every
+        report_every epochs a distribution report of a fixed holder sample
+        is kept for frame(). Transfers per epoch follow daily_transactions
+        but never exceed max_transfer_share of the holders, which the
+        model's compounding transaction growth would otherwise reach
+        """
+        self.rng = np.random.default_rng(seed)
+        self.holders = int(holders)
+        self.principal = self.rng.lognormal(math.log(avg_holding_balance) - balance_sigma ** 2 / 2,
+                                            balance_sigma, self.holders)
+        self.last_transfer = -self.rng.integers(0, int(2 * days_held * EPOCHS_PER_DAY) + 1, self.holders)
+        self.weight = np.log2(1 + self.principal / 1000)
+        self.initial_total = float(self.principal.sum())
+        self.report_every = report_every
+        self.max_transfers = max(1, int(self.holders * max_transfer_share))
+        self.sample = np.sort(self.rng.choice(self.holders, min(self.holders, SAMPLE_HOLDERS), replace=False))
+
+        # Running sums of the per-epoch market factor and of epoch * factor;
+        # entry j covers the epochs before j
+        self.factor_sums = np.zeros(EPOCHS_PER_DAY + 1)
+        self.weighted_sums = np.zeros(EPOCHS_PER_DAY + 1)
+        self.epoch = 0
+        self.psi = 1.0
+        self.transfers = 0
+        self.reports = []
+
+    def step(self, epoch, price_stability_index, conditions):
+        """Charge one epoch of demurrage, then make its random transfers"""
+        if epoch != self.epoch:
+            raise ValueError(f"ledger is at epoch {self.epoch}, got epoch {epoch}")
+        if epoch + 1 >= len(self.factor_sums):
+            # Grow geometrically, like ResultStore
+            self.factor_sums = np.concatenate((self.factor_sums, np.zeros(len(self.factor_sums))))
+            self.weighted_sums = np.concatenate((self.weighted_sums, np.zeros(len(self.weighted_sums))))
+        factor = HOLDING_RATE * (1 - price_stability_index) / EPOCHS_PER_DAY ** 2
+        self.factor_sums[epoch + 1] = self.factor_sums[epoch] + factor
+        self.weighted_sums[epoch + 1] = self.weighted_sums[epoch] + factor * epoch
+        self.epoch = epoch + 1
+        self.psi = price_stability_index
+
+        self._transfer(epoch, conditions['daily_transactions'], conditions['avg_transaction_size'])
+        if self.epoch % self.report_every == 0:
+            self.reports.append(self.report())
+
+    def _transfer(self, epoch, daily_transactions, avg_transaction_size):
+        """Move exponentially sized amounts between random holders, settling and resetting both sides"""
+        count = self.rng.poisson(min(daily_transactions / EPOCHS_PER_DAY, self.max_transfers))
+        if not count:
+            return
+        # A holder sends at most once per epoch, so no sender overdraws
+        senders = np.unique(self.rng.integers(0, self.holders, count))
+        receivers = self.rng.integers(0, self.holders, len(senders))
+        involved, inverse = np.unique(np.concatenate((senders, receivers)), return_inverse=True)
+        balances = self.balances(involved)
+        amounts = np.minimum(self.rng.exponential(avg_transaction_size, len(senders)),
+                             balances[inverse[:len(senders)]])
+        delta = np.zeros(len(involved))
+        np.subtract.at(delta, inverse[:len(senders)], amounts)
+        np.add.at(delta, inverse[len(senders):], amounts)
+
+        principal = balances + delta
+        self.principal[involved] = principal
+        self.weight[involved] = np.log2(1 + principal / 1000)
+        self.last_transfer[involved] = epoch
+        self.transfers += len(senders)
+
+    def balances(self, index=slice(None)):
+        """Balances net of the demurrage accrued through the last stepped epoch"""
+        last = self.last_transfer[index]
+        # Charges start the epoch after a transfer, or at the start of the run
+        start = np.maximum(last + 1, 0)
+        accrued = self.weight[index] * (
+            (self.weighted_sums[self.epoch] - self.weighted_sums[start])
+            - last * (self.factor_sums[self.epoch] - self.factor_sums[start])
+        )
+        return np.maximum(0.0, self.principal[index] - accrued)
+
+    def ages(self, index=slice(None)):
+        """Days since each holder's last transfer"""
+        return (self.epoch - self.last_transfer[index]) / EPOCHS_PER_DAY
+
+    def daily_costs(self, index=slice(None)):
+        """Each holder's current holder_cost in USDC per day, at the last epoch's stability index"""
+        # An emptied balance has nothing left to decay
+        return HOLDING_RATE * self.ages(index) * self.weight[index] * (1 - self.psi) * (self.balances(index) > 0)
+
+    def report(self):
+        """Distribution of daily cost, balance and age over the holder sample at the current epoch"""
+        costs = self.daily_costs(self.sample)
+        row = {'epoch': self.epoch, 'transfers': self.transfers, 'daily_cost_mean': float(costs.mean())}
+        for q, value in zip(LEDGER_QUANTILES, np.quantile(costs, LEDGER_QUANTILES)):
+            row[f'daily_cost_p{q * 100:g}'] = float(value)
+        row['daily_cost_max'] = float(costs.max())
+        row['balance_p50'] = float(np.median(self.balances(self.sample)))
+        row['age_days_p50'] = float(np.median(self.ages(self.sample)))
+        return row
+
+    def frame(self):
+        """One row per distribution report"""
+        return pd.DataFrame(self.reports)
+
+    def summary(self):
+        """
+        Exact distributions over every holder at the current epoch
+        Returns {'holders', 'epochs', 'transfers', 'collected_usdc',
+        'daily_cost', 'balance', 'age_days'}, the last three as {'mean',
+        'p10', ..., 'max'}; collected_usdc is all demurrage charged so far
+        """
+        balances = self.balances()
+        summary = {
+            'holders': self.holders,
+            'epochs': self.epoch,
+            'transfers': self.transfers,
+            'collected_usdc': self.initial_total - float(balances.sum())
+        }
+        for name, values in (('daily_cost', self.daily_costs()), ('balance', balances), ('age_days', self.ages())):
+            stats = {'mean': float(values.mean())}
+            for q, value in zip(LEDGER_QUANTILES, np.quantile(values, LEDGER_QUANTILES)):
+                stats[f'p{q * 100:g}'] = float(value)
+            stats['max'] = float(values.max())
+            summary[name] = stats
+        return summary
+
+def ledger_summary_frame(summary):
+    """One row per distribution of a HolderLedger.summary, one column per statistic"""
+    return pd.DataFrame([
+        {'distribution': name, **summary[name]} for name in ('daily_cost', 'balance', 'age_days')
+    ])
@@ -0,0 +1,80 @@
+import hashlib
+import inspect
+import json
+import os
+import numpy as np
+from results import results_frame
+
+MANIFEST_PATH = 'reports/manifest.json'
+
+def _jsonable(value):
+    """Convert NumPy scalars and arrays nested in dicts and lists to plain JSON types"""
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def load_manifest(path=MANIFEST_PATH):
+    """Return the report manifest, {scenario_name: entry}, or {} when there is none"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Write the manifest under a temporary name and move it into place"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(_jsonable(manifest), f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def code_fingerprint(*objects):
+    """Hash of the source code of modules, classes or functions"""
+    digest = hashlib.blake2b(digest_size=16)
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+def config_key(initial_conditions, duration_days, events=None, code=''):
+    """
+    Key of everything a simulation run depends on
+    events is the pre-sampled EventSchedule, if any; code is a
+    code_fingerprint of the simulation logic
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(_jsonable(initial_conditions), sort_keys=True).encode())
+    digest.update(repr(float(duration_days)).encode())
+    digest.update(code.encode())
+    if events is not None:
+        for array in (events.epochs, events.kinds, events.multipliers):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+def results_key(results, scenario_name, code=''):
+    """
+    Key of a scenario's result columns
+    code is a code_fingerprint of the analysis and plotting logic. A stored
+    dataset is hashed a chunk at a time, to the same key as its columns
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(scenario_name.encode())
+    digest.update(code.encode())
+    if hasattr(results, 'column_chunks'):
+        columns = ((name, results.column_chunks(name)) for name in results.table.column_names)
+    else:
+        df = results_frame(results)
+        columns = ((name, [df[name].to_numpy()]) for name in df.columns)
+    for name, chunks in columns:
+        digest.update(name.encode())
+        for column in chunks:
+            if column.dtype == object:
+                # Legacy per-epoch dicts
+                digest.update(repr(column.tolist()).encode())
+            else:
+                digest.update(np.ascontiguousarray(column).tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,137 @@
+import cProfile
+import os
+import pstats
+from contextlib import contextmanager
+from time import perf_counter
+
+FOLDED_FILE = 'profile.folded'
+CPROFILE_FILE = 'profile.prof'
+
+class StageProfiler:
+    """
+    Opt-in per-stage timers for a simulation run
+    instrument() swaps timing wrappers in for the functions and methods
+    named by its targets and restores the originals on exit, so nothing is
+    timed and nothing costs anything outside of it. Nested stages record
+    flamegraph-compatible folded stacks of self time; with cprofile_path
+    set, the same blocks also run under cProfile and the stats accumulate
+    in that file
+    """
+
+    def __init__(self, cprofile_path=None):
+        self.timers = {}  # stage -> [seconds, calls]
+        self.folded = {}  # 'outer;inner' stack -> self seconds
+        self.cprofile_path = cprofile_path
+        self.cprofile_written = False
+        self._stack = []  # [stage, seconds spent in child stages]
+
+    def _record(self, name, elapsed, frame):
+        """Account one finished call of a stage"""
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0.0, 0]
+        timer[0] += elapsed
+        timer[1] += 1
+        path = ';'.join([outer for outer, _ in self._stack] + [name])
+        self.folded[path] = self.folded.get(path, 0.0) + elapsed - frame[1]
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+    def wrap(self, name, fn):
+        """fn timed as stage name"""
+        def timed(*args, **kwargs):
+            frame = [name, 0.0]
+            self._stack.append(frame)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                self._stack.pop()
+                self._record(name, elapsed, frame)
+        timed.__wrapped__ = fn
+        return timed
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code as stage name"""
+        frame = [name, 0.0]
+        self._stack.append(frame)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            self._stack.pop()
+            self._record(name, elapsed, frame)
+
+    @contextmanager
+    def instrument(self, targets):
+        """
+        Time each (owner, attribute, stage) target while the block runs
+        owner is a module or class; its attribute is replaced by a timing
+        wrapper and put back afterwards
+        """
+        originals = []
+        for owner, attribute, name in targets:
+            # An inherited method is wrapped on the subclass and deleted again after
+            originals.append((owner, attribute, vars(owner).get(attribute)))
+            setattr(owner, attribute, self.wrap(name, getattr(owner, attribute)))
+        profile = cProfile.Profile() if self.cprofile_path else None
+        try:
+            if profile is not None:
+                profile.enable()
+            yield self
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._dump_cprofile(profile)
+            for owner, attribute, original in reversed(originals):
+                if original is None:
+                    delattr(owner, attribute)
+                else:
+                    setattr(owner, attribute, original)
+
+    def _dump_cprofile(self, profile):
+        """Write cProfile stats, adding to the ones this profiler already wrote"""
+        os.makedirs(os.path.dirname(self.cprofile_path) or '.', exist_ok=True)
+        stats = pstats.Stats(profile)
+        if self.cprofile_written and os.path.exists(self.cprofile_path):
+            stats.add(self.cprofile_path)
+        stats.dump_stats(self.cprofile_path)
+        self.cprofile_written = True
+
+    def table(self):
+        """
+        Rows of {stage, calls, seconds, per_call, share}, slowest first
+        share is the fraction of the total time of the outermost stages
+        """
+        # Every stack's self time belongs to exactly one outermost stage
+        total = sum(self.folded.values())
+        return [
+            {
+                'stage': name,
+                'calls': calls,
+                'seconds': seconds,
+                'per_call': seconds / calls,
+                'share': seconds / total if total else 0
+            }
+            for name, (seconds, calls) in sorted(self.timers.items(), key=lambda item: -item[1][0])
+        ]
+
+    def write_folded(self, path):
+        """Write the folded stacks, in integer microseconds, for flamegraph.pl or speedscope"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            for stack, seconds in sorted(self.folded.items()):
+                f.write(f"{stack} {max(0, round(seconds * 1e6))}\n")
+        os.replace(path + '.tmp', path)
+        return path
+
+def format_timings(rows):
+    """Console table of StageProfiler.table() rows"""
+    lines = [f"{'Stage':<48}{'Calls':>10}{'Total (s)':>12}{'Per call (us)':>15}{'Share':>8}"]
+    for row in rows:
+        lines.append(f"{row['stage']:<48}{row['calls']:>10,}{row['seconds']:>12.3f}"
+                     f"{row['per_call'] * 1e6:>15.2f}{row['share']:>8.1%}")
+    return '\n'.join(lines)
@@ -3,35 +3,41 @@ import seaborn as sns
 import pandas as pd
 import numpy as np
 import os
+import shutil
+import tempfile
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from results import results_frame, circuit_breaker_mask
+from decimate import MAX_PLOT_POINTS, decimate_indices, marker_indices, plot_series
+from vector_formulas import CIRCUIT_BREAKERS
+from manifest import load_manifest, save_manifest
+from rollups import RollupPyramid, TIME_SCALES
 
-def plot_temporal_analysis(df, report_dir, scenario_name):
-    """Plot metrics across different time scales as defined in precept"""
-    # Time scales from precept: minute (6 epochs), hour (360), day (8640), week (60480)
-    time_scales = {
-        'minute': 6,
-        'hour': 360,
-        'day': 8640,
-        'week': 60480
-    }
+def plot_temporal_analysis(df, report_dir, scenario_name, max_points=MAX_PLOT_POINTS, rollups=None):
+    """
+    Plot metrics across different time scales as defined in precept
+    Reads the run's RollupPyramid; without one it is built from df
+    """
+    if rollups is None:
+        rollups = RollupPyramid.from_frame(df)
     
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     axes = axes.flatten()
     
-    for idx, (scale, epochs) in enumerate(time_scales.items()):
-        # Resample data for each time scale
-        df_resampled = df.groupby(df.index // epochs).agg({
-            'current_price': ['mean', 'std'],
-            'liquidity_ratio': ['mean', 'min'],
-            'network_utility_score': 'mean',
-            'transaction_fee_usdc': 'sum'
-        })
+    for idx, scale in enumerate(TIME_SCALES):
+        # Fine scales still yield thousands of buckets; decimate the mean and
+        # keep the band on the same points
+        mean = rollups.query(scale, 'current_price', 'mean')
+        std = rollups.query(scale, 'current_price', 'std')
+        index = np.arange(len(mean))
+        kept = decimate_indices(index, mean, max_points)
         
         ax = axes[idx]
-        ax.plot(df_resampled.index, df_resampled[('current_price', 'mean')], label='Avg Price')
-        ax.fill_between(df_resampled.index, 
-                       df_resampled[('current_price', 'mean')] - df_resampled[('current_price', 'std')],
-                       df_resampled[('current_price', 'mean')] + df_resampled[('current_price', 'std')],
+        ax.plot(index[kept], mean[kept], label='Avg Price')
+        ax.fill_between(index[kept], 
+                       mean[kept] - std[kept],
+                       mean[kept] + std[kept],
                        alpha=0.2)
         ax.set_title(f'{scale.capitalize()} Scale Analysis')
         ax.legend()
@@ -40,20 +46,20 @@ def plot_temporal_analysis(df, report_dir, scenario_name):
     plt.savefig(f"{report_dir}/temporal_analysis.png")
     plt.close()
 
-def plot_participant_dynamics(df, report_dir, scenario_name):
+def plot_participant_dynamics(df, report_dir, scenario_name, max_points=MAX_PLOT_POINTS):
     """Plot participant dynamics as defined in precept section 3.1"""
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     
     # Participant Evolution (dV/dt, dH/dt, dT/dt)
-    ax1.plot(df['epoch'], df['validator_count'], label='Validators (V(t))')
-    ax1.plot(df['epoch'], df['holder_count'], label='Holders (H(t))')
-    ax1.plot(df['epoch'], df['transaction_volume'], label='Transactions (T(t))')
+    plot_series(ax1, df['epoch'], df['validator_count'], max_points, label='Validators (V(t))')
+    plot_series(ax1, df['epoch'], df['holder_count'], max_points, label='Holders (H(t))')
+    plot_series(ax1, df['epoch'], df['transaction_volume'], max_points, label='Transactions (T(t))')
     ax1.set_title('Participant Evolution')
     ax1.legend()
     
     # Network Balance Ratio (0.8 ≤ V(t)/T(t) ≤ 1.2)
     v_t_ratio = df['validator_count'] / df['transaction_volume']
-    ax2.plot(df['epoch'], v_t_ratio, label='V(t)/T(t) Ratio')
+    plot_series(ax2, df['epoch'], v_t_ratio, max_points, label='V(t)/T(t) Ratio')
     ax2.axhline(y=0.8, color='r', linestyle='--', alpha=0.3, label='Min Threshold')
     ax2.axhline(y=1.2, color='r', linestyle='--', alpha=0.3, label='Max Threshold')
     ax2.set_title('Network Balance Ratio')
@@ -63,19 +69,19 @@ def plot_participant_dynamics(df, report_dir, scenario_name):
     plt.savefig(f"{report_dir}/participant_dynamics.png")
     plt.close()
 
-def plot_circuit_breaker_analysis(df, report_dir, scenario_name):
+def plot_circuit_breaker_analysis(df, report_dir, scenario_name, max_points=MAX_PLOT_POINTS):
     """Plot circuit breaker conditions and activations"""
     fig, ax = plt.subplots(figsize=(12, 6))
     
     # Circuit breaker conditions from precept section 5.2
-    ax.plot(df['epoch'], df['liquidity_ratio'], label='Liquidity Ratio')
+    plot_series(ax, df['epoch'], df['liquidity_ratio'], max_points, label='Liquidity Ratio')
     ax.axhline(y=0.1, color='r', linestyle='--', alpha=0.3, label='Halt Threshold')
     ax.axhline(y=0.2, color='y', linestyle='--', alpha=0.3, label='Emergency Threshold')
     
-    # Mark circuit breaker activations
-    halt_points = df[df['circuit_breakers'].apply(lambda x: x['halt_trading'])]
-    emergency_points = df[df['circuit_breakers'].apply(lambda x: x['emergency_spreads'])]
-    rebase_points = df[df['circuit_breakers'].apply(lambda x: x['needs_rebase'])]
+    # Mark circuit breaker activations, at most one marker per budget bin
+    halt_points = df.iloc[marker_indices(circuit_breaker_mask(df, 'halt_trading'), max_points)]
+    emergency_points = df.iloc[marker_indices(circuit_breaker_mask(df, 'emergency_spreads'), max_points)]
+    rebase_points = df.iloc[marker_indices(circuit_breaker_mask(df, 'needs_rebase'), max_points)]
     
     ax.scatter(halt_points['epoch'], halt_points['liquidity_ratio'], 
               color='red', marker='x', s=100, label='Trading Halt')
@@ -90,6 +96,127 @@ def plot_circuit_breaker_analysis(df, report_dir, scenario_name):
     plt.savefig(f"{report_dir}/circuit_breakers.png")
     plt.close()
 
+def plot_ensemble_bands(bands, report_dir, scenario_name):
+    """Plot Monte Carlo percentile bands and circuit breaker activation rates"""
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    axes = axes.flatten()
+    percentiles = bands['percentiles']
+    median = percentiles.index(50)
+    
+    titles = {
+        'current_price': 'Price Percentile Bands',
+        'liquidity_ratio': 'Liquidity Ratio Percentile Bands',
+        'liquidity_health_index': 'Liquidity Health Percentile Bands'
+    }
+    for ax, (metric, title) in zip(axes, titles.items()):
+        band = bands['bands'][metric]
+        # Shade nested bands from the outermost percentiles inwards
+        for lower in range(median):
+            upper = len(percentiles) - 1 - lower
+            ax.fill_between(bands['epoch'], band[:, lower], band[:, upper], alpha=0.2,
+                            label=f'p{percentiles[lower]}-p{percentiles[upper]}')
+        ax.plot(bands['epoch'], band[:, median], label='Median')
+        ax.set_title(title)
+        ax.legend()
+    
+    ax = axes[3]
+    for name, active in bands['circuit_breaker_active'].items():
+        ax.plot(bands['epoch'], active, label=name)
+    ax.set_title('Share of Paths with Circuit Breaker Active')
+    ax.legend()
+    
+    plt.tight_layout()
+    plt.savefig(f"{report_dir}/ensemble_bands.png")
+    plt.close()
+
+# Title and colour map of each sweep heatmap
+SWEEP_PLOTS = {
+    'equilibrium_percentage': ('Time in Equilibrium (%)', 'viridis'),
+    'targets_passed': ('Performance Targets Passed', 'RdYlGn'),
+    'halt_trading': ('Trading Halt Epochs', 'Reds'),
+    'emergency_spreads': ('Emergency Spread Epochs', 'Reds'),
+    'needs_rebase': ('Rebase Epochs', 'Reds')
+}
+
+def plot_sweep_heatmaps(sweep, report_dir, scenario_name):
+    """
+    Plot one heatmap per sweep outcome over the first two swept axes
+    A third axis gets one panel per value; any further axes are averaged over
+    """
+    keys = list(sweep['axes']) + [None] * 3
+    outcomes = {
+        'equilibrium_percentage': sweep['equilibrium_percentage'],
+        'targets_passed': sweep['targets_passed'],
+        **sweep['circuit_breakers']
+    }
+    labels = [[f"{value:.3g}" for value in values] for values in sweep['axes'].values()] + [['']] * 3
+    for metric, grid in outcomes.items():
+        title, cmap = SWEEP_PLOTS[metric]
+        grid = np.asarray(grid, dtype=np.float64)
+        if grid.ndim > 3:
+            grid = grid.reshape(grid.shape[:3] + (-1,)).mean(axis=3)
+        grid = grid.reshape(grid.shape + (1,) * (3 - grid.ndim))
+        
+        panels = grid.shape[2]
+        fig, axes = plt.subplots(1, panels, figsize=(7 * panels + 1, 6), squeeze=False)
+        for panel, ax in enumerate(axes[0]):
+            frame = pd.DataFrame(grid[:, :, panel], index=labels[0], columns=labels[1])
+            sns.heatmap(frame, ax=ax, cmap=cmap, vmin=0 if metric == 'targets_passed' else None,
+                        vmax=len(sweep['success_criteria']) if metric == 'targets_passed' else None)
+            ax.set_ylabel(keys[0] or '')
+            ax.set_xlabel(keys[1] or '')
+            ax.set_title(title if keys[2] is None else f"{title}, {keys[2]} = {labels[2][panel]}")
+        if len(sweep['axes']) > 3:
+            fig.suptitle(f"{scenario_name} (averaged over {', '.join(list(sweep['axes'])[3:])})")
+        else:
+            fig.suptitle(scenario_name)
+        
+        plt.tight_layout()
+        plt.savefig(f"{report_dir}/sweep_{metric}.png")
+        plt.close()
+
+def plot_sensitivity_indices(df, report_dir):
+    """Plot first- and total-order Sobol indices, one panel per output"""
+    outputs = list(dict.fromkeys(df['output']))
+    fig, axes = plt.subplots(1, len(outputs), figsize=(6 * len(outputs), 7), squeeze=False)
+    for ax, output in zip(axes[0], outputs):
+        rows = df[df['output'] == output].sort_values('total_order')
+        positions = np.arange(len(rows))
+        ax.barh(positions + 0.2, rows['total_order'], height=0.4, label='Total order')
+        ax.barh(positions - 0.2, rows['first_order'], height=0.4, label='First order')
+        ax.set_yticks(positions, rows['input'])
+        ax.set_title(output)
+        ax.legend()
+    
+    plt.tight_layout()
+    plt.savefig(f"{report_dir}/sensitivity_indices.png")
+    plt.close()
+
+def plot_ledger_costs(df, costs, report_dir, scenario_name):
+    """Plot holder cost percentiles over time and the final per-holder cost distribution"""
+    fig, axes = plt.subplots(1, 2, figsize=(15, 6))
+    
+    ax = axes[0]
+    days = df['epoch'] / 8640 if len(df) else []
+    for column in [name for name in df.columns if name.startswith('daily_cost_p')]:
+        ax.plot(days, df[column], label=column.replace('daily_cost_', ''))
+    if len(df):
+        ax.plot(days, df['daily_cost_mean'], linestyle='--', label='Mean')
+    ax.set_title('Holder Daily Cost Percentiles')
+    ax.set_xlabel('Day')
+    ax.set_ylabel('USDC per day')
+    ax.legend()
+    
+    ax = axes[1]
+    ax.hist(costs, bins=100, log=True)
+    ax.set_title('Final Daily Cost per Holder')
+    ax.set_xlabel('USDC per day')
+    ax.set_ylabel('Holders')
+    
+    plt.tight_layout()
+    plt.savefig(f"{report_dir}/ledger_costs.png")
+    plt.close()
+
 def create_scenario_summary(df, scenario_name):
     """Create comprehensive summary statistics for a scenario"""
     summary = {
@@ -124,9 +251,9 @@ def create_scenario_summary(df, scenario_name):
                               df['daily_holder_cost_usdc']).sum(),
         
         # Circuit Breaker Events
-        'trading_halts': df['circuit_breakers'].apply(lambda x: x['halt_trading']).sum(),
-        'emergency_measures': df['circuit_breakers'].apply(lambda x: x['emergency_spreads']).sum(),
-        'rebase_events': df['circuit_breakers'].apply(lambda x: x['needs_rebase']).sum(),
+        'trading_halts': circuit_breaker_mask(df, 'halt_trading').sum(),
+        'emergency_measures': circuit_breaker_mask(df, 'emergency_spreads').sum(),
+        'rebase_events': circuit_breaker_mask(df, 'needs_rebase').sum(),
         
         # Equilibrium Analysis
         'equilibrium_percentage': (df['is_equilibrium'].sum() / len(df)) * 100,
@@ -144,28 +271,28 @@ def create_scenario_summary(df, scenario_name):
     
     return summary
 
-def plot_recovery_metrics(df, report_dir, scenario_name):
+def plot_recovery_metrics(df, report_dir, scenario_name, max_points=MAX_PLOT_POINTS):
     """Plot recovery-specific metrics and analysis"""
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
     
     # 1. Price Recovery Trajectory
-    ax1.plot(df['epoch'], df['current_price'], label='Price')
+    plot_series(ax1, df['epoch'], df['current_price'], max_points, label='Price')
     ax1.axhline(y=1.0, color='r', linestyle='--', alpha=0.3, label='Target')
-    ax1.fill_between(df['epoch'], 0.98, 1.02, color='g', alpha=0.1, label='Target Zone')
+    ax1.fill_between(df['epoch'].iloc[[0, -1]], 0.98, 1.02, color='g', alpha=0.1, label='Target Zone')
     ax1.set_title('Price Recovery Trajectory')
     ax1.legend()
     
     # 2. Liquidity Restoration
-    ax2.plot(df['epoch'], df['liquidity_ratio'], label='Liquidity')
+    plot_series(ax2, df['epoch'], df['liquidity_ratio'], max_points, label='Liquidity')
     ax2.axhline(y=0.8, color='g', linestyle='--', alpha=0.3, label='Target')
     ax2.set_title('Liquidity Restoration')
     ax2.legend()
     
     # 3. Participant Recovery
-    ax3.plot(df['epoch'], df['validator_count'] / df['validator_count'].iloc[0], 
-             label='Validator Retention')
-    ax3.plot(df['epoch'], df['holder_count'] / df['holder_count'].iloc[0], 
-             label='Holder Retention')
+    plot_series(ax3, df['epoch'], df['validator_count'] / df['validator_count'].iloc[0], max_points,
+                label='Validator Retention')
+    plot_series(ax3, df['epoch'], df['holder_count'] / df['holder_count'].iloc[0], max_points,
+                label='Holder Retention')
     ax3.axhline(y=0.9, color='r', linestyle='--', alpha=0.3, label='Min Target')
     ax3.set_title('Participant Retention')
     ax3.legend()
@@ -173,10 +300,10 @@ def plot_recovery_metrics(df, report_dir, scenario_name):
     # 4. Recovery Costs
     cumulative_costs = df['daily_holder_cost_usdc'].cumsum()
     cumulative_rewards = df['daily_validator_reward_usdc'].cumsum()
-    ax4.plot(df['epoch'], cumulative_costs, label='Cumulative Holder Costs')
-    ax4.plot(df['epoch'], cumulative_rewards, label='Cumulative Validator Rewards')
-    ax4.plot(df['epoch'], cumulative_rewards - cumulative_costs, 
-             label='Net Economic Impact', linestyle='--')
+    plot_series(ax4, df['epoch'], cumulative_costs, max_points, label='Cumulative Holder Costs')
+    plot_series(ax4, df['epoch'], cumulative_rewards, max_points, label='Cumulative Validator Rewards')
+    plot_series(ax4, df['epoch'], cumulative_rewards - cumulative_costs, max_points,
+                label='Net Economic Impact', linestyle='--')
     ax4.set_title('Recovery Economics')
     ax4.legend()
     
@@ -188,14 +315,14 @@ def plot_recovery_metrics(df, report_dir, scenario_name):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     
     # Recovery Speed Metrics
-    ax1.plot(df['epoch'], df['recovery_time'], label='Est. Time to Recovery')
-    ax1.plot(df['epoch'], df['convergence_rate'], label='Convergence Rate')
+    plot_series(ax1, df['epoch'], df['recovery_time'], max_points, label='Est. Time to Recovery')
+    plot_series(ax1, df['epoch'], df['convergence_rate'], max_points, label='Convergence Rate')
     ax1.set_title('Recovery Speed Metrics')
     ax1.legend()
     
     # System Health During Recovery
-    ax2.plot(df['epoch'], df['network_utility_score'], label='Network Utility')
-    ax2.plot(df['epoch'], df['price_stability_index'], label='Price Stability')
+    plot_series(ax2, df['epoch'], df['network_utility_score'], max_points, label='Network Utility')
+    plot_series(ax2, df['epoch'], df['price_stability_index'], max_points, label='Price Stability')
     ax2.set_title('System Health During Recovery')
     ax2.legend()
     
@@ -203,37 +330,103 @@ def plot_recovery_metrics(df, report_dir, scenario_name):
     plt.savefig(f"{report_dir}/{scenario_name}_recovery_metrics.png")
     plt.close()
     
-def create_analysis_report(scenarios_results, analysis, report_dir, scenario_name):
-    """Generate comprehensive analysis report with time series visualizations"""
+def _init_render_worker():
+    """Render with the headless Agg backend in pool workers"""
+    plt.switch_backend('Agg')
+
+def _render_figure(plot, df, report_dir, scenario_name, max_points, options=None):
+    """
+    Render one figure into a private scratch directory, then move its PNGs
+    into report_dir so a reader never sees a partially written image;
+    options are extra keyword arguments for the plot
+    """
+    scratch = tempfile.mkdtemp(prefix='.render-', dir=report_dir)
+    try:
+        plot(df, scratch, scenario_name, max_points, **(options or {}))
+        for name in os.listdir(scratch):
+            os.replace(os.path.join(scratch, name), os.path.join(report_dir, name))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def _write_atomic(path, text):
+    """Write a text file under a temporary name and move it into place"""
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+def create_analysis_report(scenarios_results, analysis, report_dir, scenario_name, summary=None,
+                           max_points=MAX_PLOT_POINTS, workers=None, manifest_entry=None, rollups=None,
+                           profiler=None):
+    """
+    Generate comprehensive analysis report with time series visualizations
+    Pass the summary from analysis.analyze_results to skip recomputing it;
+    max_points is the per-series point budget the plots are decimated to.
+    Figures render in a pool of up to workers processes (default one per
+    core, 1 renders in-process); the HTML pages are written once they all
+    finish. manifest_entry holds extra fields for the scenario's manifest
+    entry; rollups is the run's RollupPyramid for the temporal analysis.
+    With a StageProfiler, figure rendering is timed as the plotting stage
+    and the profiler's timing table is added to the scenario page
+    """
     
     # Create report directory and ensure parent reports directory exists
     os.makedirs(report_dir, exist_ok=True)
     os.makedirs("reports", exist_ok=True)
     
     # Convert results to DataFrame
-    df_scenario = pd.DataFrame(scenarios_results)
+    df_scenario = results_frame(scenarios_results)
     
     # Generate plots
-    plot_stability_metrics(df_scenario, report_dir, scenario_name)
-    plot_economic_metrics(df_scenario, report_dir, scenario_name)
-    plot_network_metrics(df_scenario, report_dir, scenario_name)
-    plot_temporal_analysis(df_scenario, report_dir, scenario_name)
-    plot_participant_dynamics(df_scenario, report_dir, scenario_name)
-    plot_circuit_breaker_analysis(df_scenario, report_dir, scenario_name)
+    options = {plot_temporal_analysis: {'rollups': rollups}}
+    workers = min(workers or os.cpu_count() or 1, len(REPORT_FIGURES))
+    with profiler.stage('plotting') if profiler is not None else nullcontext():
+        if workers == 1:
+            for plot in REPORT_FIGURES:
+                _render_figure(plot, df_scenario, report_dir, scenario_name, max_points, options.get(plot))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker) as pool:
+                futures = [
+                    pool.submit(_render_figure, plot, df_scenario, report_dir, scenario_name, max_points,
+                                options.get(plot))
+                    for plot in REPORT_FIGURES
+                ]
+                for future in futures:
+                    future.result()
     
     # Create summary statistics
-    summary = create_scenario_summary(df_scenario, scenario_name)
+    if summary is None:
+        summary = create_scenario_summary(df_scenario, scenario_name)
     
     # Create scenario-specific HTML page
-    create_scenario_page(summary, report_dir)
+    create_scenario_page(summary, report_dir, profiler.table() if profiler is not None else None)
     
-    # Update main index with new scenario
-    update_main_index(summary)
+    # Record the scenario in the manifest and rebuild the main index
+    update_main_index(summary, **(manifest_entry or {}))
     
     return summary
 
-def create_scenario_page(summary, report_dir):
-    """Create individual scenario HTML page"""
+def create_scenario_page(summary, report_dir, timings=None):
+    """
+    Create individual scenario HTML page
+    timings are StageProfiler.table() rows for an optional timing section
+    """
+    timing_section = ''
+    if timings:
+        rows = '\n'.join(
+            f"<tr><td>{row['stage']}</td><td>{row['calls']:,}</td><td>{row['seconds']:.3f}</td>"
+            f"<td>{row['per_call'] * 1e6:.2f}</td><td>{row['share']:.1%}</td></tr>"
+            for row in timings
+        )
+        timing_section = f"""
+            <div class="section">
+                <h3>Stage Timings</h3>
+                <table>
+                    <tr><th>Stage</th><th>Calls</th><th>Total (s)</th><th>Per call (us)</th><th>Share</th></tr>
+                    {rows}
+                </table>
+            </div>
+            """
+    
     scenario_html = f"""
     <!DOCTYPE html>
     <html>
@@ -274,51 +467,57 @@ def create_scenario_page(summary, report_dir):
                 <h3>Network Metrics</h3>
                 <img src="network_health.png" alt="Network Metrics">
             </div>
+            {timing_section}
         </div>
     </body>
     </html>
     """
     
-    with open(f"{report_dir}/index.html", 'w') as f:
-        f.write(scenario_html)
+    _write_atomic(f"{report_dir}/index.html", scenario_html)
 
-def update_main_index(summary):
-    """Update the main index.html with new scenario"""
-    index_path = "reports/index.html"
-    styles_path = "reports/styles.css"
-    
-    # Create main index if it doesn't exist
-    if not os.path.exists(index_path):
-        create_main_index()
-        create_styles_file()
-    
-    with open(index_path, 'r') as f:
-        content = f.read()
-    
-    # Add new nav item
-    nav_item = f'<div class="nav-item" onclick="window.location.href=\'{summary["scenario_name"].replace(" ", "_").lower()}/index.html\'">{summary["scenario_name"]}</div>'
-    content = content.replace('</div><!-- nav-menu-end -->', f'{nav_item}\n</div><!-- nav-menu-end -->')
-    
-    # Add summary to overview section
-    overview_item = f"""
+def update_main_index(summary, **entry):
+    """
+    Record the scenario in the report manifest and rebuild the main index
+    Extra keyword arguments (cache keys, the analysis) are stored in the
+    scenario's manifest entry; re-running a scenario replaces its entry
+    """
+    manifest = load_manifest()
+    manifest[summary['scenario_name']] = {
+        **entry,
+        'report_dir': summary['scenario_name'].replace(' ', '_').lower(),
+        'summary': {
+            key: summary[key]
+            for key in ('price_stability_score', 'liquidity_mean', 'network_utility_mean')
+        }
+    }
+    save_manifest(manifest)
+    create_main_index(manifest)
+    create_styles_file()
+
+def create_main_index(manifest=None):
+    """Write the main index.html from the manifest, one nav item and card per scenario"""
+    manifest = load_manifest() if manifest is None else manifest
+    
+    nav_items = []
+    overview_items = []
+    for scenario_name, entry in manifest.items():
+        summary = entry['summary']
+        nav_items.append(f'<div class="nav-item" onclick="window.location.href=\'{entry["report_dir"]}/index.html\'">{scenario_name}</div>')
+        overview_items.append(f"""
     <div class="scenario-card">
-        <h3>{summary['scenario_name']}</h3>
+        <h3>{scenario_name}</h3>
         <table>
             <tr><td>Price Stability:</td><td>{summary['price_stability_score']:.4f}</td></tr>
             <tr><td>Liquidity Mean:</td><td>{summary['liquidity_mean']:.4f}</td></tr>
             <tr><td>Network Utility:</td><td>{summary['network_utility_mean']:.4f}</td></tr>
         </table>
-        <a href="{summary['scenario_name'].replace(' ', '_').lower()}/index.html">View Details</a>
+        <a href="{entry['report_dir']}/index.html">View Details</a>
     </div>
-    """
-    content = content.replace('</div><!-- overview-content-end -->', f'{overview_item}\n</div><!-- overview-content-end -->')
+    """)
+    nav_menu = '\n'.join(nav_items)
+    overview = '\n'.join(overview_items)
     
-    with open(index_path, 'w') as f:
-        f.write(content)
-
-def create_main_index():
-    """Create the main index.html file"""
-    html = """
+    html = f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -328,6 +527,7 @@ def create_main_index():
     <body>
         <div class="nav-menu">
             <div class="nav-item active" onclick="window.location.href='#'">Overview</div>
+        {nav_menu}
         </div><!-- nav-menu-end -->
         
         <div class="content">
@@ -335,6 +535,7 @@ def create_main_index():
                 <h1>Stability Analysis Reports</h1>
                 <h2>Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</h2>
                 <div class="scenarios-grid">
+                {overview}
                 </div>
             </div><!-- overview-content-end -->
         </div>
@@ -342,8 +543,8 @@ def create_main_index():
     </html>
     """
     
-    with open("reports/index.html", 'w') as f:
-        f.write(html)
+    os.makedirs("reports", exist_ok=True)
+    _write_atomic("reports/index.html", html)
 
 def create_styles_file():
     """Create the shared CSS styles file"""
@@ -429,20 +630,20 @@ def create_styles_file():
     with open("reports/styles.css", 'w') as f:
         f.write(css)
 
-def plot_stability_metrics(df, report_dir, scenario_name):
+def plot_stability_metrics(df, report_dir, scenario_name, max_points=MAX_PLOT_POINTS):
     """Plot core stability metrics over time"""
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     
     # Price and Stability Metrics
-    ax1.plot(df['epoch'], df['current_price'], label='Price')
-    ax1.plot(df['epoch'], df['price_stability_index'], label='Price Stability')
+    plot_series(ax1, df['epoch'], df['current_price'], max_points, label='Price')
+    plot_series(ax1, df['epoch'], df['price_stability_index'], max_points, label='Price Stability')
     ax1.axhline(y=1.0, color='r', linestyle='--', alpha=0.3)
     ax1.set_title('Price and Stability Over Time')
     ax1.legend()
     
     # Liquidity and Market Pressure
-    ax2.plot(df['epoch'], df['liquidity_ratio'], label='Liquidity')
-    ax2.plot(df['epoch'], df['market_pressure'], label='Market Pressure')
+    plot_series(ax2, df['epoch'], df['liquidity_ratio'], max_points, label='Liquidity')
+    plot_series(ax2, df['epoch'], df['market_pressure'], max_points, label='Market Pressure')
     ax2.set_title('Liquidity and Market Pressure')
     ax2.legend()
     
@@ -450,20 +651,20 @@ def plot_stability_metrics(df, report_dir, scenario_name):
     plt.savefig(f"{report_dir}/stability_metrics.png")
     plt.close()
 
-def plot_economic_metrics(df, report_dir, scenario_name):
+def plot_economic_metrics(df, report_dir, scenario_name, max_points=MAX_PLOT_POINTS):
     """Plot economic metrics over time"""
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     
     # Validator and Holder Economics
-    ax1.plot(df['epoch'], df['daily_validator_reward_usdc'], label='Validator Rewards')
-    ax1.plot(df['epoch'], df['daily_holder_cost_usdc'], label='Holder Costs')
-    ax1.plot(df['epoch'], df['validator_holder_net_usdc'], label='Net Position')
+    plot_series(ax1, df['epoch'], df['daily_validator_reward_usdc'], max_points, label='Validator Rewards')
+    plot_series(ax1, df['epoch'], df['daily_holder_cost_usdc'], max_points, label='Holder Costs')
+    plot_series(ax1, df['epoch'], df['validator_holder_net_usdc'], max_points, label='Net Position')
     ax1.set_title('Economic Impacts Over Time')
     ax1.legend()
     
     # Transaction Costs
-    ax2.plot(df['epoch'], df['transaction_fee_usdc'], label='Transaction Fees')
-    ax2.plot(df['epoch'], df['dynamic_spread'], label='Market Spread')
+    plot_series(ax2, df['epoch'], df['transaction_fee_usdc'], max_points, label='Transaction Fees')
+    plot_series(ax2, df['epoch'], df['dynamic_spread'], max_points, label='Market Spread')
     ax2.set_title('Transaction Costs Over Time')
     ax2.legend()
     
@@ -471,13 +672,13 @@ def plot_economic_metrics(df, report_dir, scenario_name):
     plt.savefig(f"{report_dir}/economics_impacts.png")
     plt.close()
 
-def plot_network_metrics(df, report_dir, scenario_name):
+def plot_network_metrics(df, report_dir, scenario_name, max_points=MAX_PLOT_POINTS):
     """Plot network health metrics over time"""
     fig, ax = plt.subplots(figsize=(12, 6))
     
-    ax.plot(df['epoch'], df['network_utility_score'], label='Network Utility')
-    ax.plot(df['epoch'], df['validator_participation'], label='Validator Participation')
-    ax.plot(df['epoch'], df['holder_participation'], label='Holder Participation')
+    plot_series(ax, df['epoch'], df['network_utility_score'], max_points, label='Network Utility')
+    plot_series(ax, df['epoch'], df['validator_participation'], max_points, label='Validator Participation')
+    plot_series(ax, df['epoch'], df['holder_participation'], max_points, label='Holder Participation')
     
     ax.set_title('Network Health Metrics')
     ax.legend()
@@ -485,6 +686,43 @@ def plot_network_metrics(df, report_dir, scenario_name):
     plt.savefig(f"{report_dir}/network_health.png")
     plt.close()
 
+# Figures of a scenario report, each rendered as an independent pool task,
+# and the files a complete scenario report consists of
+REPORT_FIGURES = (
+    plot_stability_metrics,
+    plot_economic_metrics,
+    plot_network_metrics,
+    plot_temporal_analysis,
+    plot_participant_dynamics,
+    plot_circuit_breaker_analysis
+)
+REPORT_FILES = (
+    'stability_metrics.png', 'economics_impacts.png', 'network_health.png',
+    'temporal_analysis.png', 'participant_dynamics.png', 'circuit_breakers.png', 'index.html'
+)
+
+# Result columns the report figures plot against epoch; stored runs are
+# decimated to the rows these series and the circuit breaker markers need
+PLOTTED_COLUMNS = (
+    'current_price', 'price_stability_index', 'liquidity_ratio', 'market_pressure',
+    'daily_validator_reward_usdc', 'daily_holder_cost_usdc', 'validator_holder_net_usdc',
+    'transaction_fee_usdc', 'dynamic_spread', 'network_utility_score', 'validator_participation',
+    'holder_participation', 'validator_count', 'holder_count', 'transaction_volume'
+)
+
+def select_plot_points(decimator, start, columns):
+    """Feed one block of results starting at epoch index start to a ChunkDecimator"""
+    for name in PLOTTED_COLUMNS:
+        decimator.add(name, start, columns[name])
+    # Derived series of plot_participant_dynamics
+    decimator.add('v_t_ratio', start, columns['validator_count'] / columns['transaction_volume'])
+    for bit, name in enumerate(CIRCUIT_BREAKERS):
+        decimator.mark(name, start, (columns['circuit_breaker_flags'] & (1 << bit)) != 0)
+
+def report_complete(report_dir):
+    """Whether every file of a scenario report exists"""
+    return all(os.path.exists(os.path.join(report_dir, name)) for name in REPORT_FILES)
+
 def create_summary_statistics(scenarios_results):
     """Generate summary statistics for all scenarios"""
     summaries = []
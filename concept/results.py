@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+from vector_formulas import CIRCUIT_BREAKERS, FAILING_METRICS, unpack_flags, flag_names
+
+class ResultStore:
+    """
+    Columnar store for per-epoch simulation results
+    One preallocated NumPy column per field; circuit breakers and failing
+    metrics are packed into uint8 bit flags
+    """
+
+    # Participant and transaction counts grow geometrically and overflow
+    # int64 on long runs, so they are kept as float64
+    COLUMNS = {
+        'epoch': np.int64,
+        'epoch_duration': np.int32,
+        'current_price': np.float64,
+        'liquidity_ratio': np.float64,
+        'validator_count': np.int64,
+        'total_holders': np.float64,
+        'transaction_volume': np.float64,
+        'daily_transactions': np.float64,
+        'price_stability_index': np.float64,
+        'market_pressure': np.float64,
+        'network_utility_score': np.float64,
+        'liquidity_health_index': np.float64,
+        'daily_validator_reward_usdc': np.float64,
+        'daily_holder_cost_usdc': np.float64,
+        'validator_holder_net_usdc': np.float64,
+        'transaction_fee_usdc': np.float64,
+        'convergence_rate': np.float64,
+        'dynamic_spread': np.float64,
+        'validator_participation': np.float64,
+        'holder_participation': np.float64,
+        'holder_count': np.float64,
+        'transaction_settlement_rate': np.float64,
+        'circuit_breaker_flags': np.uint8,
+        'is_equilibrium': np.bool_,
+        'failing_metric_flags': np.uint8
+    }
+
+    def __init__(self, capacity, buffer=None):
+        """
+        Preallocate every column for capacity epochs
+        When buffer is given (e.g. a SharedMemory.buf of at least
+        nbytes(capacity)) the columns are laid out inside it instead
+        """
+        self.capacity = max(1, int(capacity))
+        self.cursor = 0
+        if buffer is None:
+            self.columns = {
+                name: np.zeros(self.capacity, dtype=dtype)
+                for name, dtype in self.COLUMNS.items()
+            }
+        else:
+            self.columns = {
+                name: np.ndarray(self.capacity, dtype=dtype, buffer=buffer, offset=offset)
+                for name, dtype, offset in self._layout(self.capacity)
+            }
+
+    @classmethod
+    def _layout(cls, capacity):
+        """Yield (name, dtype, offset) for columns packed into one buffer, 8-byte aligned"""
+        offset = 0
+        for name, dtype in cls.COLUMNS.items():
+            yield name, dtype, offset
+            offset += -(-capacity * np.dtype(dtype).itemsize // 8) * 8
+
+    @classmethod
+    def nbytes(cls, capacity):
+        """Size of the single buffer needed to hold capacity epochs"""
+        capacity = max(1, int(capacity))
+        return sum(-(-capacity * np.dtype(dtype).itemsize // 8) * 8 for dtype in cls.COLUMNS.values())
+
+    def __len__(self):
+        return self.cursor
+
+    def append(self, circuit_breakers=None, failing_metrics=None, **values):
+        """Record one epoch, packing circuit breakers and failing metrics into flags"""
+        if self.cursor == self.capacity:
+            self._grow()
+        i = self.cursor
+        columns = self.columns
+        for name, value in values.items():
+            columns[name][i] = value
+        if circuit_breakers is not None:
+            columns['circuit_breaker_flags'][i] = (
+                circuit_breakers['halt_trading'] |
+                circuit_breakers['emergency_spreads'] << 1 |
+                circuit_breakers['needs_rebase'] << 2
+            )
+        if failing_metrics is not None:
+            columns['failing_metric_flags'][i] = sum(
+                1 << FAILING_METRICS.index(metric) for metric in failing_metrics
+            )
+        self.cursor = i + 1
+
+    def extend(self, columns):
+        """Record a block of epochs given as {name: array} for every column, flags already packed"""
+        n = len(columns['epoch'])
+        while self.cursor + n > self.capacity:
+            self._grow()
+        for name, column in self.columns.items():
+            column[self.cursor:self.cursor + n] = columns[name]
+        self.cursor += n
+
+    def __getstate__(self):
+        """Pickle only the filled part of each column"""
+        state = self.__dict__.copy()
+        state['columns'] = {name: column[:self.cursor].copy() for name, column in self.columns.items()}
+        state.pop('shared_memory', None)
+        return state
+
+    def __setstate__(self, state):
+        """Reallocate full capacity around the pickled columns"""
+        filled = state['columns']
+        self.__dict__.update(state)
+        self.columns = {}
+        for name, dtype in self.COLUMNS.items():
+            column = np.zeros(self.capacity, dtype=dtype)
+            column[:len(filled[name])] = filled[name]
+            self.columns[name] = column
+
+    def _grow(self):
+        """Double capacity when a run outlives its preallocation"""
+        for name, column in self.columns.items():
+            grown = np.zeros(self.capacity * 2, dtype=column.dtype)
+            grown[:self.capacity] = column
+            self.columns[name] = grown
+        self.capacity *= 2
+
+    def column(self, name):
+        """Return a view of the filled part of a column"""
+        return self.columns[name][:self.cursor]
+
+    def circuit_breaker(self, name):
+        """Return the boolean mask of one circuit breaker"""
+        return unpack_flags(self.column('circuit_breaker_flags'), CIRCUIT_BREAKERS)[name]
+
+    def failing_metric(self, name):
+        """Return the boolean mask of one failing equilibrium metric"""
+        return unpack_flags(self.column('failing_metric_flags'), FAILING_METRICS)[name]
+
+    def to_dataframe(self):
+        """Wrap the filled columns in a DataFrame without copying"""
+        return pd.DataFrame(
+            {name: column[:self.cursor] for name, column in self.columns.items()},
+            copy=False
+        )
+
+    def to_records(self):
+        """Expand back into the legacy list of per-epoch dicts"""
+        records = self.to_dataframe().to_dict('records')
+        for record in records:
+            flags = record.pop('circuit_breaker_flags')
+            record['circuit_breakers'] = {
+                name: bool(flags & (1 << bit)) for bit, name in enumerate(CIRCUIT_BREAKERS)
+            }
+            record['failing_metrics'] = flag_names(record.pop('failing_metric_flags'), FAILING_METRICS)
+        return records
+
+class BranchResultStore(ResultStore):
+    """
+    ResultStore continuing a run from the first cursor epochs of another
+    The prefix is a set of read-only views shared by every branch forked at
+    the same point; only the epochs appended after the fork are stored here
+    """
+
+    def __init__(self, prefix, cursor, capacity):
+        super().__init__(capacity)
+        self.prefix = {}
+        for name in self.COLUMNS:
+            view = prefix.column(name)[:cursor]
+            view.flags.writeable = False
+            self.prefix[name] = view
+        self.prefix_length = cursor
+
+    def __len__(self):
+        return self.prefix_length + self.cursor
+
+    def column(self, name):
+        """Return the prefix followed by this branch's epochs"""
+        return np.concatenate((self.prefix[name], self.columns[name][:self.cursor]))
+
+    def to_dataframe(self):
+        """Assemble prefix and branch columns into a DataFrame"""
+        return pd.DataFrame({name: self.column(name) for name in self.COLUMNS}, copy=False)
+
+def results_frame(results):
+    """Return results as a DataFrame whether given a ResultStore, stored dataset, DataFrame or list of dicts"""
+    if isinstance(results, ResultStore) or hasattr(results, 'to_dataframe'):
+        return results.to_dataframe()
+    if isinstance(results, pd.DataFrame):
+        return results
+    return pd.DataFrame(results)
+
+def circuit_breaker_mask(df, name):
+    """Boolean Series for one circuit breaker from packed flags or legacy dicts"""
+    if 'circuit_breaker_flags' in df:
+        return (df['circuit_breaker_flags'] & (1 << CIRCUIT_BREAKERS.index(name))) != 0
+    return df['circuit_breakers'].apply(lambda x: x[name])
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+# Time scales from precept: minute (6 epochs), hour (360), day (8640), week (60480)
+TIME_SCALES = {
+    'minute': 6,
+    'hour': 360,
+    'day': 8640,
+    'week': 60480
+}
+ROLLUP_METRICS = (
+    'current_price', 'liquidity_ratio', 'price_stability_index',
+    'network_utility_score', 'transaction_fee_usdc'
+)
+STATS = ('count', 'mean', 'std', 'min', 'max', 'sum')
+FIELDS = ('count', 'sum', 'm2', 'min', 'max')
+
+def reduce_rows(rows, size):
+    """
+    Buckets of size consecutive epochs, the last one possibly partial
+    rows has one row per epoch and one column per metric; returns
+    {field: array} with one row per bucket, m2 being the sum of squared
+    deviations from the bucket mean
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    n = len(rows)
+    if not n:
+        return {name: np.zeros(0, dtype=np.int64) if name == 'count' else np.zeros((0, rows.shape[1]))
+                for name in FIELDS}
+    starts = np.arange(0, n, size)
+    count = np.diff(np.append(starts, n))
+    total = np.add.reduceat(rows, starts, axis=0)
+    with np.errstate(invalid='ignore'):
+        deviation = rows - np.repeat(total / count[:, None], count, axis=0)
+    return {
+        'count': count, 'sum': total,
+        'm2': np.add.reduceat(deviation * deviation, starts, axis=0),
+        'min': np.minimum.reduceat(rows, starts, axis=0),
+        'max': np.maximum.reduceat(rows, starts, axis=0)
+    }
+
+def combine_buckets(buckets, size):
+    """
+    Merge groups of size consecutive buckets, the last group possibly partial
+    Uses the pairwise variance update of Chan et al., so the merged m2 is
+    exact rather than recomputed from sums of squares
+    """
+    count = buckets['count']
+    n = len(count)
+    if not n:
+        return buckets
+    starts = np.arange(0, n, size)
+    merged_count = np.add.reduceat(count, starts)
+    total = np.add.reduceat(buckets['sum'], starts, axis=0)
+    with np.errstate(invalid='ignore'):
+        group_mean = np.repeat(total / merged_count[:, None], np.diff(np.append(starts, n)), axis=0)
+        offset = buckets['sum'] / count[:, None] - group_mean
+        spread = buckets['m2'] + count[:, None] * offset * offset
+    return {
+        'count': merged_count, 'sum': total,
+        'm2': np.add.reduceat(spread, starts, axis=0),
+        'min': np.minimum.reduceat(buckets['min'], starts, axis=0),
+        'max': np.maximum.reduceat(buckets['max'], starts, axis=0)
+    }
+
+class RollupLevel:
+    """Closed buckets of one time scale, one row per bucket and one column per metric"""
+
+    def __init__(self, n_metrics, capacity=64):
+        self.cursor = 0
+        self.fields = {
+            name: np.zeros(capacity, dtype=np.int64) if name == 'count' else np.zeros((capacity, n_metrics))
+            for name in FIELDS
+        }
+
+    def __len__(self):
+        return self.cursor
+
+    def extend(self, buckets):
+        """Append closed buckets given as {field: array}"""
+        n = len(buckets['count'])
+        capacity = len(self.fields['count'])
+        if self.cursor + n > capacity:
+            # Grow geometrically, like a Python list
+            capacity = max(2 * capacity, self.cursor + n)
+            for name, values in self.fields.items():
+                grown = np.zeros((capacity,) + values.shape[1:], dtype=values.dtype)
+                grown[:self.cursor] = values[:self.cursor]
+                self.fields[name] = grown
+        for name, values in self.fields.items():
+            values[self.cursor:self.cursor + n] = buckets[name]
+        self.cursor += n
+
+    def rows(self, start=0):
+        """{field: array} of the closed buckets from start on"""
+        return {name: values[start:self.cursor] for name, values in self.fields.items()}
+
+class RollupPyramid:
+    """
+    Time-scale rollups of the epoch metrics, kept up to date as epochs complete
+    Epoch rows are buffered until an hour completes; its minutes are then
+    reduced in one vectorized pass and closed buckets roll up into the next
+    scale, so days are built from hours and weeks from days. Queries
+    include the buckets still open at the end, like a groupby over the
+    epoch index
+    """
+
+    def __init__(self, metrics=ROLLUP_METRICS, scales=TIME_SCALES):
+        self.metrics = tuple(metrics)
+        self.scales = dict(scales)
+        self.names = list(self.scales)
+        # Buckets of the scale below that make up one bucket of each scale
+        epochs = list(self.scales.values())
+        self.fan_in = [epochs[0]] + [upper // lower for lower, upper in zip(epochs, epochs[1:])]
+        self.flush_epochs = epochs[min(1, len(epochs) - 1)]
+        self.levels = [RollupLevel(len(self.metrics)) for _ in self.names]
+        self.buffer = []
+        self.epochs = 0
+
+    def append(self, values):
+        """Record one epoch's values, a dict holding at least the pyramid's metrics"""
+        self.buffer.append([values[metric] for metric in self.metrics])
+        self.epochs += 1
+        if len(self.buffer) == self.flush_epochs:
+            self._flush()
+
+    def extend(self, columns):
+        """Record a block of epochs at once, columns being {name: array} holding the pyramid's metrics"""
+        rows = np.column_stack([np.asarray(columns[metric], dtype=np.float64) for metric in self.metrics])
+        n = len(rows)
+        # Close the open hour first, then reduce the block's whole hours in one pass
+        head = min(n, self.flush_epochs - len(self.buffer))
+        self.buffer.extend(rows[:head].tolist())
+        self.epochs += head
+        if len(self.buffer) < self.flush_epochs:
+            return
+        self._flush()
+        whole = head + (n - head) // self.flush_epochs * self.flush_epochs
+        if whole > head:
+            self.buffer = rows[head:whole]
+            self._flush()
+        self.buffer = rows[whole:].tolist()
+        self.epochs = self.epochs + n - head
+
+    def _flush(self):
+        """Reduce the buffered epochs to closed buckets and roll them up the scales"""
+        self.levels[0].extend(reduce_rows(self.buffer, self.fan_in[0]))
+        self.buffer = []
+        for level in range(1, len(self.names)):
+            start = len(self.levels[level]) * self.fan_in[level]
+            complete = (len(self.levels[level - 1]) - start) // self.fan_in[level]
+            if not complete:
+                break
+            rows = self.levels[level - 1].rows(start)
+            self.levels[level].extend(combine_buckets(
+                {name: values[:complete * self.fan_in[level]] for name, values in rows.items()},
+                self.fan_in[level]
+            ))
+
+    @classmethod
+    def from_frame(cls, df, metrics=ROLLUP_METRICS, scales=TIME_SCALES):
+        """
+        Build the pyramid of finished results in one vectorized pass per scale
+        For results recorded without a live pyramid, e.g. loaded from disk;
+        the pyramid can keep taking append() calls afterwards
+        """
+        pyramid = cls(metrics, scales)
+        n = len(df)
+        columns = np.column_stack([df[metric].to_numpy(dtype=np.float64) for metric in pyramid.metrics])
+        flushed = n - n % pyramid.flush_epochs
+        for level, epochs in enumerate(pyramid.scales.values()):
+            pyramid.levels[level].extend(reduce_rows(columns[:flushed - flushed % epochs], epochs))
+        pyramid.buffer = columns[flushed:].tolist()
+        pyramid.epochs = n
+        return pyramid
+
+    def _pending(self, level):
+        """{field: array} of the buckets of a level not closed yet"""
+        if level == 0:
+            return reduce_rows(np.reshape(self.buffer, (-1, len(self.metrics))), self.fan_in[0])
+        # Closed buckets of the scale below not rolled up yet, then its open ones
+        start = len(self.levels[level]) * self.fan_in[level]
+        closed = self.levels[level - 1].rows(start)
+        pending = self._pending(level - 1)
+        return combine_buckets(
+            {name: np.concatenate((closed[name], pending[name])) for name in FIELDS},
+            self.fan_in[level]
+        )
+
+    def buckets(self, scale):
+        """{field: array} of every bucket of a scale, the open one last"""
+        level = self.names.index(scale)
+        closed = self.levels[level].rows()
+        pending = self._pending(level)
+        return {name: np.concatenate((closed[name], pending[name])) for name in FIELDS}
+
+    def rollup(self, scale):
+        """
+        {stat: array} for one scale, one row per bucket and one column per metric
+        stat is one of STATS; std is the sample (ddof=1) deviation
+        """
+        buckets = self.buckets(scale)
+        count = buckets['count'][:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = buckets['sum'] / count
+            std = np.where(count > 1, np.sqrt(buckets['m2'] / (count - 1)), np.nan)
+        return {
+            'count': buckets['count'], 'mean': mean, 'std': std,
+            'min': buckets['min'], 'max': buckets['max'], 'sum': buckets['sum']
+        }
+
+    def query(self, scale, metric, stat='mean'):
+        """One statistic of one metric at one scale, as an array over buckets"""
+        values = self.rollup(scale)[stat]
+        if stat == 'count':
+            return values
+        return values[:, self.metrics.index(metric)]
+
+    def frame(self, scale, metrics=None):
+        """DataFrame of a scale with (metric, stat) columns, like groupby(...).agg(...)"""
+        rollup = self.rollup(scale)
+        data = {}
+        for metric in metrics or self.metrics:
+            i = self.metrics.index(metric)
+            for stat in STATS[1:]:
+                data[(metric, stat)] = rollup[stat][:, i]
+        df = pd.DataFrame(data)
+        df.columns = pd.MultiIndex.from_tuples(df.columns)
+        return df
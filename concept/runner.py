@@ -0,0 +1,153 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from scheduler import max_epochs
+from example import (run_simulation, run_online_simulation, report_simulation, print_scenario_analysis,
+                     scenario_results_path, simulation_config_key, cached_report, scenario_profiler)
+from profiling import format_timings
+from results import ResultStore
+from storage import write_results
+
+def _simulate_into_shared_memory(initial_conditions, duration_days, shm_name, capacity, events,
+                                 profiler=None, backend='python', steady_state=False, scheduled=False):
+    """
+    Worker: run one scenario, writing its columns straight into shared memory
+    Returns (rows, elapsed, rollups, profiler); the rollup pyramid and the
+    stage timers are small next to the results
+    """
+    # Workers share the parent's resource tracker, so attaching here does not
+    # hand ownership of the segment to this process
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        store = ResultStore(capacity, buffer=shm.buf)
+        sim = run_simulation(initial_conditions, duration_days, results=store, verbose=False,
+                             events=events, profiler=profiler, backend=backend, steady_state=steady_state,
+                             scheduled=scheduled)
+        cursor, elapsed, rollups = len(store), sim.elapsed, sim.rollups
+        if store.capacity != capacity:
+            raise RuntimeError("simulation outgrew its shared result buffer")
+        del sim, store
+        return cursor, elapsed, rollups, profiler
+    finally:
+        shm.close()
+
+def _simulate_online(initial_conditions, duration_days, events, scheduled=False):
+    """Worker: run one scenario with streaming analysis, returning (analysis, elapsed)"""
+    start_time = time.time()
+    analysis = run_online_simulation(initial_conditions, duration_days, verbose=False, events=events,
+                                     scheduled=scheduled)
+    return analysis, time.time() - start_time
+
+def _run_online_scenarios(pool, scenarios, duration_days, events, scheduled=False):
+    """
+    Submit online runs and print them in scenario order; returns [(None, analysis)]
+    Each run gets its own spawn of the EventModel and samples it as it goes
+    """
+    futures = [
+        pool.submit(_simulate_online, scenario, duration_days,
+                    events.spawn() if events is not None else None, scheduled)
+        for scenario in scenarios
+    ]
+    outcomes = []
+    for scenario, future in zip(scenarios, futures):
+        analysis, elapsed = future.result()
+        print(f"\nRunning scenario: {scenario.get('name', 'Base Scenario')}")
+        print(f"Simulation completed in {elapsed:.2f} seconds")
+        print_scenario_analysis(analysis)
+        outcomes.append((None, analysis))
+    return outcomes
+
+def run_scenarios(scenarios, duration_days=7, workers=None, events=None, online=False, persist=False,
+                  force=False, profile=False, cprofile=False, backend='python', steady_state=False,
+                  scheduled=False):
+    """
+    Run scenarios across a process pool and report them in input order
+    Each worker records into a ResultStore laid out in a shared memory
+    segment, so only the row count, timing and time-scale rollups cross
+    the process boundary. Analysis, reports and the console summary run in
+    this process in scenario order. Event schedules are sampled here in
+    scenario order, so a seeded EventModel gives the same runs as the
+    serial loop. Returns a list of (results, analysis) per scenario. With
+    online set, workers keep streaming accumulators only, sample their own
+    spawn of the EventModel a day at a time and send back the analysis
+    dict, and results is None. With persist set, each scenario's
+    results are also written to its results.arrow before it is reported.
+    Scenarios the report manifest shows unchanged are not submitted unless
+    force is set, and come back as (None, cached analysis). profile and
+    cprofile time each scenario's stages as in run_comprehensive_simulation,
+    backend 'jit' runs each worker's epoch loop in the compiled kernel,
+    steady_state fills stationary stretches of it in closed form and
+    scheduled runs duration_days of simulated time under the discrete-event
+    scheduler, with shared buffers sized for its shortest epochs
+    """
+    workers = workers or os.cpu_count() or 1
+    capacity = max_epochs(duration_days * 86400) if scheduled else int(duration_days * 8640)
+    if online:
+        print(f"\nRunning {len(scenarios)} online scenarios on {workers} workers: "
+              f"{duration_days} days ({'up to ' if scheduled else ''}{capacity} epochs) each")
+        start_time = time.time()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = _run_online_scenarios(pool, scenarios, duration_days, events, scheduled)
+        print(f"\nAll scenarios completed in {time.time() - start_time:.2f} seconds")
+        return outcomes
+
+    schedules = [events.sample(capacity) if events is not None else None for _ in scenarios]
+    keys = [
+        simulation_config_key(scenario, duration_days, schedule, scheduled)
+        for scenario, schedule in zip(scenarios, schedules)
+    ]
+    cached = [
+        None if force else cached_report(scenario.get('name', 'Base Scenario'), 'config_key', key)
+        for scenario, key in zip(scenarios, keys)
+    ]
+    segments = [
+        shared_memory.SharedMemory(create=True, size=ResultStore.nbytes(capacity)) if entry is None else None
+        for entry in cached
+    ]
+
+    print(f"\nRunning {len(scenarios)} scenarios on {workers} workers: "
+          f"{duration_days} days ({'up to ' if scheduled else ''}{capacity} epochs) each")
+    start_time = time.time()
+    outcomes = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_simulate_into_shared_memory, scenario, duration_days, shm.name, capacity, schedule,
+                            scenario_profiler(scenario.get('name', 'Base Scenario'), profile, cprofile),
+                            backend, steady_state, scheduled)
+                if shm is not None else None
+                for scenario, shm, schedule in zip(scenarios, segments, schedules)
+            ]
+            for scenario, shm, future, key, entry in zip(scenarios, segments, futures, keys, cached):
+                scenario_name = scenario.get('name', 'Base Scenario')
+                if entry is not None:
+                    print(f"\nSkipping unchanged scenario: {scenario_name}")
+                    outcomes.append((None, entry['analysis']))
+                    continue
+                cursor, elapsed, rollups, profiler = future.result()
+
+                results = ResultStore(capacity, buffer=shm.buf)
+                results.cursor = cursor
+                # Keep the mapping alive for as long as the results are
+                results.shared_memory = shm
+
+                print(f"\nRunning scenario: {scenario_name}")
+                print(f"Simulation completed in {elapsed:.2f} seconds")
+                if persist:
+                    write_results(results, scenario_results_path(scenario_name))
+                analysis = report_simulation(results, scenario_name, key, force, rollups, profiler)
+                print_scenario_analysis(analysis)
+                if profiler is not None:
+                    print(f"\nStage timings for {scenario_name}:")
+                    print(format_timings(profiler.table()))
+                outcomes.append((results, analysis))
+    finally:
+        # Unlinking only removes the name; mapped results stay readable
+        for shm in segments:
+            if shm is not None:
+                shm.unlink()
+
+    print(f"\nAll scenarios completed in {time.time() - start_time:.2f} seconds")
+    return outcomes
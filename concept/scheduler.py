@@ -0,0 +1,108 @@
+import heapq
+import math
+import numpy as np
+from events import EVENT_TARGETS
+
+BLOCK_SECONDS = 2  # Block time from precept section 2
+TICK_SECONDS = 10  # Base epoch duration; rollups get one row per tick
+MIN_EPOCH_SECONDS = 5  # Floor of determine_epoch_duration
+
+# Priorities of simultaneous events: a tick closes the interval before
+# anything at its boundary changes it, and a shock lands before the epoch
+# that starts with it
+TICK, SHOCK, BLOCK, EPOCH = range(4)
+
+def max_epochs(horizon):
+    """Most epochs that can start within horizon seconds"""
+    return math.ceil(horizon / MIN_EPOCH_SECONDS)
+
+class LatestRecord:
+    """Stands in for a simulation's rollups while scheduled, keeping only the last epoch record"""
+
+    def __init__(self):
+        self.record = None
+
+    def append(self, record):
+        self.record = record
+
+class EpochScheduler:
+    def __init__(self, sim, horizon, shocks=()):
+        """
+        Drive a MarketSimulation for horizon simulated seconds
+        Epochs last as long as determine_epoch_duration says rather than a
+        fixed 10 seconds. Epoch starts, blocks, shocks and rollup ticks
+        share one heap ordered by (time, priority), and every recurring
+        event pushes its own successor, so the heap stays a few entries long.
+        sim.duration must be at least max_epochs(horizon). shocks are
+        {'time': seconds, 'event': kind, 'magnitude': multiplier} entries,
+        the timed counterpart of EventModel timeline entries; each
+        multiplies its EVENT_TARGETS conditions when it fires. sim.rollups,
+        if any, is fed the current epoch every TICK_SECONDS of simulated time
+        instead of once per epoch, so its minute, hour and day buckets span
+        wall-clock time however long the epochs are
+        """
+        for shock in shocks:
+            if shock['event'] not in EVENT_TARGETS:
+                raise ValueError(f"Unknown event kind: {shock['event']}")
+        if sim.duration < max_epochs(horizon):
+            raise ValueError(f"simulation sized for {sim.duration} epochs, {horizon} seconds need "
+                             f"up to {max_epochs(horizon)}")
+        self.sim = sim
+        self.horizon = horizon
+        self.shocks = sorted(shocks, key=lambda shock: shock['time'])
+        self.rollups = sim.rollups
+        self.blocks = 0
+        self.events = 0
+        # Start time and block height of every epoch
+        self.epoch_times = np.zeros(sim.duration, dtype=np.float64)
+        self.epoch_blocks = np.zeros(sim.duration, dtype=np.int64)
+
+    def run(self, verbose=False):
+        """Process events in time order up to the horizon; returns the simulation"""
+        sim = self.sim
+        horizon = self.horizon
+        tap = LatestRecord()
+        sim.rollups = tap
+        heap = [(0, EPOCH, 0), (BLOCK_SECONDS, BLOCK, 0), (TICK_SECONDS, TICK, 0)]
+        heap += [(shock['time'], SHOCK, i) for i, shock in enumerate(self.shocks) if shock['time'] < horizon]
+        heapq.heapify(heap)
+        pop, push = heapq.heappop, heapq.heappush
+        epoch_times, epoch_blocks = self.epoch_times, self.epoch_blocks
+        # Counters stay local in the hot loop
+        blocks = events = 0
+
+        try:
+            while heap:
+                time, kind, index = pop(heap)
+                events += 1
+                if kind == BLOCK:
+                    blocks += 1
+                    if time + BLOCK_SECONDS <= horizon:
+                        push(heap, (time + BLOCK_SECONDS, BLOCK, 0))
+                elif kind == EPOCH:
+                    epoch = sim.epoch
+                    epoch_times[epoch] = time
+                    epoch_blocks[epoch] = blocks
+                    sim.run_epoch(epoch)
+                    if time + tap.record['epoch_duration'] < horizon:
+                        push(heap, (time + tap.record['epoch_duration'], EPOCH, 0))
+                    if verbose and epoch % 1000 == 0:
+                        print(f"Progress: {time / horizon * 100:.1f}% complete")
+                elif kind == TICK:
+                    if self.rollups is not None:
+                        self.rollups.append(tap.record)
+                    if time + TICK_SECONDS <= horizon:
+                        push(heap, (time + TICK_SECONDS, TICK, 0))
+                else:
+                    shock = self.shocks[index]
+                    for key in EVENT_TARGETS[shock['event']]:
+                        sim.conditions[key] *= shock['magnitude']
+        finally:
+            sim.rollups = self.rollups
+            self.blocks = blocks
+            self.events = events
+
+        self.epoch_times = epoch_times[:sim.epoch]
+        self.epoch_blocks = epoch_blocks[:sim.epoch]
+        sim.duration = sim.epoch
+        return sim
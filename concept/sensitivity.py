@@ -0,0 +1,130 @@
+import argparse
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+import vector_formulas as vf
+from reports import plot_sensitivity_indices
+
+SENSITIVITY_OUTPUTS = (
+    'price_stability_index', 'transaction_fee_usdc', 'daily_holder_cost_usdc', 'daily_validator_reward_usdc'
+)
+
+# (low, high, scale) of each calculate_economics input, spanning the
+# example scenarios; 'log' inputs are sampled log-uniformly
+INPUT_RANGES = {
+    'validator_count': (1000, 20000, 'log'),
+    'total_holders': (300000, 5000000, 'log'),
+    'daily_transactions': (20000, 100000000, 'log'),
+    'current_price': (0.5, 1.5, 'linear'),
+    'avg_transaction_size': (1000, 10000, 'linear'),
+    'avg_holding_balance': (1000, 15000, 'linear'),
+    'days_held': (1, 60, 'linear'),
+    'liquidity_ratio': (0.05, 1.0, 'linear'),
+    'cross_chain_transfers': (1000, 700000, 'log'),
+    'buys_volume': (10000000, 400000000000, 'log'),
+    'sells_volume': (10000000, 400000000000, 'log'),
+    'pressure_signal': (-1.0, 1.0, 'linear')
+}
+BATCH_SIZE = 2 ** 17  # Rows per calculate_economics call
+
+def scale_inputs(unit, ranges):
+    """Map unit-cube samples, one column per input, onto the input ranges"""
+    values = np.empty_like(unit)
+    for i, (low, high, scale) in enumerate(ranges.values()):
+        if scale == 'log':
+            values[:, i] = low * (high / low) ** unit[:, i]
+        else:
+            values[:, i] = low + (high - low) * unit[:, i]
+    return values
+
+def evaluate(values, keys, outputs):
+    """{output: array} of calculate_economics over the rows of values, one column per key in keys"""
+    results = {output: np.empty(len(values)) for output in outputs}
+    for start in range(0, len(values), BATCH_SIZE):
+        batch = values[start:start + BATCH_SIZE]
+        economics = vf.calculate_economics(**{key: batch[:, i] for i, key in enumerate(keys)})
+        for output in outputs:
+            results[output][start:start + len(batch)] = economics[output]
+    return results
+
+def sobol_indices(samples=2 ** 16, ranges=INPUT_RANGES, outputs=SENSITIVITY_OUTPUTS, seed=None):
+    """
+    First- and total-order Sobol indices of each output to each input
+    Base matrices A and B come from one scrambled Sobol sequence of
+    samples rows (rounded up to a power of two); the model runs on A, B
+    and each A with column i taken from B, samples * (inputs + 2) rows in
+    all. Uses the Saltelli (2010) first-order and Jansen total-order
+    estimators. Rows are evaluated BATCH_SIZE at a time with
+    vector_formulas.calculate_economics. Returns {output: {'first_order':
+    {input: index}, 'total_order': {input: index}}}
+    """
+    keys = list(ranges)
+    d = len(keys)
+    sampler = qmc.Sobol(2 * d, scramble=True, seed=seed)
+    unit = sampler.random_base2(max(1, math.ceil(math.log2(samples))))
+    a = scale_inputs(unit[:, :d], ranges)
+    b = scale_inputs(unit[:, d:], ranges)
+
+    f_a = evaluate(a, keys, outputs)
+    f_b = evaluate(b, keys, outputs)
+    variance = {output: np.var(np.concatenate((f_a[output], f_b[output]))) for output in outputs}
+    indices = {output: {'first_order': {}, 'total_order': {}} for output in outputs}
+    for i, key in enumerate(keys):
+        # A with column i from B, reusing one buffer
+        saved = a[:, i].copy()
+        a[:, i] = b[:, i]
+        f_ab = evaluate(a, keys, outputs)
+        a[:, i] = saved
+        for output in outputs:
+            delta = f_ab[output] - f_a[output]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                indices[output]['first_order'][key] = np.mean(f_b[output] * delta) / variance[output]
+                indices[output]['total_order'][key] = 0.5 * np.mean(delta * delta) / variance[output]
+    return indices
+
+def sobol_frame(indices):
+    """One row per (output, input) with first_order and total_order columns, most influential first"""
+    rows = [
+        {'output': output, 'input': key, 'first_order': orders['first_order'][key],
+         'total_order': orders['total_order'][key]}
+        for output, orders in indices.items() for key in orders['first_order']
+    ]
+    df = pd.DataFrame(rows)
+    return df.sort_values(['output', 'total_order'], ascending=[True, False], ignore_index=True)
+
+def print_indices(df):
+    """Print the index table, one block per output"""
+    for output, rows in df.groupby('output', sort=False):
+        print(f"\n{output}:")
+        print(f"{'Input':<26}{'First order':>12}{'Total order':>12}")
+        for row in rows.itertuples():
+            print(f"{row.input:<26}{row.first_order:>12.4f}{row.total_order:>12.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sobol sensitivity of the economic formulas to the calculate_economics inputs",
+        epilog="A full study: python sensitivity.py --samples 1000000"
+    )
+    parser.add_argument('--samples', type=int, default=2 ** 16,
+                        help="base samples, rounded up to a power of two; the model runs samples x 14 rows")
+    parser.add_argument('--seed', type=int, default=None, help="Sobol scrambling seed")
+    parser.add_argument('--outputs', nargs='+', default=list(SENSITIVITY_OUTPUTS),
+                        help="calculate_economics outputs to analyze")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    indices = sobol_indices(args.samples, outputs=args.outputs, seed=args.seed)
+    elapsed = time.time() - start_time
+    df = sobol_frame(indices)
+    print_indices(df)
+    print(f"\nSobol indices from {2 ** max(1, math.ceil(math.log2(args.samples))):,} base samples "
+          f"in {elapsed:.2f} seconds")
+
+    report_path = 'reports/sensitivity'
+    os.makedirs(report_path, exist_ok=True)
+    df.to_csv(os.path.join(report_path, 'sobol_indices.csv'), index=False)
+    plot_sensitivity_indices(df, report_path)
+    print(f"Indices written to {report_path}")
@@ -0,0 +1,183 @@
+from operator import itemgetter
+import numpy as np
+import vector_formulas as vf
+from ensemble import STATE_KEYS
+from results import ResultStore
+
+# (daily_transactions, total_holders) multipliers _update_conditions
+# applies when price_stability_index is >= 0.8 and < 0.8
+GROWTH_MULTIPLIERS = (1.01, 1.005)
+DECLINE_MULTIPLIERS = (0.95, 0.99)
+GROWTH_KEYS = ('daily_transactions', 'total_holders')
+FIXED_KEYS = tuple(key for key in STATE_KEYS if key not in GROWTH_KEYS)
+
+_probe = itemgetter('current_price', 'buys_volume', 'sells_volume')
+_counts = itemgetter(*GROWTH_KEYS)
+_fixed = itemgetter(*FIXED_KEYS)
+
+STEADY_EPOCHS = 64  # Unchanged epochs before extrapolating, at least one metrics window
+FILL_BLOCK = 8640  # Epochs evaluated per vectorized step of a fill
+
+def unsupported(sim):
+    """Reason steady-state filling cannot run this simulation, or None"""
+    if not hasattr(sim.results, 'extend'):
+        return "results sink has no extend"
+    if sim.rollups is not None and not hasattr(sim.rollups, 'extend'):
+        return "rollups have no extend"
+    if set(sim.conditions) != set(STATE_KEYS):
+        return "conditions differ from the model's state"
+    if getattr(sim, 'ledger', None) is not None:
+        return "a holder ledger needs every epoch"
+    return None
+
+def _metrics_key(metrics):
+    """
+    MarketMetrics accumulators that feed calculate_economics and epoch
+    durations; the pressure trend sums drift by rounding even under constant
+    pressure and feed neither, so a fill replays them instead
+    """
+    return (metrics.pressure_ewma_sum, metrics.pressure_ewma_weight, metrics.return_mean, metrics.return_m2,
+            len(metrics.price_window), len(metrics.pressure_window))
+
+class SteadyStateDetector:
+    def __init__(self, settle=STEADY_EPOCHS):
+        """
+        Watch a MarketSimulation epoch by epoch for a stationary regime
+        observe() after each run_epoch counts consecutive epochs in which
+        only the participation counts changed, each by one multiplier pair;
+        fill() then writes epochs in closed form until the regime ends.
+        In such a regime each epoch depends on its number alone: the counts
+        are running products and every metric follows from them through
+        vector_formulas, so a fill matches run_epoch bit for bit
+        """
+        self.settle = settle
+        self.patience = settle
+        self.steady = 0
+        self.probe = None
+        self.key = None
+        self.counts = None
+        self.multipliers = None
+        self.fills = []  # (start, stop) of every filled span
+
+    def observe(self, sim):
+        """Record the state after an epoch; True once it has been stationary long enough"""
+        conditions = sim.conditions
+        # Cheap early exit: outside a steady regime price or volumes move nearly every epoch
+        probe = _probe(conditions)
+        if probe != self.probe:
+            self.probe = probe
+            self.steady = 0
+            self.counts = None
+            return False
+
+        counts = _counts(conditions)
+        last = self.counts
+        multipliers = None
+        if last is not None:
+            if counts[0] == last[0] * GROWTH_MULTIPLIERS[0] and counts[1] == last[1] * GROWTH_MULTIPLIERS[1]:
+                multipliers = GROWTH_MULTIPLIERS
+            elif counts[0] == last[0] * DECLINE_MULTIPLIERS[0] and counts[1] == last[1] * DECLINE_MULTIPLIERS[1]:
+                multipliers = DECLINE_MULTIPLIERS
+        key = (multipliers, _fixed(conditions), _metrics_key(sim.market_metrics))
+        if multipliers is not None and key == self.key:
+            self.steady += 1
+        else:
+            self.steady = 0
+        self.key = key
+        self.counts = counts
+        self.multipliers = multipliers
+        return self.steady >= self.patience
+
+    def fill(self, sim, stop):
+        """
+        Write epochs sim.epoch..stop in closed form while the regime holds
+        The fill ends early at the next scheduled event, where the stability
+        index would switch multipliers, at a circuit breaker trip or a
+        non-finite value, and run_epoch takes over from there. Returns the
+        number of epochs filled
+        """
+        start = sim.epoch
+        if sim.events is not None and sim.events.cursor < len(sim.events):
+            stop = min(stop, int(sim.events.epochs[sim.events.cursor]))
+        epoch = start
+        while epoch < stop:
+            block_stop = min(stop, epoch + FILL_BLOCK)
+            epoch += self._fill_block(sim, epoch, block_stop)
+            if epoch < block_stop:
+                break
+
+        if epoch > start:
+            self.fills.append((start, epoch))
+            self.counts = _counts(sim.conditions)
+            self.patience = self.settle
+        if epoch < stop:
+            # Regime ended; after a fruitless attempt wait twice as long before the next
+            self.steady = 0
+            if epoch == start:
+                self.patience *= 2
+        return epoch - start
+
+    def _fill_block(self, sim, start, stop):
+        """Fill [start, stop) or the valid prefix of it; returns epochs written"""
+        conditions = sim.conditions
+        metrics = sim.market_metrics
+        n = stop - start
+        # Running products in run_epoch's order: entry j is the count entering epoch start + j
+        counts = {}
+        for key, m in zip(GROWTH_KEYS, self.multipliers):
+            factors = np.full(n + 1, m)
+            factors[0] = conditions[key]
+            counts[key] = np.multiply.accumulate(factors)
+
+        state = {key: conditions[key] for key in FIXED_KEYS}
+        state.update({key: values[:n] for key, values in counts.items()})
+        with np.errstate(all='ignore'):
+            economics = vf.calculate_economics(**state, pressure_signal=metrics.get_market_pressure(),
+                                               constants=sim.constants)
+            epoch_duration = vf.determine_epoch_duration(counts['daily_transactions'][:n],
+                                                         conditions['validator_count'] * 1000,
+                                                         metrics.get_volatility())
+        halt, emergency, rebase = (economics['circuit_breakers'][name] for name in vf.CIRCUIT_BREAKERS)
+        columns = {
+            'epoch': np.arange(start, stop),
+            'epoch_duration': epoch_duration,
+            'current_price': conditions['current_price'],
+            'validator_count': conditions['validator_count'],
+            'total_holders': counts['total_holders'][1:],
+            'transaction_volume': counts['daily_transactions'][1:] * conditions['avg_transaction_size'],
+            'daily_transactions': counts['daily_transactions'][1:],
+            'circuit_breaker_flags': vf.pack_flags(halt, emergency, rebase),
+            'failing_metric_flags': economics['failing_metrics']
+        }
+        for name in ResultStore.COLUMNS:
+            if name not in columns:
+                columns[name] = economics[name]
+        columns = {name: np.broadcast_to(values, (n,)) for name, values in columns.items()}
+
+        # Valid while the stability index keeps choosing the same multipliers,
+        # no rebase moves the price and every value stays finite
+        valid = (columns['price_stability_index'] < 0.8) == (self.multipliers == DECLINE_MULTIPLIERS)
+        valid &= ~np.broadcast_to(rebase, (n,))
+        for values in columns.values():
+            if values.dtype.kind == 'f':
+                valid &= np.isfinite(values)
+        if not valid.all():
+            n = int(np.argmin(valid))
+            if n == 0:
+                return 0
+            columns = {name: values[:n] for name, values in columns.items()}
+
+        sim.results.extend(columns)
+        if sim.rollups is not None:
+            sim.rollups.extend(columns)
+
+        # Only the volume window changes content, and the pressure trend sums
+        # drift; replaying both keeps MarketMetrics exactly as run_epoch leaves it
+        pressure = float(columns['market_pressure'][0])
+        for volume in columns['transaction_volume'].tolist():
+            metrics._update_volume(volume)
+            metrics._update_pressure(pressure)
+        for key in GROWTH_KEYS:
+            conditions[key] = float(counts[key][n])
+        sim.epoch = start + n
+        return n
@@ -0,0 +1,137 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from results import ResultStore
+
+CHUNK_EPOCHS = 8640  # One simulated day of epochs per record batch
+RESULTS_FILE = 'results.arrow'
+
+SCHEMA = pa.schema([
+    (name, pa.from_numpy_dtype(dtype)) for name, dtype in ResultStore.COLUMNS.items()
+])
+
+class ChunkedResultWriter:
+    """
+    Results sink that flushes fixed-size chunks to an Arrow IPC file
+    Takes the same append() calls as ResultStore but only ever holds one
+    chunk in memory; each full chunk becomes one record batch. The file is
+    written under a temporary name and moved into place by close()
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_EPOCHS):
+        self.path = path
+        self.chunk_size = max(1, int(chunk_size))
+        self.chunk = ResultStore(self.chunk_size)
+        self.flushed = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.sink = pa.OSFile(path + '.tmp', 'wb')
+        self.writer = pa.ipc.new_file(self.sink, SCHEMA)
+
+    def __len__(self):
+        return self.flushed + len(self.chunk)
+
+    def append(self, **values):
+        """Record one epoch, flushing when the chunk is full"""
+        self.chunk.append(**values)
+        if len(self.chunk) == self.chunk_size:
+            self.flush()
+
+    def extend(self, columns):
+        """Record a block of epochs given as {name: array}, flushing each chunk that fills up"""
+        n = len(columns['epoch'])
+        start = 0
+        while start < n:
+            stop = min(n, start + self.chunk_size - len(self.chunk))
+            self.chunk.extend({name: column[start:stop] for name, column in columns.items()})
+            start = stop
+            if len(self.chunk) == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered epochs as one record batch"""
+        if not len(self.chunk):
+            return
+        self.write_batch(self.chunk.column)
+        self.chunk.cursor = 0
+
+    def write_batch(self, column):
+        """Write one record batch from a column(name) -> array accessor"""
+        batch = pa.record_batch([pa.array(column(name)) for name in SCHEMA.names], schema=SCHEMA)
+        self.writer.write_batch(batch)
+        self.flushed += batch.num_rows
+
+    def close(self):
+        """Flush the last partial chunk and publish the file"""
+        self.flush()
+        self.writer.close()
+        self.sink.close()
+        os.replace(self.path + '.tmp', self.path)
+
+def write_results(results, path, chunk_size=CHUNK_EPOCHS):
+    """Write a filled ResultStore to an Arrow IPC file in chunk_size batches"""
+    writer = ChunkedResultWriter(path, chunk_size)
+    for start in range(0, len(results), writer.chunk_size):
+        stop = min(start + writer.chunk_size, len(results))
+        writer.write_batch(lambda name: results.column(name)[start:stop])
+    writer.close()
+    return path
+
+class ResultDataset:
+    """
+    Memory-mapped results written by ChunkedResultWriter
+    Numeric columns of each chunk are NumPy views straight into the mapped
+    file, so only the pages a column touches are ever read. column() and
+    to_dataframe() assemble whole columns; analysis and reports go through
+    chunks(), column_chunks() and take() and never hold more than a chunk
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.source = pa.memory_map(path, 'r')
+        self.table = pa.ipc.open_file(self.source).read_all()
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def chunks(self):
+        """Yield one dict of column arrays per stored chunk"""
+        for batch in self.table.to_batches():
+            yield {
+                name: batch.column(name).to_numpy(zero_copy_only=False)
+                for name in SCHEMA.names
+            }
+
+    def column_chunks(self, name):
+        """Yield one column a stored chunk at a time"""
+        for chunk in self.table.column(name).chunks:
+            yield chunk.to_numpy(zero_copy_only=False)
+
+    def take(self, indices):
+        """DataFrame of the rows at sorted indices, gathered a chunk at a time"""
+        indices = np.asarray(indices, dtype=np.int64)
+        parts = {name: [] for name in SCHEMA.names}
+        start = 0
+        for batch in self.table.to_batches():
+            stop = start + batch.num_rows
+            local = indices[np.searchsorted(indices, start):np.searchsorted(indices, stop)] - start
+            for name in SCHEMA.names:
+                parts[name].append(batch.column(name).to_numpy(zero_copy_only=False)[local])
+            start = stop
+        return pd.DataFrame({
+            name: np.concatenate(values) if values else np.zeros(0, dtype=ResultStore.COLUMNS[name])
+            for name, values in parts.items()
+        })
+
+    def column(self, name):
+        """Return one column as a NumPy array, zero-copy when stored in a single chunk"""
+        chunks = self.table.column(name).chunks
+        if not chunks:
+            return np.zeros(0, dtype=ResultStore.COLUMNS[name])
+        if len(chunks) == 1:
+            return chunks[0].to_numpy(zero_copy_only=False)
+        return np.concatenate([chunk.to_numpy(zero_copy_only=False) for chunk in chunks])
+
+    def to_dataframe(self):
+        """Assemble every column into a DataFrame"""
+        return pd.DataFrame({name: self.column(name) for name in SCHEMA.names}, copy=False)
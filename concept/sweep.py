@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import vector_formulas as vf
+from ensemble import EnsembleSimulation, STATE_KEYS
+from episodes import crisis_mask
+from formulas import validate_targets
+
+# Per-point outcomes a sweep reports, one heatmap each
+SWEEP_METRICS = ('equilibrium_percentage', 'targets_passed') + vf.CIRCUIT_BREAKERS
+
+def parse_axis(spec):
+    """
+    Parse a command-line axis 'key=start:stop:num' (inclusive linspace) or
+    'key=v1,v2,...' into (key, values)
+    """
+    key, _, values = spec.partition('=')
+    if key not in STATE_KEYS:
+        raise ValueError(f"Unknown condition to sweep: {key}")
+    if ':' in values:
+        start, stop, num = values.split(':')
+        return key, np.linspace(float(start), float(stop), int(num))
+    return key, np.array([float(value) for value in values.split(',')])
+
+class BatchSimulation(EnsembleSimulation):
+    def __init__(self, conditions, paths, total_epochs, events=None, seed=None, constants=None,
+                 shared_events=False):
+        """
+        Shock-free batch of paths that keeps per-path analysis accumulators
+        conditions and constants may hold one value per path, so each path
+        can be a different scenario or constant set; without events every
+        path follows the same recurrence as a MarketSimulation of it.
+        shared_events applies one sampled event path to every path
+        """
+        super().__init__(conditions, paths, total_epochs, price_volatility=0.0, volume_volatility=0.0,
+                         sample_every=total_epochs, seed=seed, events=events, constants=constants,
+                         shared_events=shared_events)
+
+        # Per-path accumulators for the validate_targets inputs, as in StreamingAnalysis
+        self.price_mean = np.zeros(self.paths)
+        self.price_m2 = np.zeros(self.paths)
+        self.sums = {
+            name: np.zeros(self.paths)
+            for name in ('liquidity_health_index', 'network_utility_score', 'transaction_fee_usdc')
+        }
+        self.in_crisis = np.zeros(self.paths, dtype=bool)
+        self.crisis_count = np.zeros(self.paths, dtype=np.int64)
+        self.recovery_count = np.zeros(self.paths, dtype=np.int64)
+
+    def _record(self, epoch_number, economics):
+        """Accumulate per-path counters; a batch keeps no percentile bands"""
+        breakers = economics['circuit_breakers']
+        for name in vf.CIRCUIT_BREAKERS:
+            self.breaker_counts[name] += breakers[name]
+        self.equilibrium_counts += economics['is_equilibrium']
+        price = self.column('current_price')
+        np.maximum(self.max_price_deviation, np.abs(price - 1), out=self.max_price_deviation)
+
+        delta = price - self.price_mean
+        self.price_mean += delta / (self.epochs_run + 1)
+        self.price_m2 += delta * (price - self.price_mean)
+        for name, total in self.sums.items():
+            total += economics[name]
+
+        # Recovery episodes open on entering a crisis and succeed on leaving it
+        crisis = crisis_mask(price, economics['liquidity_ratio'], economics['price_stability_index'])
+        self.crisis_count += crisis & ~self.in_crisis
+        self.recovery_count += ~crisis & self.in_crisis
+        self.in_crisis = crisis
+
+    def analysis(self, targets):
+        """
+        validate_targets inputs and verdicts per path, as arrays
+        Same definitions as analyze_results; means are running sums, so
+        they can differ from it in the last bits
+        """
+        n = self.epochs_run
+        with np.errstate(divide='ignore', invalid='ignore'):
+            analysis = {
+                'stability_metrics': {
+                    'price_volatility': np.sqrt(self.price_m2 / (n - 1)) if n > 1 else np.full(self.paths, np.nan),
+                    'liquidity_health': self.sums['liquidity_health_index'] / n,
+                    'price_max_deviation': self.max_price_deviation
+                },
+                'recovery_metrics': {
+                    'recovery_success_rate': np.where(self.crisis_count > 0,
+                                                      self.recovery_count / self.crisis_count, 1.0)
+                },
+                'economic_metrics': {
+                    'economic_efficiency': self.sums['network_utility_score'] / self.sums['transaction_fee_usdc']
+                }
+            }
+        analysis['success_criteria'] = validate_targets(analysis, targets)
+        return analysis
+
+    def outcomes(self, targets):
+        """
+        Per-path outcomes as flat arrays
+        Returns {'equilibrium_percentage', 'circuit_breakers',
+        'success_criteria', 'targets_passed', 'passes_targets'}
+        """
+        epochs = max(1, self.epochs_run)
+        criteria = {
+            name: np.broadcast_to(np.asarray(mask), (self.paths,))
+            for name, mask in self.analysis(targets)['success_criteria'].items()
+        }
+        passed = sum(mask.astype(np.int64) for mask in criteria.values())
+        return {
+            'equilibrium_percentage': self.equilibrium_counts / epochs * 100,
+            'circuit_breakers': self.breaker_counts,
+            'success_criteria': criteria,
+            'targets_passed': passed,
+            'passes_targets': passed == len(criteria)
+        }
+
+class ParameterSweep(BatchSimulation):
+    def __init__(self, initial_conditions, axes, total_epochs, events=None, seed=None):
+        """
+        One path per point of the Cartesian grid of axes, run as one batch
+        axes maps condition keys to the values they take, e.g.
+        {'validator_count': [1000, 3000, 5000], 'buys_volume': np.geomspace(1e7, 1e9, 20)};
+        every other condition comes from initial_conditions. Events, if any,
+        are one sampled path shared by every grid point, so neighbouring
+        cells differ by the swept values rather than by event noise
+        """
+        self.axes = {}
+        for key, values in axes.items():
+            if key not in STATE_KEYS:
+                raise ValueError(f"Unknown condition to sweep: {key}")
+            self.axes[key] = np.asarray(values, dtype=np.float64)
+        grid = np.meshgrid(*self.axes.values(), indexing='ij')
+        self.shape = grid[0].shape if grid else ()
+        conditions = {**initial_conditions, **{key: values.ravel() for key, values in zip(self.axes, grid)}}
+        super().__init__(conditions, int(np.prod(self.shape)), total_epochs, events=events, seed=seed,
+                         shared_events=True)
+
+    def results(self, targets):
+        """
+        Sweep outcomes shaped like the grid, one axis per swept key
+        Returns {'axes', 'equilibrium_percentage', 'circuit_breakers',
+        'success_criteria', 'targets_passed', 'passes_targets'}
+        """
+        outcomes = self.outcomes(targets)
+        return {
+            'axes': self.axes,
+            'equilibrium_percentage': outcomes['equilibrium_percentage'].reshape(self.shape),
+            'circuit_breakers': {
+                name: counts.reshape(self.shape) for name, counts in outcomes['circuit_breakers'].items()
+            },
+            'success_criteria': {
+                name: mask.reshape(self.shape) for name, mask in outcomes['success_criteria'].items()
+            },
+            'targets_passed': outcomes['targets_passed'].reshape(self.shape),
+            'passes_targets': outcomes['passes_targets'].reshape(self.shape)
+        }
+
+def sweep_frame(sweep):
+    """One row per grid point: the swept values followed by every outcome"""
+    grid = np.meshgrid(*sweep['axes'].values(), indexing='ij')
+    data = {key: values.ravel() for key, values in zip(sweep['axes'], grid)}
+    data['equilibrium_percentage'] = sweep['equilibrium_percentage'].ravel()
+    for name, counts in sweep['circuit_breakers'].items():
+        data[name] = counts.ravel()
+    for name, mask in sweep['success_criteria'].items():
+        data[f"meets_{name}"] = mask.ravel()
+    data['targets_passed'] = sweep['targets_passed'].ravel()
+    data['passes_targets'] = sweep['passes_targets'].ravel()
+    return pd.DataFrame(data)
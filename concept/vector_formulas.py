@@ -0,0 +1,260 @@
+import numpy as np
+import math
+
+CIRCUIT_BREAKERS = ('halt_trading', 'emergency_spreads', 'needs_rebase')
+FAILING_METRICS = ('price_stability', 'liquidity_health', 'network_utility', 'convergence')
+
+def _log2(x):
+    """
+    Elementwise math.log2
+    NumPy's SIMD log2 can be one ulp away from libm, so the log is taken with
+    math.log2 once per distinct value and scattered back
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 0:
+        return np.float64(math.log2(x))
+    if x.size and (x == x.flat[0]).all():
+        # Common case of a constant broadcast across paths or epochs
+        return np.full(x.shape, math.log2(x.flat[0]))
+    values, inverse = np.unique(x, return_inverse=True)
+    logs = np.fromiter(map(math.log2, values.tolist()), dtype=np.float64, count=len(values))
+    return logs[inverse].reshape(x.shape)
+
+def _pick(constants, names):
+    """Keyword overrides for the names present in constants"""
+    return {name: constants[name] for name in names if name in constants}
+
+def pack_flags(*masks):
+    """Pack boolean masks into uint8 bit flags, first mask in bit 0"""
+    flags = np.zeros(np.broadcast(*masks).shape, dtype=np.uint8)
+    for bit, mask in enumerate(masks):
+        flags |= np.asarray(mask, dtype=np.uint8) << bit
+    return flags
+
+def unpack_flags(flags, names):
+    """Unpack bit flags into a dict of boolean masks keyed by names"""
+    flags = np.asarray(flags)
+    return {name: (flags & (1 << bit)) != 0 for bit, name in enumerate(names)}
+
+def flag_names(flags, names):
+    """List the names whose bit is set in a single flags value"""
+    return [name for bit, name in enumerate(names) if int(flags) & (1 << bit)]
+
+def price_stability_index(current_price, market_pressure, validator_participation, holder_participation):
+    """Vectorized price_stability_index"""
+    price_deviation = np.abs(1 - current_price)
+    pressure_factor = 1 / (1 + np.abs(market_pressure))
+    participation_score = np.minimum(1, (validator_participation + holder_participation) / 2)
+
+    base_stability = 0.3  # Minimum stability floor
+    stability = base_stability + (
+        0.3 * (1 / (1 + price_deviation)) +
+        0.2 * pressure_factor +
+        0.2 * participation_score
+    )
+
+    return np.minimum(1, stability)
+
+def market_pressure(buys_volume, sells_volume, effective_liquidity, validator_count):
+    """Vectorized market_pressure"""
+    volume_imbalance = (buys_volume - sells_volume) / np.maximum(1, buys_volume + sells_volume)
+    liquidity_factor = effective_liquidity / np.maximum(1, validator_count * 1000000)
+    return volume_imbalance * (1 / np.maximum(0.1, liquidity_factor))
+
+def network_utility_score(daily_transactions, cross_chain_transfers, target_transfers=500000):
+    """Vectorized network_utility_score"""
+    tx_utility = np.minimum(1.0, daily_transactions / (target_transfers * 2))
+    cross_chain_utility = np.minimum(1.0, cross_chain_transfers / target_transfers)
+    return (tx_utility * 0.6) + (cross_chain_utility * 0.4)
+
+def liquidity_health_index(active_participants, total_holders, current_liquidity, stability_reserve, required_reserve):
+    """Vectorized liquidity_health_index"""
+    participation_ratio = active_participants / np.maximum(1, total_holders)
+    liquidity_ratio = current_liquidity / 0.8  # Target liquidity ratio
+    reserve_ratio = stability_reserve / np.maximum(1, required_reserve)
+    return np.maximum(0.2, np.minimum(1, participation_ratio * liquidity_ratio * reserve_ratio))
+
+def stability_reserve_requirement(total_supply, total_decay_penalties):
+    """Vectorized stability_reserve_requirement"""
+    base_requirement = total_supply * 0.1  # 10% of total supply
+    dynamic_requirement = total_decay_penalties * 2  # 2x daily decay
+    return np.maximum(base_requirement, dynamic_requirement)
+
+def validator_reward(base_reward_rate, daily_transactions, validator_count, psi, validator_share=0.9):
+    """Vectorized validator_reward"""
+    transaction_share = daily_transactions / np.maximum(1, validator_count)
+    market_reward = transaction_share * base_reward_rate * validator_share
+    stability_bonus = market_reward * psi
+    return market_reward + stability_bonus
+
+def holder_cost(base_rate, time_held, balance, price_stability_index):
+    """Vectorized holder_cost"""
+    balance_factor = _log2(1 + balance / 1000)
+    stability_factor = 1 - price_stability_index
+    return base_rate * time_held * balance_factor * stability_factor
+
+def validator_holder_cost(holder_cost, validator_reward, participation_score):
+    """Vectorized validator_holder_cost"""
+    return holder_cost - (validator_reward * participation_score)
+
+def transaction_fee(base_fee, price_stability_index, transaction_size, liquidity_ratio):
+    """Vectorized transaction_fee"""
+    volume_factor = 1 + _log2(1 + transaction_size / 10000)
+    liquidity_factor = 1 / np.maximum(0.1, liquidity_ratio)
+    stability_factor = 1 + (1 - price_stability_index)
+    return base_fee * volume_factor * liquidity_factor * stability_factor
+
+def convergence_rate(current_price, target_price, market_pressure, stability_index,
+                     alpha=0.1, beta=-0.05, gamma=0.05):
+    """Vectorized convergence_rate"""
+    price_gap = target_price - current_price
+    return (alpha * price_gap) + (beta * market_pressure) + (gamma * stability_index)
+
+def circuit_breaker_conditions(liquidity_ratio, current_price, liquidity_health_index):
+    """Vectorized circuit_breaker_conditions, returns boolean masks"""
+    halt_trading = np.asarray(liquidity_ratio) < 0.1
+    emergency_spreads = np.asarray(liquidity_ratio) < 0.2
+    needs_rebase = np.abs(current_price - 1) > 0.2
+    return halt_trading, emergency_spreads, needs_rebase
+
+def equilibrium_state(
+    price_stability_index,
+    liquidity_health_index,
+    network_utility_score,
+    convergence_rate,
+    target_thresholds={
+        'psi_min': 0.8,
+        'lhi_min': 0.7,
+        'nus_min': 0.6,
+        'conv_max': 10
+    }
+):
+    """
+    Vectorized equilibrium_state
+    Returns (is_equilibrium, failing_flags) with failing metrics packed as
+    bit flags in FAILING_METRICS order
+    """
+    failing = pack_flags(
+        ~(np.asarray(price_stability_index) >= target_thresholds['psi_min']),
+        ~(np.asarray(liquidity_health_index) >= target_thresholds['lhi_min']),
+        ~(np.asarray(network_utility_score) >= target_thresholds['nus_min']),
+        ~(np.asarray(convergence_rate) <= target_thresholds['conv_max'])
+    )
+    return failing == 0, failing
+
+# Default equilibrium_state thresholds, which constants can override by name
+EQUILIBRIUM_THRESHOLDS = equilibrium_state.__defaults__[0]
+
+def calculate_settlement_rate(daily_transactions, validator_count, liquidity_ratio, market_pressure):
+    """Vectorized calculate_settlement_rate"""
+    base_rate = 0.999
+
+    validator_capacity = validator_count * 1000  # Each validator can handle 1000 tx/day
+    capacity_utilization = np.minimum(1, daily_transactions / (validator_capacity * 0.8))
+    validator_factor = 1 - (capacity_utilization ** 2) * 0.1
+
+    liquidity_factor = np.minimum(1, liquidity_ratio / 0.8)
+    pressure_impact = np.maximum(0, 1 - np.abs(market_pressure) * 0.05)
+
+    return base_rate * liquidity_factor * validator_factor * pressure_impact
+
+def determine_epoch_duration(transaction_volume, network_throughput, market_volatility):
+    """Vectorized determine_epoch_duration"""
+    base_epoch_duration = 10  # seconds
+    return np.where(np.asarray(transaction_volume) > network_throughput * 0.8, max(5, base_epoch_duration - 2),
+                    np.where(np.asarray(market_volatility) > 0.5, max(5, base_epoch_duration - 1),
+                             base_epoch_duration))
+
+def calculate_dynamic_spread(liquidity_ratio, market_pressure, normalized_validators,
+                             base_spread=0.001, validator_base=0.5):
+    """Vectorized calculate_dynamic_spread"""
+    liquidity_factor = np.maximum(1, (0.8 / liquidity_ratio) ** 2)
+    pressure_factor = 1 + np.abs(market_pressure)
+    validator_factor = 1 / (validator_base + normalized_validators)
+    return base_spread * liquidity_factor * pressure_factor * validator_factor
+
+def calculate_economics(validator_count, total_holders, daily_transactions, current_price,
+                        avg_transaction_size, avg_holding_balance, days_held, liquidity_ratio,
+                        cross_chain_transfers, buys_volume, sells_volume, pressure_signal=0.0,
+                        constants=None):
+    """
+    Vectorized calculate_economics
+    Like every formula in this module, each argument may be a scalar or a
+    NumPy array and they broadcast against each other; operations keep the
+    order of the scalar versions in formulas.py, so results match them bit
+    for bit. pressure_signal stands in for
+    market_metrics.get_market_pressure() and may itself be an array, one
+    value per row. constants overrides the tunable formula constants by
+    keyword name (alpha, beta, gamma, validator_share, base_spread,
+    validator_base and the equilibrium_state thresholds), each a scalar or
+    an array with one value per row
+    """
+    constants = constants or {}
+    validator_participation = validator_count / 5000
+    holder_participation = total_holders / 1000000
+
+    psi = price_stability_index(current_price, pressure_signal,
+                                validator_count / 5000,
+                                total_holders / 1000000)
+
+    market_press = market_pressure(buys_volume, sells_volume,
+                                   liquidity_ratio * (buys_volume + sells_volume),
+                                   validator_count)
+
+    nus = network_utility_score(daily_transactions, cross_chain_transfers, 500000)
+
+    lhi = liquidity_health_index(
+        daily_transactions / 24,
+        total_holders,
+        liquidity_ratio,
+        buys_volume * liquidity_ratio,
+        stability_reserve_requirement(total_holders * avg_holding_balance, 0)
+    )
+
+    settlement_rate = calculate_settlement_rate(daily_transactions, validator_count,
+                                                liquidity_ratio, market_press)
+
+    base_reward = 0.1
+    v_reward = validator_reward(base_reward, daily_transactions, validator_count, psi,
+                                **_pick(constants, ('validator_share',)))
+    h_cost = holder_cost(0.01, days_held, avg_holding_balance, psi)
+    vh_cost = validator_holder_cost(h_cost, v_reward, nus)
+    tx_fee = transaction_fee(0.001, psi, avg_transaction_size, liquidity_ratio)
+
+    conv_rate = convergence_rate(current_price, 1.0, market_press, psi,
+                                 **_pick(constants, ('alpha', 'beta', 'gamma')))
+
+    halt, emergency, rebase = circuit_breaker_conditions(liquidity_ratio, current_price, lhi)
+
+    thresholds = {**EQUILIBRIUM_THRESHOLDS, **_pick(constants, EQUILIBRIUM_THRESHOLDS)}
+    is_equilibrium, failing = equilibrium_state(psi, lhi, nus, conv_rate, thresholds)
+
+    dynamic_spread = calculate_dynamic_spread(liquidity_ratio, pressure_signal,
+                                              validator_count / 5000,
+                                              **_pick(constants, ('base_spread', 'validator_base')))
+
+    return {
+        'price_stability_index': psi,
+        'market_pressure': market_press,
+        'network_utility_score': nus,
+        'liquidity_health_index': lhi,
+        'daily_validator_reward_usdc': v_reward,
+        'daily_holder_cost_usdc': h_cost,
+        'validator_holder_net_usdc': vh_cost,
+        'transaction_fee_usdc': tx_fee,
+        'convergence_rate': conv_rate,
+        'liquidity_ratio': liquidity_ratio,
+        'dynamic_spread': dynamic_spread,
+        'validator_participation': validator_participation,
+        'validator_count': validator_count,
+        'holder_participation': holder_participation,
+        'holder_count': total_holders,
+        'transaction_settlement_rate': settlement_rate,
+        'circuit_breakers': {
+            'halt_trading': halt,
+            'emergency_spreads': emergency,
+            'needs_rebase': rebase
+        },
+        'is_equilibrium': is_equilibrium,
+        'failing_metrics': failing
+    }